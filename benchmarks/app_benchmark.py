@@ -0,0 +1,293 @@
+# streamlit_app.py 헤드리스 벤치마크
+#
+# Streamlit AppTest로 앱을 브라우저 없이 실행하면서 자주 쓰는 상호작용을 재현하고,
+# 상호작용마다 콜드/웜 재실행 시간, 콜드 실행의 최대 메모리 증가량(RSS), 그래프 전송 크기를 잰다.
+# 콜드는 앱 모듈을 다시 import하고 캐시가 빈 상태의 첫 실행이다 (streamlit, pandas 같은 라이브러리는 import된 채로 둔다).
+# 결과는 JSON으로 저장하고 thresholds.json(절대 한도)이나 이전 결과(--baseline, 상대 한도)와 비교해
+# 넘으면 종료 코드 1로 끝난다.
+#
+#   python benchmarks/app_benchmark.py --output bench.json
+#   python benchmarks/app_benchmark.py --baseline bench.json --tolerance 1.2
+#
+# 기본값으로는 원격 데이터 URL을 비워(--online 없이) 예시 데이터로 재현 가능하게 측정하고,
+# 캐시·제출 DB는 임시 디렉터리를 쓴다.
+import argparse
+import ctypes
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+APP_PATH = APP_DIR / "streamlit_app.py"
+DEFAULT_THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+
+TAB1 = "📊 공식 공개 데이터 대시보드"
+TAB2 = "📈 사용자 데이터 분석"
+TAB5 = "🎮 기후 행동 퀴즈 게임"
+
+
+def isolate(online):
+    # 앱 모듈을 불러오기 전에 환경 변수를 정해야 settings/data_sources에 반영된다
+    workdir = Path(tempfile.mkdtemp(prefix="climate-bench-"))
+    os.environ.setdefault("CLIMATE_APP_CACHE_DIR", str(workdir / "cache"))
+    os.environ.setdefault("CLIMATE_APP_SUBMISSIONS_DB", str(workdir / "submissions.sqlite3"))
+    # 번들 없이 요청 때 계산하는 경로를 잰다. 번들로 재려면 CLIMATE_APP_BUNDLE을 지정한다
+    os.environ.setdefault("CLIMATE_APP_BUNDLE", str(workdir / "bundle"))
+    if not online:
+        for name in ("NOAA", "GLACIER", "MENTAL_HEALTH"):
+            os.environ[f"CLIMATE_SOURCE_{name}_URL"] = ""
+    sys.path.insert(0, str(APP_DIR))
+    return workdir
+
+
+# ---------------- 시나리오 ----------------
+# 각 시나리오는 (준비, 상호작용) 함수 쌍이다. 준비는 측정하지 않고, 상호작용은 at.run() 한 번을 포함한다.
+# AppTest는 위젯 조작 뒤 탭 상태를 유지하지 않으므로 실행할 때마다 active_tab을 다시 넣는다.
+
+def _on_tab(at, label):
+    at.session_state["active_tab"] = label
+    return at
+
+
+def _open(label):
+    def prepare(at):
+        _on_tab(at, label).run()
+    return prepare
+
+
+def tab1_initial(at, step):
+    _on_tab(at, TAB1).run()
+
+
+def tab1_start_year(at, step):
+    _on_tab(at, TAB1).slider(key="start_year").set_value(1950 + step % 40).run()
+
+
+def tab1_window(at, step):
+    # 스무딩 윈도우 슬라이더에는 key가 없어 라벨로 찾는다
+    slider = next(s for s in at.slider if s.label == "스무딩 윈도우 크기")
+    _on_tab(at, TAB1)
+    slider.set_value(3 + step % 8).run()
+
+
+def tab1_corr_window(at, step):
+    _on_tab(at, TAB1).slider(key="corr_window").set_value(5 + step % 11).run()
+
+
+def tab2_analyze(at, step):
+    # 입력을 바꿔 가며 눌러야 매번 새 분석이 된다
+    _on_tab(at, TAB2).slider(key="electricity_usage").set_value(300 + step % 400).run()
+    button = next(b for b in at.button if b.label == "📊 내 기후 영향도 분석하기")
+    _on_tab(at, TAB2)
+    button.click().run()
+
+
+def quiz_answer(at, step):
+    # 게임이 끝났으면 새 게임부터 시작한다 (준비 단계가 아니므로 같이 잰다)
+    if at.session_state["current_quiz"] >= len(at.session_state["quiz_ids"]):
+        _on_tab(at, TAB5).button(key="reset_quiz").click().run()
+    current = at.session_state["current_quiz"]
+    button = next(b for b in at.button if b.key == f"option_{current}_0")
+    _on_tab(at, TAB5)
+    button.click().run()
+
+
+def tab_switch(at, step):
+    labels = [TAB1, TAB2, TAB5]
+    _on_tab(at, labels[step % len(labels)]).run()
+
+
+SCENARIOS = {
+    "tab1_initial": (lambda at: None, tab1_initial),
+    "tab1_start_year": (_open(TAB1), tab1_start_year),
+    "tab1_window": (_open(TAB1), tab1_window),
+    "tab1_corr_window": (_open(TAB1), tab1_corr_window),
+    "tab2_analyze": (_open(TAB2), tab2_analyze),
+    "quiz_answer": (_open(TAB5), quiz_answer),
+    "tab_switch": (_open(TAB1), tab_switch),
+}
+
+
+# ---------------- 측정 ----------------
+
+def _clear_caches():
+    import streamlit as st
+    from figure_cache import FIGURE_CACHE
+    from refresh_scheduler import get_scheduler
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    FIGURE_CACHE.invalidate()
+    get_scheduler().clear()
+    gc.collect()
+
+
+def _evict_app_modules():
+    # 앱 폴더의 모듈(벤치마크·테스트 제외)을 sys.modules에서 지워 다음 실행이 import부터 다시 하게 한다
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and Path(path).resolve().parent == APP_DIR:
+            del sys.modules[name]
+
+
+def _rss_mb(field):
+    # /proc/self/status의 VmRSS(현재)·VmHWM(최대) MiB. /proc이 없는 플랫폼에서는 None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key == field:
+                    return int(value.split()[0]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _reset_peak_rss():
+    # 해제된 힙을 OS에 돌려준 뒤(glibc) VmHWM(최대 RSS)을 현재 RSS로 되돌린다 (Linux 4.0+).
+    # 돌려주지 않으면 앞 시나리오가 비운 메모리를 다시 쓰는 동안 RSS가 늘지 않는다
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _payload_bytes(at):
+    return sum(len(chart.proto.spec) for chart in at.get("plotly_chart"))
+
+
+def _new_app():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(str(APP_PATH), default_timeout=120)
+
+
+def _check(at, name):
+    if at.exception:
+        raise RuntimeError(f"{name}: 앱에서 예외 발생: {at.exception[0].message}")
+
+
+def warm_up():
+    # 라이브러리(plotly 등)는 콜드에서도 import된 채로 두므로, 첫 시나리오만 그 비용을 떠안지 않게 한 번 실행해 둔다
+    _open(TAB1)(_new_app())
+
+
+def run_scenario(name, repeat):
+    prepare, interact = SCENARIOS[name]
+
+    # 콜드: 새 세션을 준비한 뒤 캐시를 모두 비우고 앱 모듈을 내려서 첫 상호작용
+    at = _new_app()
+    prepare(at)
+    _clear_caches()
+    _evict_app_modules()
+    # 메모리: 콜드 실행 동안 프로세스 RSS가 실행 전보다 최대 얼마나 늘었는지 (스크립트 스레드와 새로 채운 캐시 포함)
+    before = _rss_mb("VmRSS") if _reset_peak_rss() else None
+    start = time.perf_counter()
+    interact(at, 0)
+    cold = time.perf_counter() - start
+    peak = _rss_mb("VmHWM")
+    _check(at, name)
+
+    # 웜: 같은 세션에서 반복 (캐시가 찬 상태)
+    warm = []
+    for step in range(1, repeat + 1):
+        start = time.perf_counter()
+        interact(at, step)
+        warm.append(time.perf_counter() - start)
+        _check(at, name)
+    payload = _payload_bytes(at)
+    charts = len(at.get("plotly_chart"))
+
+    warm.sort()
+    return {
+        "cold_s": round(cold, 4),
+        "warm_p50_s": round(statistics.median(warm), 4),
+        "warm_p95_s": round(warm[min(len(warm) - 1, int(0.95 * len(warm)))], 4),
+        "warm_max_s": round(warm[-1], 4),
+        "warm_runs": len(warm),
+        "peak_rss_delta_mb": round(max(peak - before, 0.0), 2) if before is not None and peak is not None else None,
+        "payload_kb": round(payload / 1024, 1),
+        "charts": charts,
+    }
+
+
+def _metadata(online):
+    import numpy
+    import pandas
+    import plotly
+    import streamlit
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "streamlit": streamlit.__version__,
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "plotly": plotly.__version__,
+        "online": online,
+    }
+
+
+def find_regressions(results, thresholds, baseline=None, tolerance=1.2):
+    # thresholds: {시나리오: {지표: 최댓값}}, baseline: 이전 결과 파일의 results
+    regressions = []
+    for name, metrics in results.items():
+        for metric, limit in thresholds.get(name, {}).items():
+            if metrics.get(metric) is not None and metrics[metric] > limit:
+                regressions.append({"scenario": name, "metric": metric, "value": metrics[metric],
+                                    "limit": limit, "kind": "threshold"})
+        if baseline and name in baseline:
+            for metric in ("warm_p95_s", "peak_rss_delta_mb", "payload_kb"):
+                before = baseline[name].get(metric)
+                if before and metrics.get(metric) is not None and metrics[metric] > before * tolerance:
+                    regressions.append({"scenario": name, "metric": metric, "value": metrics[metric],
+                                        "limit": round(before * tolerance, 4), "kind": "baseline"})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="streamlit_app.py 헤드리스 벤치마크")
+    parser.add_argument("--repeat", type=int, default=20, help="웜 재실행 반복 횟수")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="실행할 시나리오 (여러 번 지정 가능)")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--thresholds", type=Path, default=DEFAULT_THRESHOLDS, help="절대 한도 JSON")
+    parser.add_argument("--baseline", type=Path, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="이전 결과 대비 허용 배율")
+    parser.add_argument("--online", action="store_true", help="원격 데이터 URL을 그대로 사용")
+    args = parser.parse_args(argv)
+
+    isolate(args.online)
+    warm_up()
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        results[name] = run_scenario(name, args.repeat)
+        r = results[name]
+        peak = "n/a" if r["peak_rss_delta_mb"] is None else f"+{r['peak_rss_delta_mb']:.1f}MB"
+        print(f"{name:18s} cold {r['cold_s']:.3f}s  warm p50 {r['warm_p50_s']:.3f}s p95 {r['warm_p95_s']:.3f}s  "
+              f"peak rss {peak}  payload {r['payload_kb']:.0f}KB ({r['charts']} charts)", flush=True)
+
+    thresholds = json.loads(args.thresholds.read_text()) if args.thresholds and args.thresholds.exists() else {}
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline else None
+    regressions = find_regressions(results, thresholds, baseline, args.tolerance)
+    report = {"meta": _metadata(args.online), "repeat": args.repeat, "results": results, "regressions": regressions}
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    for item in regressions:
+        print(f"REGRESSION {item['scenario']}.{item['metric']}: {item['value']} > {item['limit']} ({item['kind']})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+# streamlit_app.py 동시 접속 부하 테스트
+#
+# 앱을 로컬에서 `streamlit run`으로 띄우고, 브라우저 대신 웹소켓 세션 N개를 동시에 열어
+# traces.json에 기록된 상호작용(탭 전환, 사이드바 슬라이더 드래그, 퀴즈 답하기)을 재생한다.
+# 재실행 요청(rerun_script)을 보낸 뒤 script_finished를 받을 때까지를 한 번의 재실행 지연으로 잰다.
+# st.fragment 안의 위젯(탭2 입력, 퀴즈 버튼)은 브라우저처럼 fragment_id를 붙여 그 fragment만 다시 실행하게 한다.
+# 결과: 처리량(재실행/초), 지연 p50/p95/p99, 서버 RSS로 계산한 세션당 메모리.
+#
+#   python benchmarks/load_test.py --sessions 30 --output load.json
+#   python benchmarks/load_test.py --url http://localhost:8501 --sessions 10   # 이미 떠 있는 서버
+#
+# 메모리는 이 스크립트가 서버를 직접 띄웠을 때만 잰다 (/proc/<pid>/status의 VmRSS).
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from app_benchmark import APP_PATH, isolate
+
+DEFAULT_TRACES = Path(__file__).resolve().parent / "traces.json"
+KEY_PATTERN = re.compile(r"^\$\$ID-[0-9a-f]+-(.*)$")
+QUIZ_OPTION = re.compile(r"^option_(\d+)_(\d+)$")
+
+
+# ---------------- 서버 ----------------
+
+def start_server(port, online):
+    isolate(online)
+    command = [sys.executable, "-m", "streamlit", "run", str(APP_PATH), "--server.headless=true",
+               f"--server.port={port}", "--browser.gatherUsageStats=false"]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=os.environ.copy())
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit 서버가 종료되었습니다 (코드 {process.returncode})")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1) as response:
+                if response.read().strip() == b"ok":
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("streamlit 서버가 60초 안에 뜨지 않았습니다")
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+class RssSampler(threading.Thread):
+    # 부하 중 서버 RSS 최댓값
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self.peak = max(self.peak, rss_mb(self.pid))
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+# ---------------- 세션 ----------------
+
+class Session:
+    # 브라우저 한 탭을 흉내 낸다. 화면에 나온 위젯의 id를 key/라벨로 기억해 두고,
+    # 프런트엔드처럼 지금까지 정한 위젯 값을 재실행 요청마다 모두 보낸다
+    def __init__(self, url, index):
+        self.url = url
+        self.index = index
+        self.ws = None
+        self.page_script_hash = ""
+        self.by_key = {}
+        self.by_label = {}
+        self.fragments = {}  # 위젯 id -> 위젯이 들어 있는 fragment id
+        self.states = {}  # 위젯 id -> WidgetState (버튼 같은 트리거는 넣지 않는다)
+        self.latencies = []
+        self.fragment_reruns = 0
+        self.errors = 0
+        self.query_string = f"uid=load{index:04d}"
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, max_size=None, subprotocols=["streamlit"])
+        await self.rerun()
+
+    async def close(self):
+        await self.ws.close()
+
+    def _remember(self, widget_id, label, fragment_id=""):
+        if fragment_id:
+            self.fragments[widget_id] = fragment_id
+        match = KEY_PATTERN.match(widget_id)
+        if match and match.group(1) != "None":
+            self.by_key[match.group(1)] = widget_id
+        if label:
+            self.by_label[label] = widget_id
+
+    async def rerun(self, trigger=None, widget_id=None):
+        # widget_id: 값을 바꾼 위젯. fragment 안의 위젯이면 그 fragment만 다시 실행한다
+        message = BackMsg()
+        rerun = message.rerun_script
+        rerun.query_string = self.query_string
+        rerun.page_script_hash = self.page_script_hash
+        for state in self.states.values():
+            rerun.widget_states.widgets.add().CopyFrom(state)
+        if trigger is not None:
+            rerun.widget_states.widgets.add().CopyFrom(trigger)
+            widget_id = trigger.id
+        fragment_id = self.fragments.get(widget_id, "")
+        if fragment_id:
+            # fragment 재실행은 그 fragment의 요소만 다시 보내므로 그 fragment의 위젯만 잊는다
+            rerun.fragment_id = fragment_id
+            self.fragment_reruns += 1
+            self._forget(fragment_id)
+        else:
+            self.by_key, self.by_label, self.fragments = {}, {}, {}
+        start = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.ws.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = forward.new_session.page_script_hash
+            elif kind == "delta":
+                self._read_delta(forward.delta)
+            elif kind == "script_finished":
+                self.latencies.append(time.perf_counter() - start)
+                return
+
+    def _forget(self, fragment_id):
+        stale = {widget_id for widget_id, owner in self.fragments.items() if owner == fragment_id}
+        self.by_key = {key: widget_id for key, widget_id in self.by_key.items() if widget_id not in stale}
+        self.by_label = {label: widget_id for label, widget_id in self.by_label.items() if widget_id not in stale}
+        self.fragments = {widget_id: owner for widget_id, owner in self.fragments.items() if widget_id not in stale}
+
+    def _read_delta(self, delta):
+        kind = delta.WhichOneof("type")
+        if kind == "new_element":
+            element_type = delta.new_element.WhichOneof("type")
+            if element_type == "exception":
+                self.errors += 1
+                return
+            element = getattr(delta.new_element, element_type)
+            widget_id = getattr(element, "id", "")
+            if isinstance(widget_id, str) and widget_id.startswith("$$ID-"):
+                self._remember(widget_id, getattr(element, "label", ""), delta.fragment_id)
+        elif kind == "add_block" and delta.add_block.WhichOneof("type") == "tab_container":
+            self._remember(delta.add_block.tab_container.id, "")
+
+    def _widget(self, step):
+        widget_id = self.by_key.get(step["key"]) if "key" in step else self.by_label.get(step["label"])
+        if widget_id is None:
+            raise LookupError(f"위젯을 찾을 수 없습니다: {step.get('key') or step.get('label')}")
+        return widget_id
+
+    async def play(self, step, think_scale):
+        action = step["action"]
+        if action == "think":
+            await asyncio.sleep(step["seconds"] * think_scale * random.uniform(0.5, 1.5))
+        elif action == "tab":
+            tabs = self.by_key["active_tab"]
+            self.states[tabs] = _state(tabs, string_value=step["label"])
+            await self.rerun()
+        elif action == "slider":
+            # 드래그: 놓을 때마다 재실행이 하나씩 일어난다
+            widget_id = self._widget(step)
+            for value in step["values"]:
+                state = _state(widget_id)
+                state.double_array_value.data.extend(value)
+                self.states[widget_id] = state
+                await self.rerun(widget_id=widget_id)
+        elif action == "button":
+            await self.rerun(trigger=_state(self._widget(step), trigger_value=True))
+        elif action == "quiz_answer":
+            # 지금 화면의 문제 번호로 선택지 버튼 key를 만든다. 게임이 끝났으면 다시 시작한다
+            current = [int(m.group(1)) for key in self.by_key if (m := QUIZ_OPTION.match(key))]
+            if not current:
+                await self.rerun(trigger=_state(self.by_key["reset_quiz"], trigger_value=True))
+                current = [int(m.group(1)) for key in self.by_key if (m := QUIZ_OPTION.match(key))]
+            key = f"option_{current[0]}_{step.get('option', 0)}"
+            await self.rerun(trigger=_state(self.by_key.get(key) or self.by_key[f"option_{current[0]}_0"],
+                                            trigger_value=True))
+        else:
+            raise ValueError(f"알 수 없는 동작: {action}")
+
+
+def _state(widget_id, **value):
+    return WidgetState(id=widget_id, **value)
+
+
+async def run_session(url, index, trace_name, trace, iterations, think_scale, ramp, played, done):
+    await asyncio.sleep(ramp * index)
+    session = Session(url, index)
+    failure = None
+    try:
+        await session.connect()
+        for _ in range(iterations):
+            for step in trace:
+                await session.play(step, think_scale)
+    except (LookupError, websockets.WebSocketException, OSError) as e:
+        failure = f"{trace_name}#{index}: {e}"
+    # 모든 세션이 끝날 때까지 연결을 유지해야 세션당 메모리를 잴 수 있다
+    played.release()
+    await done.wait()
+    if session.ws is not None:
+        await session.close()
+    return trace_name, session, failure
+
+
+async def run_load(url, sessions, traces, iterations, think_scale, ramp, on_all_played):
+    played, done = asyncio.Semaphore(0), asyncio.Event()
+    names = list(traces)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(run_session(url, i, names[i % len(names)], traces[names[i % len(names)]],
+                                             iterations, think_scale, ramp, played, done))
+             for i in range(sessions)]
+    for _ in range(sessions):
+        await played.acquire()
+    elapsed = time.perf_counter() - start
+    on_all_played()
+    done.set()
+    return elapsed, await asyncio.gather(*tasks)
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50_s": None, "p95_s": None, "p99_s": None, "max_s": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_s": round(p50, 4), "p95_s": round(p95, 4), "p99_s": round(p99, 4), "max_s": round(max(values), 4)}
+
+
+def summarize(elapsed, outcomes, sessions, memory):
+    latencies = [t for _, session, _ in outcomes for t in session.latencies]
+    per_trace = {}
+    for name, session, _ in outcomes:
+        per_trace.setdefault(name, []).extend(session.latencies)
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 3),
+        "reruns": len(latencies),
+        "fragment_reruns": sum(session.fragment_reruns for _, session, _ in outcomes),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency": _percentiles(latencies),
+        "latency_by_trace": {name: _percentiles(values) for name, values in per_trace.items()},
+        "app_exceptions": sum(session.errors for _, session, _ in outcomes),
+        "failed_sessions": [failure for _, _, failure in outcomes if failure],
+        "memory": memory,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="streamlit_app.py 동시 접속 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 웹소켓 세션 수")
+    parser.add_argument("--iterations", type=int, default=1, help="세션마다 trace를 반복할 횟수")
+    parser.add_argument("--traces", type=Path, default=DEFAULT_TRACES, help="상호작용 기록 JSON")
+    parser.add_argument("--trace", action="append", help="재생할 trace 이름 (기본: 전부를 세션에 돌아가며 배정)")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="생각 시간 배율 (0이면 쉬지 않고 재생)")
+    parser.add_argument("--ramp", type=float, default=0.05, help="세션 사이 접속 간격 (초)")
+    parser.add_argument("--port", type=int, default=8599, help="직접 띄울 서버 포트")
+    parser.add_argument("--url", help="이미 떠 있는 서버 주소 (예: http://localhost:8501)")
+    parser.add_argument("--online", action="store_true", help="원격 데이터 URL을 그대로 사용")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    traces = json.loads(args.traces.read_text(encoding="utf-8"))["traces"]
+    if args.trace:
+        traces = {name: traces[name] for name in args.trace}
+    base = args.url or f"http://localhost:{args.port}"
+    url = base.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+
+    server = None if args.url else start_server(args.port, args.online)
+    memory = {}
+    try:
+        # 캐시를 채우는 첫 세션은 따로 돌리고, 그 뒤의 RSS를 기준으로 삼는다
+        asyncio.run(run_load(url, len(traces), traces, 1, 0, 0, lambda: None))
+        sampler = None
+        if server:
+            memory["baseline_rss_mb"] = round(rss_mb(server.pid), 1)
+            sampler = RssSampler(server.pid)
+            sampler.start()
+
+        def measure():
+            if server:
+                memory["connected_rss_mb"] = round(rss_mb(server.pid), 1)
+                memory["per_session_mb"] = round(
+                    (memory["connected_rss_mb"] - memory["baseline_rss_mb"]) / args.sessions, 2)
+
+        elapsed, outcomes = asyncio.run(run_load(url, args.sessions, traces, args.iterations,
+                                                 args.think_scale, args.ramp, measure))
+        if sampler:
+            sampler.stop()
+            memory["peak_rss_mb"] = round(sampler.peak, 1)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = summarize(elapsed, outcomes, args.sessions, memory)
+    report["meta"] = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "url": base,
+                      "iterations": args.iterations, "think_scale": args.think_scale, "traces": list(traces)}
+    latency = report["latency"]
+    print(f"{report['sessions']} sessions, {report['reruns']} reruns ({report['fragment_reruns']} fragment) "
+          f"in {report['elapsed_s']:.1f}s -> {report['throughput_rps']} reruns/s")
+    print(f"latency p50 {latency['p50_s']}s  p95 {latency['p95_s']}s  p99 {latency['p99_s']}s")
+    if memory:
+        print(f"server RSS {memory['baseline_rss_mb']}MB -> {memory['connected_rss_mb']}MB "
+              f"(peak {memory['peak_rss_mb']}MB, {memory['per_session_mb']}MB/session)")
+    for failure in report["failed_sessions"]:
+        print(f"FAILED {failure}")
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if report["failed_sessions"] or report["app_exceptions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
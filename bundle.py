@@ -0,0 +1,249 @@
+# 미리 계산한 데이터셋·그래프 번들
+#
+# 탭1 시계열(원본 값, 온도 편차, 모든 스무딩 창의 이동평균), 지역별 온도 표, 빙하 요인 표와
+# 입력값이 정해진 그래프(기본 사이드바 값의 시계열 그래프, 지도, 탭3·탭4 그래프)의 JSON을 빌드 때 한 번 만들어 둔다.
+# 앱은 시작할 때 번들을 읽기 전용으로 열어(배열은 np.load(mmap_mode="r")) 첫 요청부터 계산 없이 보여 준다.
+#
+#   python bundle.py build                  # settings.BUNDLE_DIR(기본 ./bundle)에 만든다
+#   python bundle.py build --output /srv/bundle
+#   python bundle.py info
+#
+# 번들 구조
+#   manifest.json   형식 번호, 버전(배열 내용의 해시), 데이터셋별 배열 경로와 원본 버전, 그래프 키
+#   arrays/*.npy    열 하나당 파일 하나
+#   figures/*.json  plotly 그림 JSON
+# 새 번들은 옆 디렉터리에 다 만든 뒤 이름을 바꿔 끼우므로, 이미 열어 둔 워커는 이전 파일을 계속 읽는다.
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import charts
+import datasets
+import schemas
+import settings
+from series_store import SMOOTHING_WINDOWS, SeriesStore
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+
+# 시계열 그래프를 미리 만들어 둘 사이드바 값: 기본 연도 범위와 스무딩 끔(None)·모든 스무딩 창
+DEFAULT_START_YEAR = 1990
+DEFAULT_END_YEAR = 2024
+
+
+class BundleError(Exception):
+    pass
+
+
+class Bundle:
+    def __init__(self, path, manifest, series, tokens, tables, figures):
+        self.path = path
+        self.version = manifest["version"]
+        self.created_at = manifest["created_at"]
+        self.series = series  # 이름 -> SeriesStore (메모리 매핑 배열)
+        self.tokens = tokens  # 이름 -> 빌드할 때의 원본 버전 (datasets.snapshot_token)
+        self.tables = tables  # 이름 -> DataFrame
+        self.figures = figures  # 그래프 캐시 키 -> JSON
+
+    @property
+    def nbytes(self):
+        arrays = sum(store.nbytes for store in self.series.values())
+        tables = sum(int(table.memory_usage(deep=True).sum()) for table in self.tables.values())
+        return arrays + tables + sum(len(spec) for spec in self.figures.values())
+
+
+def default_view(current_year=None):
+    # 앱의 range_end = min(종료 연도, 올해)와 같은 값
+    current_year = current_year or datetime.now().year
+    return DEFAULT_START_YEAR, min(DEFAULT_END_YEAR, current_year)
+
+
+def series_figure_key(name, store, start_year, end_year, window):
+    # streamlit_app.render_series_chart와 같은 키
+    return ('series', name, store.version, start_year, end_year, window)
+
+
+def static_figures(bundle_series, tables):
+    start_year, end_year = default_view()
+    figures = {}
+    for name, store in bundle_series.items():
+        column = charts.CHART_SPECS[name]['column']
+        for window in (None, *SMOOTHING_WINDOWS):
+            years, values = store.view(start_year, end_year, column, window)
+            key = series_figure_key(name, store, start_year, end_year, window)
+            figures[key] = charts.series_figure(name, years, values)
+    figures[('map',)] = charts.regional_map(tables['regional'])
+    figures[('factors',)] = charts.factors_chart(tables['factors'])
+    figures[('mental_health',)] = charts.mental_health_chart()
+    return figures
+
+
+class _Writer:
+    def __init__(self, root):
+        self.root = root
+        self.digest = hashlib.sha1()
+        (root / "arrays").mkdir()
+        (root / "figures").mkdir()
+
+    def array(self, name, array):
+        array = np.ascontiguousarray(array)
+        self.digest.update(name.encode())
+        self.digest.update(str(array.dtype).encode())
+        self.digest.update(array.tobytes())
+        path = f"arrays/{name}.npy"
+        np.save(self.root / path, array, allow_pickle=False)
+        return path
+
+    def table(self, name, frame):
+        columns = {}
+        for index, column in enumerate(frame.columns):
+            values = frame[column]
+            # 문자열 열은 고정 길이 유니코드 배열로 저장해야 pickle 없이 메모리 매핑할 수 있다
+            array = values.to_numpy() if pd.api.types.is_numeric_dtype(values) else values.to_numpy(dtype=str)
+            columns[column] = self.array(f"{name}.c{index}", array)
+        return {"columns": columns}
+
+    def series(self, name, store):
+        entry = {
+            "years": self.array(f"{name}.years", store.years),
+            "x": None if store.x is store.years else self.array(f"{name}.x", store.x),
+            "values": {column: self.array(f"{name}.{column}", values) for column, values in store.values.items()},
+            "smoothed": {},
+        }
+        for (column, window), values in store.smoothed.items():
+            entry["smoothed"].setdefault(column, {})[str(window)] = self.array(f"{name}.{column}.w{window}", values)
+        return entry
+
+    def figure(self, index, spec):
+        path = f"figures/{index:03d}.json"
+        (self.root / path).write_text(spec, encoding="utf-8")
+        return path
+
+
+def build(output):
+    output = Path(output).resolve()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{output.name}-", dir=output.parent))
+    try:
+        writer = _Writer(staging)
+        manifest = {"format": FORMAT, "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "series": {}, "tables": {}, "figures": []}
+
+        stores = {}
+        for name in datasets.SERIES_SOURCES:
+            token = datasets.snapshot_token(name)
+            stores[name] = datasets.build_series_store(name)
+            manifest["series"][name] = {"token": list(token), **writer.series(name, stores[name])}
+        tables = {"regional": datasets.regional_temp_data(), "factors": datasets.glacier_factors()}
+        for name, frame in tables.items():
+            manifest["tables"][name] = writer.table(name, frame)
+
+        # 버전은 배열 내용으로 정한다. 같은 데이터로 다시 빌드하면 그래프 캐시 키도 같다
+        manifest["version"] = writer.digest.hexdigest()[:12]
+        for name, store in stores.items():
+            store.version = f"{manifest['version']}:{name}"
+        for index, (key, fig) in enumerate(static_figures(stores, tables).items()):
+            manifest["figures"].append({"key": list(key), "path": writer.figure(index, fig.to_json())})
+
+        (staging / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.chmod(staging, 0o755)
+        _swap(staging, output)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return open_bundle(output)
+
+
+def _swap(staging, output):
+    if not output.exists():
+        staging.rename(output)
+        return
+    retired = output.with_name(f".{output.name}-old-{os.getpid()}")
+    output.rename(retired)
+    staging.rename(output)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def open_bundle(path):
+    path = Path(path)
+    try:
+        manifest = json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise BundleError(f"{path}: manifest를 읽을 수 없음 ({exc})") from exc
+    if manifest.get("format") != FORMAT:
+        raise BundleError(f"{path}: 지원하지 않는 번들 형식 {manifest.get('format')!r}")
+
+    def load(relative):
+        return np.load(path / relative, mmap_mode="r", allow_pickle=False)
+
+    try:
+        series, tokens = {}, {}
+        for name, entry in manifest["series"].items():
+            smoothed = {(column, int(window)): load(relative)
+                        for column, windows in entry["smoothed"].items() for window, relative in windows.items()}
+            series[name] = SeriesStore.from_arrays(
+                load(entry["years"]), load(entry["x"]) if entry["x"] else None,
+                {column: load(relative) for column, relative in entry["values"].items()},
+                smoothed, version=f"{manifest['version']}:{name}")
+            tokens[name] = tuple(entry["token"])
+        tables = {name: schemas.apply(name, pd.DataFrame({column: load(relative) for column, relative in entry["columns"].items()}))
+                  for name, entry in manifest["tables"].items()}
+        figures = {tuple(entry["key"]): (path / entry["path"]).read_text(encoding="utf-8")
+                   for entry in manifest["figures"]}
+    except (OSError, KeyError, ValueError) as exc:
+        raise BundleError(f"{path}: 번들이 손상됨 ({exc})") from exc
+    return Bundle(path, manifest, series, tokens, tables, figures)
+
+
+def load_bundle(path=settings.BUNDLE_DIR):
+    # 앱 시작용: 번들이 없거나 읽을 수 없으면 None (요청 때 계산)
+    if not (Path(path) / MANIFEST).exists():
+        return None
+    try:
+        return open_bundle(path)
+    except BundleError as exc:
+        logger.warning("번들을 쓰지 않음: %s", exc)
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="미리 계산한 데이터셋·그래프 번들")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="번들 만들기")
+    build_parser.add_argument("--output", type=Path, default=settings.BUNDLE_DIR, help="번들 디렉터리")
+    info_parser = commands.add_parser("info", help="번들 내용 보기")
+    info_parser.add_argument("path", type=Path, nargs="?", default=settings.BUNDLE_DIR, help="번들 디렉터리")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        bundle = build(args.output)
+    else:
+        try:
+            bundle = open_bundle(args.path)
+        except BundleError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+    print(f"{bundle.path}  버전 {bundle.version}  ({bundle.created_at})")
+    for name, store in bundle.series.items():
+        print(f"  시계열 {name}: {len(store)}개 연도 {store.years[0]}~{store.years[-1]}, "
+              f"{store.nbytes / 1024:.1f} KB, 원본 버전 {bundle.tokens[name]}")
+    for name, table in bundle.tables.items():
+        print(f"  표 {name}: {len(table)}행 {list(table.columns)}")
+    print(f"  그래프 {len(bundle.figures)}개, {sum(len(spec) for spec in bundle.figures.values()) / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# 캐시 정책과 메모리 사용량 집계
+#
+# shared_dataset: 변하지 않는 데이터셋. 프로세스 전체에서 한 벌만 두고 세션마다 복사하지 않는다.
+#                 돌려받은 객체는 모든 세션이 공유하므로 절대 수정하지 않는다.
+# derived_result: 입력값(연도 범위, 창 크기 등)마다 달라지는 결과. 개수와 수명을 제한한다.
+# 두 계층 모두 만들어진 항목의 크기를 기록해서 cache_memory_report()로 볼 수 있다.
+import functools
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import settings
+from figure_cache import FIGURE_CACHE
+
+_entries = OrderedDict()  # (계층, 함수 이름, 인자) -> 기록
+_lock = threading.Lock()
+
+
+def memory_footprint(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(memory_footprint(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(memory_footprint(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    # 공유 데이터셋의 numpy 배열은 읽기 전용으로 만들어 실수로 고치는 일을 막는다
+    if isinstance(value, np.ndarray) and value.flags.owndata:
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    return value
+
+
+def _record(tier, func, args, kwargs, value, ttl, max_entries, track_release):
+    name = func.__qualname__
+    key = (tier, name, repr(args) + (repr(kwargs) if kwargs else ""))
+    ref = None
+    if track_release:
+        # 공유 객체는 캐시에서 빠지면 사라지므로 약한 참조로 살아 있는지 확인한다
+        try:
+            ref = weakref.ref(value)
+        except TypeError:
+            pass
+    now = time.time()
+    with _lock:
+        _entries[key] = {"ref": ref, "nbytes": memory_footprint(value), "created": now, "ttl": ttl}
+        _entries.move_to_end(key)
+        # Streamlit 캐시와 같은 규칙(수명, 함수별 최대 개수)으로 오래된 기록을 정리한다
+        same_func = [k for k in _entries if k[:2] == (tier, name)]
+        for old in same_func[:max(len(same_func) - max_entries, 0)]:
+            del _entries[old]
+
+
+def shared_dataset(func=None, *, ttl=settings.DATASET_CACHE_TTL, max_entries=settings.DATASET_CACHE_ENTRIES):
+    def decorator(func):
+        @functools.wraps(func)
+        def load(*args, **kwargs):
+            value = _freeze(func(*args, **kwargs))
+            _record("dataset", func, args, kwargs, value, ttl, max_entries, track_release=True)
+            return value
+        return st.cache_resource(ttl=ttl, max_entries=max_entries)(load)
+    return decorator(func) if func is not None else decorator
+
+
+def derived_result(func=None, *, ttl=settings.DERIVED_CACHE_TTL, max_entries=settings.DERIVED_CACHE_ENTRIES):
+    def decorator(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            value = func(*args, **kwargs)
+            # st.cache_data는 복사본을 저장하므로 크기와 수명만 기록한다
+            _record("derived", func, args, kwargs, value, ttl, max_entries, track_release=False)
+            return value
+        return st.cache_data(ttl=ttl, max_entries=max_entries)(compute)
+    return decorator(func) if func is not None else decorator
+
+
+def cache_memory_report():
+    now = time.time()
+    rows = []
+    with _lock:
+        for key, entry in list(_entries.items()):
+            expired = entry["ttl"] is not None and now - entry["created"] > entry["ttl"]
+            released = entry["ref"] is not None and entry["ref"]() is None
+            if expired or released:
+                del _entries[key]
+                continue
+            tier, name, args = key
+            rows.append({"계층": tier, "항목": name, "인자": args,
+                         "크기(KB)": entry["nbytes"] / 1024, "경과(초)": int(now - entry["created"])})
+    for key, cached in FIGURE_CACHE.entries():
+        rows.append({"계층": "figure", "항목": str(key[0]), "인자": repr(key[1:]),
+                     "크기(KB)": len(cached.spec) / 1024, "경과(초)": None})
+    report = pd.DataFrame(rows, columns=["계층", "항목", "인자", "크기(KB)", "경과(초)"])
+    return report.sort_values("크기(KB)", ascending=False, ignore_index=True)
@@ -0,0 +1,95 @@
+# 입력값이 정해진 그래프
+#
+# 탭1 시계열 그래프와 지도, 탭3·탭4의 고정 그래프를 만든다. Streamlit에 의존하지 않으므로
+# 번들 빌드(bundle.py)가 앱과 같은 함수로 그림을 미리 만들어 둘 수 있다.
+import pandas as pd
+
+from downsample import line_trace
+from lazy_imports import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
+
+# 탭1 그래프 설정
+CHART_SPECS = {
+    'temp': {
+        'column': 'global_temp', 'name': '지구 평균 온도', 'title': '🌡️ 지구 연평균 온도 변화', 'yaxis_title': '온도 (°C)',
+        'trace': dict(line=dict(color='#FF6B6B', width=3), marker=dict(size=6)),
+    },
+    'glacier': {
+        'column': 'mass_balance', 'name': '빙하 질량', 'title': '🧊 빙하 질량 변화', 'yaxis_title': '질량 변화 (Gt)',
+        'trace': dict(line=dict(color='#4ECDC4', width=3), marker=dict(size=6),
+                      fill='tozeroy', fillcolor='rgba(78, 205, 196, 0.2)'),
+    },
+    'mental': {
+        'column': 'anxiety_rate', 'name': '불안감 비율', 'title': '😰 청소년 기후 불안감', 'yaxis_title': '불안감 비율 (%)',
+        'trace': dict(line=dict(color='#95E77E', width=3), marker=dict(size=6)),
+    },
+}
+
+
+def series_figure(name, years, values):
+    spec = CHART_SPECS[name]
+    fig = go.Figure()
+    fig.add_trace(line_trace(years, values, name=spec['name'], **spec['trace']))
+    fig.update_layout(title=spec['title'], xaxis_title='연도', yaxis_title=spec['yaxis_title'], height=400)
+    return fig
+
+
+def regional_map(regional_data):
+    fig_map = px.scatter_geo(regional_data,lat='lat',lon='lon',color='temp_change',hover_name='country',
+                             size=abs(regional_data['temp_change'])*20,color_continuous_scale='RdBu_r',
+                             color_continuous_midpoint=1.2,labels={'temp_change':'온도 변화 (°C)'},
+                             title='지역별 평균 온도 변화 (1990-2024)')
+    fig_map.update_layout(geo=dict(showframe=False,showcoastlines=True,projection_type='natural earth'),height=500)
+    return fig_map
+
+
+def factors_chart(factors):
+    fig_factors = px.pie(factors,names="요인",values="영향력",hole=0.4,
+                         color_discrete_sequence=px.colors.qualitative.Set3)
+    fig_factors.update_layout(title="빙하를 녹이는 주요 요인 비율", font=dict(family="Pretendard"))
+    return fig_factors
+
+
+def mental_health_chart():
+    # 팬데믹 기간 동안 청소년들의 정신건강 변화 그래프
+    mental_health_data = {
+        '연도': [2020, 2021, 2022, 2023],
+        '지속적인 슬픔 또는 절망감 비율': [35, 38, 42, 40],
+        '자살 심각하게 고려한 비율': [18, 20, 22, 20],
+        '자살 시도 비율': [8, 9, 10, 9.5]
+    }
+    df_mental_health = pd.DataFrame(mental_health_data)
+
+    fig_mental_health = go.Figure()
+    fig_mental_health.add_trace(go.Scatter(
+        x=df_mental_health['연도'],
+        y=df_mental_health['지속적인 슬픔 또는 절망감 비율'],
+        mode='lines+markers',
+        name='지속적인 슬픔 또는 절망감 비율',
+        line=dict(color='#FF6347')
+    ))
+    fig_mental_health.add_trace(go.Scatter(
+        x=df_mental_health['연도'],
+        y=df_mental_health['자살 심각하게 고려한 비율'],
+        mode='lines+markers',
+        name='자살 심각하게 고려한 비율',
+        line=dict(color='#4682B4')
+    ))
+    fig_mental_health.add_trace(go.Scatter(
+        x=df_mental_health['연도'],
+        y=df_mental_health['자살 시도 비율'],
+        mode='lines+markers',
+        name='자살 시도 비율',
+        line=dict(color='#32CD32')
+    ))
+
+    fig_mental_health.update_layout(
+        title='팬데믹 기간 동안 청소년 정신건강 변화',
+        xaxis_title='연도',
+        yaxis_title='비율 (%)',
+        template='plotly_white',
+        height=400
+    )
+    return fig_mental_health
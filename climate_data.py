@@ -0,0 +1,286 @@
+# NOAA/GISTEMP 형식 기온 CSV 로더와 열(column) 단위 디스크 캐시
+#
+# CSV는 한 번만 청크 단위로 파싱하고, 결과를 열마다 .npy 파일로 저장한다.
+# 이후 프로세스는 CSV를 다시 읽지 않고 np.load(mmap_mode='r')로 캐시를 매핑한다.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+VALUE_COLUMNS = ["anomaly", "value", "temp_anomaly", "temperature", "j-d"]
+MISSING_VALUES = ["***", "****", "-999", "-999.0", "-99.99", "-9999"]
+
+BASE_TEMP = 14.0  # GISTEMP 기준기간(1951-1980) 지구 평균 기온 (°C)
+CHUNK_ROWS = 50_000
+HEADER_SCAN_LINES = 50
+CACHE_VERSION = 1
+CACHE_COLUMNS = ("year", "month", "temp_anomaly")
+
+
+class SchemaError(ValueError):
+    pass
+
+
+# ---------- CSV 파싱 ----------
+
+def find_header(path):
+    # NOAA 파일은 앞부분에 설명 줄이 있으므로 'Year'/'Date'로 시작하는 줄을 찾는다
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        for lineno, line in enumerate(f):
+            if lineno >= HEADER_SCAN_LINES:
+                break
+            cells = [c.strip().lower() for c in line.split(",")]
+            if cells and cells[0] in ("year", "date"):
+                return lineno, cells
+    raise SchemaError(f"{path}: 'Year' 또는 'Date' 헤더를 찾을 수 없습니다")
+
+
+def _detect_layout(cells):
+    if all(m in cells for m in MONTHS):
+        return "wide", None
+    for name in VALUE_COLUMNS:
+        if name in cells[1:]:
+            return "long", name
+    if len(cells) >= 2:
+        return "long", cells[1]
+    raise SchemaError(f"지원하지 않는 CSV 헤더입니다: {cells}")
+
+
+def _parse_chunk(chunk, layout, value_col):
+    chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+    key = pd.to_numeric(chunk[chunk.columns[0]], errors="coerce")
+    valid = key.notna().to_numpy()
+    key = key.to_numpy()[valid].astype(np.int64)
+
+    if layout == "wide":
+        values = chunk.loc[valid, MONTHS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        year = np.repeat(key, 12)
+        month = np.tile(np.arange(1, 13), len(key))
+        return year, month, values.ravel()
+
+    values = pd.to_numeric(chunk.loc[valid, value_col], errors="coerce").to_numpy(dtype=np.float64)
+    if len(key) and key.max() >= 10_000:
+        # NOAA 월별 파일의 'Date' 열은 YYYYMM 형식
+        return key // 100, key % 100, values
+    return key, np.zeros(len(key), dtype=np.int64), values
+
+
+def _check_schema(year, month, anomaly, path):
+    if len(year) == 0:
+        raise SchemaError(f"{path}: 데이터 행이 없습니다")
+    if year.min() < 1000 or year.max() > 3000:
+        raise SchemaError(f"{path}: 연도 범위가 올바르지 않습니다 ({year.min()}-{year.max()})")
+    if month.min() < 0 or month.max() > 12:
+        raise SchemaError(f"{path}: 월 값이 올바르지 않습니다")
+    if (month == 0).any() and (month > 0).any():
+        raise SchemaError(f"{path}: 연별/월별 데이터가 섞여 있습니다")
+    if np.isfinite(anomaly).sum() == 0:
+        raise SchemaError(f"{path}: 유효한 기온 값이 없습니다")
+    finite = anomaly[np.isfinite(anomaly)]
+    if np.abs(finite).max() > 20:
+        raise SchemaError(f"{path}: 편차 값이 허용 범위를 벗어났습니다")
+
+
+def parse_temperature_csv(path, chunk_rows=CHUNK_ROWS):
+    skip, cells = find_header(path)
+    layout, value_col = _detect_layout(cells)
+
+    years, months, values = [], [], []
+    try:
+        reader = pd.read_csv(path, skiprows=skip, chunksize=chunk_rows, na_values=MISSING_VALUES,
+                             skipinitialspace=True, dtype=str, encoding="utf-8-sig")
+        for chunk in reader:
+            y, m, v = _parse_chunk(chunk, layout, value_col)
+            years.append(y)
+            months.append(m)
+            values.append(v)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError) as exc:
+        raise SchemaError(f"{path}: CSV를 읽을 수 없습니다 ({exc})") from exc
+    except KeyError as exc:
+        # 헤더 줄과 실제 열이 다른 경우 (와이드 형식에 월 열이 빠짐 등)
+        raise SchemaError(f"{path}: 필요한 열이 없습니다 ({exc})") from exc
+
+    year = np.concatenate(years) if years else np.empty(0, dtype=np.int64)
+    month = np.concatenate(months) if months else np.empty(0, dtype=np.int64)
+    anomaly = np.concatenate(values) if values else np.empty(0, dtype=np.float64)
+    _check_schema(year, month, anomaly, path)
+
+    order = np.lexsort((month, year))
+    return {
+        "year": year[order].astype(np.int16),
+        "month": month[order].astype(np.int8),
+        "temp_anomaly": anomaly[order].astype(np.float32),
+    }
+
+
+# ---------- 열 단위 디스크 캐시 ----------
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_root(path):
+    path = os.path.abspath(path)
+    key = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(settings.CACHE_DIR, "climate_data", f"{stem}-{key}")
+
+
+def _read_pointer(root):
+    try:
+        with open(os.path.join(root, "current.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_pointer(root, meta):
+    fd, tmp = tempfile.mkstemp(dir=root, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(root, "current.json"))
+
+
+def _write_columns(root, digest, columns):
+    # 임시 디렉터리에 쓴 뒤 이름을 바꿔서, 다른 프로세스가 반쯤 쓰인 캐시를 읽지 않게 한다
+    target = os.path.join(root, digest[:16])
+    if os.path.isdir(target):
+        return target
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp-")
+    for name, values in columns.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), values)
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # 다른 프로세스가 먼저 만들었음
+    return target
+
+
+def _remove_stale(root, keep):
+    for name in os.listdir(root):
+        full = os.path.join(root, name)
+        if os.path.isdir(full) and name != keep and not name.startswith(".tmp-"):
+            shutil.rmtree(full, ignore_errors=True)
+
+
+def _load_columns(directory):
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in CACHE_COLUMNS}
+
+
+def cache_key(path=None):
+    # 열 캐시가 쓰는 파일 버전(내용 해시). mtime/크기가 캐시에 적힌 값과 같으면 해시를 다시 계산하지 않는다
+    path = path or settings.GLOBAL_TEMP_CSV
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    meta = _read_pointer(_cache_root(path))
+    if meta and meta.get("version") == CACHE_VERSION and meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+        return meta["sha256"]
+    return _file_sha256(path)
+
+
+def load_columnar(path):
+    stat = os.stat(path)
+    root = _cache_root(path)
+    os.makedirs(root, exist_ok=True)
+
+    meta = _read_pointer(root)
+    if meta and meta.get("version") == CACHE_VERSION:
+        directory = os.path.join(root, meta["dir"])
+        # mtime/크기가 같으면 해시 계산 없이 바로 사용
+        if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size and os.path.isdir(directory):
+            return _load_columns(directory)
+        # mtime만 바뀐 경우(체크아웃, 복사 등)는 내용 해시로 다시 확인
+        digest = _file_sha256(path)
+        if digest == meta["sha256"] and os.path.isdir(directory):
+            _write_pointer(root, dict(meta, mtime_ns=stat.st_mtime_ns, size=stat.st_size))
+            return _load_columns(directory)
+    else:
+        digest = _file_sha256(path)
+
+    return _store_columns(path, stat, root, digest, parse_temperature_csv(path))
+
+
+def store_columnar(path, columns):
+    # 이미 파싱한 열(parse_temperature_csv 결과)로 path의 캐시를 채운다. 다음 load_columnar는 CSV를 다시 읽지 않는다
+    root = _cache_root(path)
+    os.makedirs(root, exist_ok=True)
+    return _store_columns(path, os.stat(path), root, _file_sha256(path), columns)
+
+
+def _store_columns(path, stat, root, digest, columns):
+    directory = _write_columns(root, digest, columns)
+    _write_pointer(root, {
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+        "dir": os.path.basename(directory),
+        "rows": int(len(columns["year"])),
+    })
+    _remove_stale(root, os.path.basename(directory))
+    return _load_columns(directory)
+
+
+# ---------- 앱에서 사용하는 표 형태 ----------
+
+def _annual_means(year, month, anomaly):
+    if not (month > 0).any():
+        return np.asarray(year), np.asarray(anomaly, dtype=np.float64)
+    # 월별 자료는 12개월이 모두 있는 해만 연평균으로 사용 (진행 중인 해 제외)
+    finite = np.isfinite(anomaly)
+    years, idx = np.unique(year, return_inverse=True)
+    counts = np.bincount(idx, weights=finite, minlength=len(years))
+    sums = np.bincount(idx, weights=np.where(finite, anomaly, 0.0), minlength=len(years))
+    complete = counts == 12
+    return years[complete], sums[complete] / 12
+
+
+def _complete_years(columns, path):
+    years, annual = _annual_means(columns["year"], columns["month"], columns["temp_anomaly"])
+    if len(years) == 0:
+        raise SchemaError(f"{path}: 12개월이 모두 있는 해가 없어 연평균을 낼 수 없습니다")
+    return years, annual
+
+
+def validate_temperature_csv(path):
+    # 캐시를 만들지 않고 load_temperature_table과 같은 검사를 한다 (내려받은 후보 파일 확인용). 파싱한 열을 돌려준다
+    columns = parse_temperature_csv(path)
+    _complete_years(columns, path)
+    return columns
+
+
+def load_temperature_table(path=None, resolution="annual"):
+    path = path or settings.GLOBAL_TEMP_CSV
+    columns = load_columnar(path)
+    year, month, anomaly = columns["year"], columns["month"], columns["temp_anomaly"]
+
+    if resolution == "monthly":
+        if not (month > 0).any():
+            raise SchemaError("월별 자료가 아닌 CSV입니다")
+        return pd.DataFrame({
+            "year": year,
+            "month": month,
+            "global_temp": BASE_TEMP + anomaly,
+            "temp_anomaly": anomaly,
+        })
+
+    years, annual = _complete_years(columns, path)
+    return pd.DataFrame({
+        "year": years,
+        "global_temp": BASE_TEMP + annual,
+        "temp_anomaly": annual,
+    })
@@ -0,0 +1,129 @@
+# 탭1 기후 지표와 청소년 정신건강 지표의 상관 분석
+#
+# 모든 계산은 연도로 맞춘 배열에서 결측(NaN)을 마스크로 처리한다.
+# - 지연 상관: 지연마다 겹치는 구간의 합(개수, Σx, Σy, Σxy, Σx², Σy²)을 FFT 교차상관으로 한 번에 구한다
+# - 이동 상관: 누적합으로 모든 창을 한 번에 계산한다
+# - 부트스트랩 신뢰구간: 연도 자료는 자기상관이 있어 블록 부트스트랩을 쓰고, 재표본 전체를 한 배열로 계산한다
+import numpy as np
+
+MIN_OVERLAP = 5  # 상관계수를 계산할 최소 겹치는 연도 수
+
+
+def annual_values(years, values):
+    # 월별 자료는 연평균으로 묶는다 (연도 오름차순 입력)
+    years = np.asarray(years)
+    values = np.asarray(values, dtype=np.float64)
+    unique, inverse = np.unique(years, return_inverse=True)
+    if len(unique) == len(years):
+        return unique, values
+    finite = np.isfinite(values)
+    sums = np.bincount(inverse, weights=np.where(finite, values, 0.0), minlength=len(unique))
+    counts = np.bincount(inverse, weights=finite, minlength=len(unique))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return unique, sums / counts
+
+
+def align_on_year(series, start_year, end_year):
+    # series: {이름: (연도 배열, 값 배열)} -> (연도, n_years x n_series 행렬). 없는 연도는 NaN
+    years = np.arange(start_year, end_year + 1)
+    matrix = np.full((len(years), len(series)), np.nan)
+    for j, (series_years, values) in enumerate(series.values()):
+        series_years, values = annual_values(series_years, values)
+        inside = (series_years >= start_year) & (series_years <= end_year)
+        matrix[series_years[inside] - start_year, j] = values[inside]
+    return years, matrix
+
+
+def _pearson(n, sx, sy, sxy, sxx, syy):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    return np.where(n >= MIN_OVERLAP, np.clip(r, -1.0, 1.0), np.nan)
+
+
+def correlation_matrix(matrix):
+    # 쌍마다 둘 다 값이 있는 연도만 사용한 상관행렬 (행렬곱 몇 번으로 끝남)
+    mask = np.isfinite(matrix).astype(np.float64)
+    x = np.where(mask > 0, matrix, 0.0)
+    n = mask.T @ mask
+    sx = x.T @ mask
+    sxx = (x * x).T @ mask
+    return _pearson(n, sx, sx.T, x.T @ x, sxx, sxx.T)
+
+
+def _xcorr(a, b, max_lag):
+    # out[k + max_lag] = Σ_t a[t] b[t + k],  k = -max_lag..max_lag
+    size = 1 << int(np.ceil(np.log2(2 * len(a))))
+    full = np.fft.irfft(np.conj(np.fft.rfft(a, size)) * np.fft.rfft(b, size), size)
+    return np.concatenate((full[size - max_lag:], full[:max_lag + 1]))
+
+
+def lagged_correlation(x, y, max_lag):
+    # 지연 k에서 x[t]와 y[t + k]의 상관 (k > 0이면 x가 y보다 k년 앞섬)
+    mx, my = np.isfinite(x).astype(np.float64), np.isfinite(y).astype(np.float64)
+    x0, y0 = np.where(mx > 0, x, 0.0), np.where(my > 0, y, 0.0)
+    max_lag = min(max_lag, len(x) - 1)
+    n = np.rint(_xcorr(mx, my, max_lag))
+    sums = [_xcorr(a, b, max_lag) for a, b in ((x0, my), (mx, y0), (x0, y0), (x0 * x0, my), (mx, y0 * y0))]
+    return np.arange(-max_lag, max_lag + 1), _pearson(n, *sums)
+
+
+def rolling_correlation(x, y, window):
+    # 창 끝 연도 기준 이동 상관. 창 안에 결측이 있으면 NaN
+    valid = np.isfinite(x) & np.isfinite(y)
+    x0, y0 = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+
+    def window_sums(values):
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        return sums[window:] - sums[:-window]
+
+    n = window_sums(valid.astype(np.float64))
+    r = _pearson(n, window_sums(x0), window_sums(y0), window_sums(x0 * y0), window_sums(x0 * x0), window_sums(y0 * y0))
+    out[window - 1:] = np.where(n == window, r, np.nan)
+    return out
+
+
+def bootstrap_ci(x, y, resamples=10_000, level=0.95, block=None, seed=0):
+    # 이동 블록 부트스트랩으로 구한 상관계수의 신뢰구간. (r, 하한, 상한, 사용한 연도 수)
+    # 재표본의 상관계수는 고른 블록들의 합(Σx, Σy, Σxy, Σx², Σy²)만으로 정해지므로,
+    # 시작 위치별 블록 합을 누적합으로 미리 구해 두고 재표본마다 블록 수만큼만 더한다
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = np.asarray(x)[valid], np.asarray(y)[valid]
+    n = len(x)
+    if n < MIN_OVERLAP:
+        return np.nan, np.nan, np.nan, n
+    # 평균을 빼 두면 합으로 분산을 계산할 때 자릿수 손실이 줄어든다 (상관계수는 그대로)
+    x, y = x - x.mean(), y - y.mean()
+    block = block or max(2, int(round(n ** (1 / 3))))
+    blocks = -(-n // block)
+    tail = n - (blocks - 1) * block  # 마지막 블록은 n개를 맞추도록 앞부분만 쓴다
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n - block + 1, size=(resamples, blocks))
+
+    def block_sums(values, length):
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        return sums[length:] - sums[:-length]
+
+    totals = []
+    for values in (x, y, x * y, x * x, y * y):
+        full, last = block_sums(values, block), block_sums(values, tail)
+        totals.append(full[starts[:, :-1]].sum(axis=1) + last[starts[:, -1]])
+    r = _pearson(np.full(resamples, n), *totals)
+    r = r[np.isfinite(r)]
+    observed = np.corrcoef(x, y)[0, 1]
+    if len(r) == 0:
+        return observed, np.nan, np.nan, n
+    alpha = (1 - level) / 2
+    low, high = np.quantile(r, [alpha, 1 - alpha])
+    return observed, low, high, n
+
+
+def lagged_bootstrap_ci(x, y, lags, **kwargs):
+    # 지연마다 겹치는 구간을 잘라 부트스트랩 신뢰구간을 구한다
+    low, high = np.full(len(lags), np.nan), np.full(len(lags), np.nan)
+    for i, lag in enumerate(lags):
+        xs, ys = (x[:len(x) - lag], y[lag:]) if lag >= 0 else (x[-lag:], y[:len(y) + lag])
+        _, low[i], high[i], _ = bootstrap_ci(xs, ys, **kwargs)
+    return low, high
@@ -0,0 +1,302 @@
+# NOAA/WGMS/CDC 원격 데이터 가져오기
+#
+# - 프로세스 전체에서 하나의 requests.Session(커넥션 풀)을 공유한다.
+# - 응답 본문은 디스크에 스냅샷으로 저장하고, 소스별 TTL 안에서는 네트워크를 쓰지 않는다.
+# - TTL이 지나면 ETag/Last-Modified로 조건부 요청을 보내 304면 본문을 다시 받지 않는다.
+# - 요청이 실패하면 마지막으로 성공한 스냅샷을 돌려준다.
+# URL은 환경 변수나 configure_source()로 바꿀 수 있어서 로컬 HTTP 서버로도 동작을 확인할 수 있다.
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import climate_data
+import settings
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+HTTP_TIMEOUT = (3.05, 15)  # (연결, 읽기) 초
+FAILURE_BACKOFF = 5 * 60   # 요청이 실패한 뒤 다시 시도하기까지 기다리는 시간
+
+
+class SourceUnavailable(RuntimeError):
+    pass
+
+
+# ---------- 응답 파서 (스냅샷 파일 경로 -> DataFrame) ----------
+
+def _read_year_table(path):
+    skip, _ = climate_data.find_header(path)
+    df = pd.read_csv(path, skiprows=skip, na_values=climate_data.MISSING_VALUES, skipinitialspace=True)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df["year"] = pd.to_numeric(df[df.columns[0]], errors="coerce")
+    df = df.dropna(subset=["year"])
+    df["year"] = df["year"].astype(int)
+    return df.sort_values("year").reset_index(drop=True)
+
+
+def _pick_column(df, names, path):
+    for name in names:
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+    raise climate_data.SchemaError(f"{path}: {names} 중 하나의 열이 필요합니다")
+
+
+def parse_noaa(path):
+    return climate_data.load_temperature_table(path)
+
+
+def parse_glacier(path):
+    df = _read_year_table(path)
+    annual = _pick_column(df, ["annual_balance", "annual_loss", "mass_balance_annual", "value"], path)
+    if "mass_balance" in df.columns:
+        cumulative = pd.to_numeric(df["mass_balance"], errors="coerce").to_numpy(dtype=float)
+    else:
+        cumulative = np.nancumsum(annual)
+    return pd.DataFrame({"year": df["year"], "mass_balance": cumulative, "annual_loss": annual})
+
+
+def parse_mental_health(path):
+    df = _read_year_table(path)
+    anxiety = _pick_column(df, ["anxiety_rate", "anxiety", "value"], path)
+    if "depression_rate" in df.columns:
+        depression = pd.to_numeric(df["depression_rate"], errors="coerce").to_numpy(dtype=float)
+    else:
+        depression = anxiety * 0.8
+    return pd.DataFrame({"year": df["year"], "anxiety_rate": anxiety, "depression_rate": depression})
+
+
+# 소스별 설정. URL이 비어 있으면 네트워크를 쓰지 않고 저장된 스냅샷만 사용한다.
+# 이름 -> (URL 환경 변수 접두사, 기본 URL, 기본 TTL, 파서)
+SOURCE_DEFAULTS = {
+    "noaa": ("CLIMATE_SOURCE_NOAA",
+             "https://www.ncei.noaa.gov/access/monitoring/climate-at-a-glance/global/time-series/globe/land_ocean/12/12/1880-2024/data.csv",
+             DAY, parse_noaa),
+    "glacier": ("CLIMATE_SOURCE_GLACIER", "", 7 * DAY, parse_glacier),
+    "mental_health": ("CLIMATE_SOURCE_MENTAL_HEALTH", "", 30 * DAY, parse_mental_health),
+}
+
+# 내려받은 후보 파일 검사 -> (검사 함수, 스냅샷 교체 뒤 검사 결과로 캐시를 채우는 함수).
+# 여기 없는 소스는 파서로 검사한다. noaa 파서는 경로별 열 캐시를 만들기 때문에 임시 파일에 쓰면 안 된다
+SNAPSHOT_CHECKS = {
+    "noaa": (climate_data.validate_temperature_csv, climate_data.store_columnar),
+}
+
+
+def load_sources(environ=None):
+    # 환경 변수(기본은 os.environ)에서 소스 설정을 읽는다. {PREFIX}_URL, {PREFIX}_TTL
+    environ = os.environ if environ is None else environ
+    return {
+        name: {
+            "url": environ.get(f"{prefix}_URL", url),
+            "ttl": int(environ.get(f"{prefix}_TTL", ttl)),
+            "parser": parser,
+            "validate": SNAPSHOT_CHECKS.get(name, (None, None))[0],
+            "store": SNAPSHOT_CHECKS.get(name, (None, None))[1],
+        }
+        for name, (prefix, url, ttl, parser) in SOURCE_DEFAULTS.items()
+    }
+
+
+SOURCES = load_sources()
+
+
+def configure_source(name, **overrides):
+    # 실행 중에 소스 설정(url, ttl, parser, validate, store)을 바꾼다 (테스트에서 로컬 HTTP 서버를 가리킬 때 등).
+    # 이전 설정을 돌려준다
+    unknown = set(overrides) - {"url", "ttl", "parser", "validate", "store"}
+    if unknown:
+        raise TypeError(f"알 수 없는 소스 설정: {sorted(unknown)}")
+    previous = SOURCES[name]
+    SOURCES[name] = {**previous, **overrides}
+    return previous
+
+
+# ---------- 공유 HTTP 세션 ----------
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                          allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "useai-climate-dashboard/1.0"
+            _session = session
+        return _session
+
+
+# ---------- 디스크 스냅샷 ----------
+
+def _paths(name):
+    root = os.path.join(settings.CACHE_DIR, "sources")
+    os.makedirs(root, exist_ok=True)
+    return root, os.path.join(root, f"{name}.body"), os.path.join(root, f"{name}.json")
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(root, target, data):
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, target)
+
+
+def _write_meta(root, meta_path, meta):
+    _write_atomic(root, meta_path, json.dumps(meta).encode("utf-8"))
+
+
+class _ProcessLock:
+    # 같은 소스를 여러 워커가 동시에 갱신하지 않도록 잠금 파일을 사용 (POSIX 전용, 그 외 환경은 생략)
+    _thread_locks = {}
+
+    def __init__(self, root, name):
+        self.path = os.path.join(root, f"{name}.lock")
+        self.thread_lock = self._thread_locks.setdefault(name, threading.Lock())
+        self.fd = None
+
+    def acquire(self, blocking):
+        if not self.thread_lock.acquire(blocking):
+            return False
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        self.fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self.fd)
+            self.fd = None
+            self.thread_lock.release()
+            return False
+        return True
+
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)  # 닫으면 flock도 해제된다
+            self.fd = None
+        self.thread_lock.release()
+
+
+def _revalidate(name, source, root, body_path, meta_path, meta):
+    headers = {}
+    if meta.get("url") == source["url"] and os.path.exists(body_path):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = get_session().get(source["url"], headers=headers, timeout=HTTP_TIMEOUT)
+    now = time.time()
+    if response.status_code == 304:
+        meta.update(validated_at=now, failed_at=None)
+        _write_meta(root, meta_path, meta)
+        return
+    response.raise_for_status()
+
+    # 파싱이 되는지 먼저 확인한 뒤에만 마지막 정상 스냅샷을 교체한다.
+    # 검사는 캐시를 만들지 않고, 캐시는 교체한 스냅샷 경로에 대해 검사 결과로 한 번만 채운다
+    fd, candidate = tempfile.mkstemp(dir=root, prefix=".tmp-", suffix=".csv")
+    with os.fdopen(fd, "wb") as f:
+        f.write(response.content)
+    try:
+        checked = (source.get("validate") or source["parser"])(candidate)
+        os.replace(candidate, body_path)
+    finally:
+        if os.path.exists(candidate):
+            os.remove(candidate)
+    if source.get("store"):
+        try:
+            source["store"](body_path, checked)
+        except OSError as exc:
+            # 캐시는 처음 읽을 때 다시 만들어지므로 스냅샷 갱신은 그대로 둔다
+            logger.warning("%s: 캐시를 채우지 못했습니다 (%s)", name, exc)
+
+    _write_meta(root, meta_path, {
+        "url": source["url"],
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": now,
+        "validated_at": now,
+        "failed_at": None,
+    })
+    logger.info("%s: 새 스냅샷 저장 (%d bytes)", name, len(response.content))
+
+
+def _needs_refresh(source, meta, has_snapshot, now):
+    if not source["url"]:
+        return False
+    if meta.get("failed_at") and now - meta["failed_at"] < FAILURE_BACKOFF:
+        return False
+    if not has_snapshot or meta.get("url") != source["url"]:
+        return True
+    return now - meta.get("validated_at", 0) >= source["ttl"]
+
+
+def refresh_snapshot(name):
+    # 필요할 때만(TTL 경과, 스냅샷 없음) 원격에 요청해 스냅샷을 갱신하고 스냅샷 정보를 돌려준다. 본문은 읽지 않는다
+    source = SOURCES[name]
+    root, body_path, meta_path = _paths(name)
+    meta = _read_meta(meta_path)
+    has_snapshot = os.path.exists(body_path)
+
+    if _needs_refresh(source, meta, has_snapshot, time.time()):
+        lock = _ProcessLock(root, name)
+        # 스냅샷이 있으면 다른 워커가 갱신 중일 때 기다리지 않고 기존 스냅샷을 쓴다
+        if lock.acquire(blocking=not has_snapshot):
+            try:
+                meta = _read_meta(meta_path)
+                if _needs_refresh(source, meta, os.path.exists(body_path), time.time()):
+                    _revalidate(name, source, root, body_path, meta_path, meta)
+            except (requests.RequestException, ValueError, OSError) as exc:
+                logger.warning("%s: 원격 데이터를 가져오지 못했습니다 (%s)", name, exc)
+                meta = _read_meta(meta_path)
+                meta["failed_at"] = time.time()
+                _write_meta(root, meta_path, meta)
+            finally:
+                lock.release()
+    return snapshot_info(name)
+
+
+def fetch_dataset(name):
+    if not refresh_snapshot(name)["has_snapshot"]:
+        raise SourceUnavailable(f"{name}: 사용할 수 있는 스냅샷이 없습니다")
+    _, body_path, _ = _paths(name)
+    try:
+        return SOURCES[name]["parser"](body_path)
+    except (ValueError, KeyError, OSError) as exc:
+        # 스냅샷 파일이 깨졌거나 형식이 바뀐 경우 (SchemaError, pandas ParserError 포함)
+        raise SourceUnavailable(f"{name}: 스냅샷을 읽을 수 없습니다 ({exc})") from exc
+
+
+def snapshot_info(name):
+    _, body_path, meta_path = _paths(name)
+    meta = _read_meta(meta_path)
+    meta["has_snapshot"] = os.path.exists(body_path)
+    return meta
@@ -0,0 +1,138 @@
+# 탭1 데이터셋 불러오기
+#
+# 원격 스냅샷 -> 저장소에 포함된 파일 -> 예시 데이터 순서로 원본 표를 읽고, 그래프용 시계열 저장소를 만든다.
+# Streamlit에 의존하지 않으므로 앱과 번들 빌드(bundle.py)가 함께 쓴다.
+import numpy as np
+import pandas as pd
+
+import climate_data
+import data_sources
+import profiling
+import schemas
+from series_store import SeriesStore, observation_x
+
+
+def fetch_noaa_temperature_data():
+    # NOAA 원격 데이터(마지막 정상 스냅샷 포함) -> 저장소의 global_temp.csv -> 예시 데이터 순서로 사용
+    try:
+        return data_sources.fetch_dataset("noaa")
+    except data_sources.SourceUnavailable:
+        pass
+    try:
+        return climate_data.load_temperature_table()
+    except (OSError, climate_data.SchemaError):
+        pass
+    years = np.arange(1880, 2025)
+    base_temp = 14.0
+    temp_anomaly = np.cumsum(np.random.normal(0.01, 0.05, len(years)))
+    temp_data = pd.DataFrame({
+        'year': years,
+        'global_temp': base_temp + temp_anomaly + np.sin(np.linspace(0, 4*np.pi, len(years))) * 0.2,
+        'temp_anomaly': temp_anomaly
+    })
+    return temp_data
+
+def fetch_glacier_data():
+    try:
+        return data_sources.fetch_dataset("glacier")
+    except data_sources.SourceUnavailable:
+        pass
+    years = np.arange(1960, 2025)
+    glacier_mass = -np.cumsum(np.random.exponential(0.5, len(years)))
+    glacier_data = pd.DataFrame({
+        'year': years,
+        'mass_balance': glacier_mass,
+        'annual_loss': -np.random.exponential(0.5, len(years))
+    })
+    return glacier_data
+
+def fetch_mental_health_data():
+    try:
+        return data_sources.fetch_dataset("mental_health")
+    except data_sources.SourceUnavailable:
+        pass
+    years = np.arange(2010, 2025)
+    anxiety_base = 15
+    anxiety_trend = anxiety_base + np.cumsum(np.random.normal(0.5, 0.3, len(years)))
+    pandemic_effect = np.zeros(len(years))
+    pandemic_years = [2020, 2021, 2022]
+    for i, year in enumerate(years):
+        if year in pandemic_years:
+            pandemic_effect[i] = 5 + np.random.normal(0, 1)
+    mental_data = pd.DataFrame({
+        'year': years,
+        'anxiety_rate': anxiety_trend + pandemic_effect,
+        'depression_rate': (anxiety_trend + pandemic_effect) * 0.8
+    })
+    return mental_data
+
+def regional_temp_data():
+    countries = ['United States','China','India','Brazil','Russia','Japan','Germany','United Kingdom','France','Italy',
+                'Canada','South Korea','Spain','Australia','Mexico','Indonesia','Netherlands','Saudi Arabia','Turkey','Switzerland']
+    lats = [37.09,35.86,20.59,-14.24,61.52,36.20,51.17,55.38,46.23,41.87,56.13,37.57,40.46,-25.27,23.63,-0.79,52.13,23.89,38.96,46.82]
+    lons = [-95.71,104.20,78.96,-51.93,105.32,138.25,10.45,-3.44,2.21,12.57,-106.35,127.00,-3.74,133.78,-102.55,113.92,5.29,45.08,35.24,8.23]
+    temp_changes = np.random.normal(1.2,0.5,len(countries))
+    return schemas.apply("regional", pd.DataFrame({'country':countries,'lat':lats,'lon':lons,'temp_change':temp_changes}))
+
+def glacier_factors():
+    # 탭3 빙하를 녹이는 요인별 영향력 (%)
+    return schemas.apply("factors", pd.DataFrame({
+        "요인": ["기후 온난화","산업 배출(온실가스)","해양 온도 상승","검은탄소(매연)","지구 순환 변화","산불 증가","산업 개발/삼림 벌채"],
+        "영향력": [35,20,15,10,10,5,5]
+    }))
+
+# 탭1 그래프용 시계열: 연도로 정렬한 배열과 모든 스무딩 창의 이동평균을 한 번만 만들어 둔다
+# 이름 -> (불러오기 함수, 값 열, data_sources 소스 이름)
+SERIES_SOURCES = {
+    'temp': (fetch_noaa_temperature_data, ['global_temp', 'temp_anomaly'], 'noaa'),
+    'glacier': (fetch_glacier_data, ['mass_balance', 'annual_loss'], 'glacier'),
+    'mental': (fetch_mental_health_data, ['anxiety_rate', 'depression_rate'], 'mental_health'),
+}
+SERIES_SCHEMAS = {'temp': 'temperature', 'glacier': 'glacier', 'mental': 'mental_health'}
+# 원격 스냅샷 다음으로 읽는 저장소 파일의 버전 (climate_data 열 캐시 키)
+LOCAL_FILES = {'temp': climate_data.cache_key}
+
+
+def load_frame(name):
+    # 원본 표를 작은 형식(연도 int16, 측정값 float32)으로 읽는다
+    return schemas.apply(SERIES_SCHEMAS[name], SERIES_SOURCES[name][0]())
+
+
+def build_series_store(name, version=None):
+    value_columns = SERIES_SOURCES[name][1]
+    with profiling.span("tab1.fetch"):
+        frame = load_frame(name)
+    # 저장소를 만들 때 모든 스무딩 창의 이동평균을 계산한다
+    with profiling.span("tab1.smooth"):
+        return SeriesStore(frame, value_columns, version=version)
+
+
+def snapshot_token(name):
+    # 원본이 바뀌었는지 가리는 값. 필요하면(TTL 경과) 여기서 원격 갱신이 일어난다
+    # 원격 스냅샷이 없을 때 읽는 저장소 파일이 있으면 그 파일의 버전도 넣어서, 파일을 고치면 다시 만든다
+    info = data_sources.refresh_snapshot(SERIES_SOURCES[name][2])
+    local = LOCAL_FILES[name]() if name in LOCAL_FILES else None
+    return info["has_snapshot"], info.get("fetched_at"), local
+
+
+def update_series_store(name, store):
+    # 원본이 바뀌었을 때 refresh_scheduler가 부른다. 기존 관측이 그대로고 뒤에 새 관측만 붙었으면 덧붙이고,
+    # 과거 값이 고쳐졌거나 관측이 빠졌으면 None을 돌려 처음부터 다시 만들게 한다
+    # 파생 열(누적 질량, 온도 편차 등)은 파서가 원본 전체로 계산한 값을 그대로 덧붙이므로 다시 만들 때와 같다
+    value_columns = SERIES_SOURCES[name][1]
+    frame = load_frame(name)
+    sort_keys = ["year", "month"] if "month" in frame.columns else ["year"]
+    frame = frame.sort_values(sort_keys, ignore_index=True)
+    n = len(store)
+    years, x = observation_x(frame)
+    if len(frame) < n or (x is None) != (store.x is store.years):
+        return None
+    if not np.array_equal((years if x is None else x)[:n], store.x):
+        return None
+    for column in value_columns:
+        stored = store.values[column]
+        if not np.array_equal(frame[column].to_numpy(dtype=stored.dtype)[:n], stored, equal_nan=True):
+            return None
+    if len(frame) == n:
+        return store
+    return store.append(frame.iloc[n:])
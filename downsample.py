@@ -0,0 +1,55 @@
+# 긴 시계열을 그래프 픽셀 폭에 맞게 줄여서 보내기
+#
+# 구간마다 최솟값/최댓값 두 점만 남기는 min/max 버킷 방식이라 봉우리와 골짜기가 사라지지 않는다.
+# 보내는 점이 많으면 SVG 대신 WebGL(Scattergl)로 그린다.
+import numpy as np
+
+from lazy_imports import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+
+POINTS_PER_PIXEL = 2       # 픽셀 하나에 최솟값/최댓값 두 점
+WEBGL_THRESHOLD = 1000     # 이보다 많은 점을 보내면 Scattergl 사용
+MARKER_THRESHOLD = 200     # 이보다 많은 점은 마커 없이 선으로만 그림
+
+# st.columns(3) 안의 그래프와 전체 폭 그래프의 대략적인 픽셀 폭 (layout="wide" 기준)
+COLUMN_CHART_WIDTH = 420
+FULL_CHART_WIDTH = 1200
+
+
+def minmax_downsample(x, y, max_points):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 4:
+        return x, y
+
+    buckets = max_points // 2
+    size = -(-n // buckets)  # 올림 나눗셈
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    valid = np.isfinite(rows)
+
+    lo = np.where(valid, rows, np.inf).argmin(axis=1)
+    hi = np.where(valid, rows, -np.inf).argmax(axis=1)
+    base = np.arange(buckets) * size
+    picks = np.stack([lo, hi], axis=1) + base[:, None]
+    # 값이 모두 NaN인 구간은 첫 점(NaN)을 남겨서 선이 끊긴 부분이 그대로 보이게 한다
+    empty = ~valid.any(axis=1)
+    picks[empty] = base[empty, None]
+
+    index = np.unique(np.concatenate((picks.ravel(), [0, n - 1])))
+    index = index[index < n]
+    return x[index], y[index]
+
+
+def line_trace(x, y, pixel_width=COLUMN_CHART_WIDTH, mode='lines+markers', **kwargs):
+    # pixel_width=None이면 줄이지 않고 전체 해상도로 보낸다 (브라우저에서 확대할 그래프용)
+    if pixel_width is not None:
+        x, y = minmax_downsample(x, y, pixel_width * POINTS_PER_PIXEL)
+    if len(x) > MARKER_THRESHOLD:
+        mode = 'lines'
+        kwargs.pop('marker', None)
+    trace_type = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    return trace_type(x=x, y=y, mode=mode, **kwargs)
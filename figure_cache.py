@@ -0,0 +1,143 @@
+# 그래프 캐시
+#
+# 그림에 영향을 주는 입력값(연도 범위, 스무딩 창 등)을 키로 만든 go.Figure와 직렬화한 JSON을 보관한다.
+# 프로세스 안의 모든 세션이 함께 쓰고, 오래 쓰지 않은 항목부터 지운다(LRU).
+# 캐시에 넣은 그림은 여러 세션이 공유하므로 만든 뒤에는 수정하지 않는다.
+# 번들(bundle.py)에 미리 만들어 둔 그림은 JSON으로 넣어 두고, go.Figure는 처음 필요할 때 만든다.
+# 앱은 JSON을 그대로 보내므로(spec_chart.py) 캐시에 든 그림은 재실행마다 다시 직렬화하지 않는다.
+import json
+import threading
+from collections import OrderedDict
+
+import settings
+from lazy_imports import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+
+DEFAULT_HEIGHT = 450  # plotly.js 기본 높이 (st.plotly_chart의 height="content"와 같은 규칙)
+
+
+class CachedFigure:
+    def __init__(self, figure=None, spec=None, height=None):
+        self._figure = figure
+        self._spec = spec
+        self._height = height
+
+    @property
+    def figure(self):
+        # 번들의 JSON은 빌드할 때 plotly가 검증해서 만든 것이라 다시 검증하지 않는다
+        if self._figure is None:
+            self._figure = go.Figure(json.loads(self._spec), _validate=False)
+        return self._figure
+
+    @property
+    def spec(self):
+        # 직렬화한 JSON은 처음 필요할 때 한 번만 만든다
+        if self._spec is None:
+            self._spec = self.figure.to_json()
+        return self._spec
+
+    @property
+    def height(self):
+        # 차트 높이(픽셀). layout.height가 없으면 plotly.js 기본값
+        if self._height is None:
+            if self._figure is not None:
+                self._height = layout_height(self._figure.layout.to_plotly_json())
+            else:
+                self._height = layout_height(json.loads(self._spec).get("layout", {}))
+        return self._height
+
+    def with_traces(self, traces):
+        # 공유하는 그림은 그대로 두고 JSON에 trace(plotly JSON dict)를 덧붙인 새 그림 (세션마다 다른 표시용)
+        figure_json = json.loads(self.spec)
+        figure_json["data"].extend(traces)
+        return CachedFigure(spec=json.dumps(figure_json), height=self.height)
+
+
+def layout_height(layout):
+    height = layout.get("height")
+    return int(height) if isinstance(height, (int, float)) and height > 0 else DEFAULT_HEIGHT
+
+
+class FigureCache:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key, builder):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # 그림은 잠금 밖에서 만든다. 같은 키를 동시에 만들면 먼저 넣은 쪽을 사용한다
+        entry = CachedFigure(builder())
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def preload(self, key, spec):
+        # 미리 직렬화해 둔 그림을 넣는다. 조회 통계에는 넣지 않는다
+        with self._lock:
+            self._entries.setdefault(key, CachedFigure(spec=spec))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key, builder):
+        return self.get_entry(key, builder).figure
+
+    def invalidate(self, predicate=None):
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def remap(self, rekey):
+        # 항목마다 rekey(키)가 돌려준 새 키로 옮긴다. None이면 지운다 (데이터 일부만 바뀌었을 때 그대로인 그림 살리기)
+        with self._lock:
+            remapped = OrderedDict()
+            removed = 0
+            for key, entry in self._entries.items():
+                new_key = rekey(key)
+                if new_key is None:
+                    removed += 1
+                else:
+                    remapped.setdefault(new_key, entry)
+            self._entries = remapped
+            return removed
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries.items())
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+FIGURE_CACHE = FigureCache(maxsize=settings.FIGURE_CACHE_SIZE)
@@ -0,0 +1,87 @@
+# 무거운 모듈(plotly, matplotlib 등)의 import를 실제로 쓰는 시점까지 미루고 모듈별 import 시간을 기록
+#
+# CLIMATE_APP_STARTUP=lazy (기본값): 첫 속성 접근 때 import 한다. matplotlib 모듈을 처음 불러올 때 폰트도 등록한다.
+# (plotly 그래프의 폰트는 브라우저가 그리므로 등록할 필요가 없다)
+# CLIMATE_APP_STARTUP=eager: 시작할 때 바로 import 하고 폰트도 등록한다 (기존 동작).
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STARTUP_MODE = os.environ.get("CLIMATE_APP_STARTUP", "lazy")
+FONT_PATH = os.environ.get("CLIMATE_APP_FONT", "/fonts/Pretendard-Bold.ttf")
+
+FONT_MODULES = ("matplotlib",)  # 처음 불러올 때 폰트를 등록하는 패키지
+IMPORT_TIMINGS = {}  # 모듈 이름 -> import에 걸린 시간(초)
+
+_import_lock = threading.Lock()
+_font_lock = threading.Lock()
+_fonts_registered = False
+
+
+def timed_import(name):
+    if name in IMPORT_TIMINGS:
+        return sys.modules[name]
+    with _import_lock:
+        if name not in IMPORT_TIMINGS:
+            already_loaded = name in sys.modules
+            start = time.perf_counter()
+            importlib.import_module(name)
+            IMPORT_TIMINGS[name] = 0.0 if already_loaded else time.perf_counter() - start
+            logger.info("import %s: %.1f ms", name, IMPORT_TIMINGS[name] * 1000)
+    return sys.modules[name]
+
+
+class LazyModule:
+    # 속성에 처음 접근할 때 실제 모듈을 import 하는 대리 객체
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = timed_import(self._name)
+            if self._name.split(".")[0] in FONT_MODULES:
+                register_fonts()
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "deferred"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    if STARTUP_MODE == "eager":
+        return timed_import(name)
+    return LazyModule(name)
+
+
+def register_fonts():
+    # matplotlib에 Pretendard 폰트를 프로세스당 한 번만 등록한다
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    with _font_lock:
+        if _fonts_registered:
+            return
+        try:
+            font_manager = timed_import("matplotlib.font_manager")
+            pyplot = timed_import("matplotlib.pyplot")
+            font_manager.fontManager.addfont(FONT_PATH)
+            pyplot.rcParams['font.family'] = 'Pretendard'
+        except (ImportError, OSError, RuntimeError):
+            pass
+        _fonts_registered = True
+
+
+def import_report():
+    # [(모듈 이름, import 시간(초))], 오래 걸린 순. 이미 불러와져 있던 모듈은 0
+    return sorted(IMPORT_TIMINGS.items(), key=lambda item: item[1], reverse=True)
+
+
+if STARTUP_MODE == "eager":
+    register_fonts()
@@ -0,0 +1,120 @@
+# 퀴즈 리더보드 (학급별 + 전체)
+#
+# 점수 등록은 deque에 붙이기만 하므로 한 반 전체가 동시에 게임을 끝내도 잠금을 기다리지 않는다.
+# 순위표는 읽을 때 최대 SNAPSHOT_INTERVAL마다 한 번 쌓인 점수를 반영해 새 스냅샷으로 통째로 바꾼다.
+# 이때 저장소에 새로 커밋된 점수(rowid가 마지막으로 읽은 값보다 큰 행)도 읽어 와서 다른 프로세스의 점수도 보인다.
+# 그 사이의 읽기는 이전 스냅샷을 그대로 돌려준다.
+# 순위는 사용자별 최고 점수 기준이며, 같은 점수면 먼저 달성한 사람이 앞선다.
+import bisect
+import threading
+import time
+from collections import deque
+
+from submission_store import get_store
+
+TOP_K = 10
+SNAPSHOT_INTERVAL = 2.0  # 초
+GLOBAL = None  # 전체 순위표의 범위 키
+
+
+class TopK:
+    # 상위 k명만 정렬 상태로 유지한다. 정렬 키가 작을수록 높은 순위
+    def __init__(self, k):
+        self.k = k
+        self._keys = []
+        self._rows = {}  # user_id -> 순위표에 있는 기록
+        self._best = {}  # user_id -> 최고 기록의 정렬 키 (순위표 밖 사용자 포함)
+
+    def add(self, record):
+        user_id = record["user_id"]
+        key = (-record["score"], record["finished_at"], user_id)
+        best = self._best.get(user_id)
+        if best is not None and best <= key:
+            return
+        self._best[user_id] = key
+        if user_id in self._rows:
+            del self._keys[bisect.bisect_left(self._keys, best)]
+        elif len(self._keys) >= self.k and key >= self._keys[-1]:
+            return
+        bisect.insort(self._keys, key)
+        self._rows[user_id] = record
+        if len(self._keys) > self.k:
+            dropped = self._keys.pop()
+            del self._rows[dropped[2]]
+
+    def rows(self):
+        return tuple(self._rows[key[2]] for key in self._keys)
+
+
+class Leaderboard:
+    def __init__(self, k=TOP_K, interval=SNAPSHOT_INTERVAL, load_scores=None):
+        # load_scores(after_rowid) -> (마지막 rowid, 기록 목록): 저장소에 커밋된 새 점수 (SubmissionStore.quiz_scores)
+        self.k = k
+        self.interval = interval
+        self._load_scores = load_scores
+        self._last_rowid = 0
+        self._inbox = deque()
+        self._boards = {GLOBAL: TopK(k)}
+        self._snapshot = {}
+        self._snapshot_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def post(self, record):
+        self._inbox.append(record)
+
+    def _add(self, record):
+        self._boards[GLOBAL].add(record)
+        if record.get("class_id"):
+            self._boards.setdefault(record["class_id"], TopK(self.k)).add(record)
+
+    def _apply_inbox(self):
+        while True:
+            try:
+                record = self._inbox.popleft()
+            except IndexError:
+                return
+            self._add(record)
+
+    def _pull_committed(self):
+        # 이 프로세스의 점수도 커밋되면 다시 읽히지만 같은 기록은 순위를 바꾸지 않는다
+        if self._load_scores is None:
+            return
+        self._last_rowid, records = self._load_scores(self._last_rowid)
+        for record in records:
+            self._add(record)
+
+    def snapshot(self):
+        # 갱신할 때가 됐어도 다른 세션이 갱신 중이면 기다리지 않고 이전 스냅샷을 쓴다
+        if time.monotonic() - self._snapshot_at >= self.interval and self._refresh_lock.acquire(blocking=False):
+            try:
+                self._apply_inbox()
+                self._pull_committed()
+                self._snapshot = {scope: board.rows() for scope, board in self._boards.items()}
+                self._snapshot_at = time.monotonic()
+            finally:
+                self._refresh_lock.release()
+        return self._snapshot
+
+    def top(self, class_id=GLOBAL):
+        return self.snapshot().get(class_id or GLOBAL, ())
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard():
+    # 프로세스당 하나. 저장된 점수는 첫 스냅샷 때 모두 읽고, 이후 스냅샷마다 새로 커밋된 점수만 읽는다
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            _leaderboard = Leaderboard(load_scores=get_store().quiz_scores)
+        return _leaderboard
+
+
+def post_score(user_id, player, class_id, score, total):
+    record = {"user_id": user_id, "player": player, "class_id": class_id or None,
+              "score": int(score), "total": int(total), "finished_at": time.time()}
+    get_store().post_quiz_score(record)
+    get_leaderboard().post(record)
+    return record
@@ -0,0 +1,194 @@
+# 재실행 구간별 시간 측정
+#
+# span("tab1.fetch") 같은 구간 시간을 재실행마다 모아, 끝날 때 JSON 한 줄로 로그에 남기고 세션 기록에 붙인다.
+# 측정 중인 재실행이 하나도 없으면 span()은 미리 만든 빈 컨텍스트를 돌려주므로 꺼져 있을 때 비용은 dict 확인 한 번이다.
+# 재실행은 Streamlit 실행 컨텍스트의 세션 id로 찾는다. add_script_run_ctx를 붙인 작업 스레드의 구간도 같은 재실행에 모인다.
+# 위젯 콜백(on_click 등)은 스크립트보다 먼저 실행되므로, 재실행이 끝나면 다음 재실행을 위한 빈 기록을 미리 걸어 둔다.
+# 끝난 세션(연결이 끊긴 세션, 오래 재실행이 없는 세션)의 빈 기록은 PRUNE_INTERVAL마다 지운다.
+import contextlib
+import json
+import threading
+import time
+
+import numpy as np
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+NULL_SPAN = contextlib.nullcontext()
+PERCENTILES = (50, 95, 99)
+PRUNE_INTERVAL = 60.0  # 초
+IDLE_TTL = 1800.0  # 이 시간 동안 재실행이 없는 세션의 빈 기록은 지운다 (초)
+
+_active = {}  # 세션 id -> 측정 중인 RerunProfile (재실행 사이에는 콜백 구간을 모으는 빈 기록)
+_pruned_at = time.monotonic()
+
+
+class RerunProfile:
+    def __init__(self, session_id, kind, spans=()):
+        self.session_id = session_id
+        self.kind = kind  # "script" 또는 fragment 이름
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.spans = list(spans)  # (이름, 걸린 시간 초)
+        self._lock = threading.Lock()
+
+    def add(self, name, duration):
+        with self._lock:
+            self.spans.append((name, duration))
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+    def breakdown(self):
+        # 이름별 합계(ms)와 호출 횟수. 작업 스레드에서 겹쳐 실행된 구간은 각각 더한다
+        totals = {}
+        for name, duration in self.spans:
+            total, calls = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration * 1000, calls + 1)
+        return totals
+
+    def record(self):
+        return {
+            "ts": round(self.started_at, 3),
+            "session": self.session_id,
+            "kind": self.kind,
+            "total_ms": round(self.duration * 1000, 2),
+            "spans": {name: {"ms": round(total, 2), "calls": calls} for name, (total, calls) in self.breakdown().items()},
+        }
+
+
+class _Span:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    if not _active:
+        return NULL_SPAN
+    ctx = get_script_run_ctx(suppress_warning=True)
+    profile = _active.get(ctx.session_id) if ctx is not None else None
+    if profile is None:
+        return NULL_SPAN
+    return _Span(profile, name)
+
+
+def iter_spans(iterable, name):
+    # 항목을 하나 만들 때마다 구간 하나로 잰다 (청크 단위로 처리하는 반복용). 소비하는 쪽의 시간은 빠진다
+    iterator = iter(iterable)
+    while True:
+        with span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class ProfileLog:
+    # 재실행 기록을 JSON Lines 파일에 붙여 쓴다 (프로세스 안의 모든 세션이 함께 사용)
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_log(path):
+    # 같은 파일에는 프로세스 안에서 로그 객체 하나만 쓴다
+    with _logs_lock:
+        if path not in _logs:
+            _logs[path] = ProfileLog(path)
+        return _logs[path]
+
+
+def begin_rerun(session_id, kind="script"):
+    # 앞선 콜백에서 모인 구간을 넘겨받는다. 예외로 끝나지 못한 이전 측정이 남아 있으면 그 구간도 함께 넘어온다
+    pending = _active.get(session_id)
+    profile = RerunProfile(session_id, kind, pending.spans if pending is not None else ())
+    _active[session_id] = profile
+    return profile
+
+
+def end_rerun(session_id, history=None, log=None):
+    profile = _active.get(session_id)
+    if profile is None:
+        return None
+    profile.finish()
+    _active[session_id] = RerunProfile(session_id, None)
+    _prune()
+    record = profile.record()
+    if history is not None:
+        history.append(record)
+    if log is not None:
+        log.write(record)
+    return record
+
+
+def _prune():
+    global _pruned_at
+    now = time.monotonic()
+    if now - _pruned_at < PRUNE_INTERVAL:
+        return
+    _pruned_at = now
+    runtime = Runtime.instance() if Runtime.exists() else None
+    oldest = time.time() - IDLE_TTL
+    for session_id, profile in list(_active.items()):
+        idle = profile.kind is None and not profile.spans and profile.started_at < oldest
+        if idle or (runtime is not None and not runtime.is_active_session(session_id)):
+            # 그 사이에 새 재실행이 시작됐으면 남겨 둔다
+            if _active.get(session_id) is profile:
+                _active.pop(session_id, None)
+
+
+def stop(session_id):
+    # 측정을 끈 세션은 다음 재실행부터 빈 컨텍스트를 받는다
+    _active.pop(session_id, None)
+
+
+@contextlib.contextmanager
+def fragment_rerun(kind, history=None, log=None):
+    # fragment만 다시 실행될 때는 그 실행을 따로 측정한다. 전체 재실행 안에서는 바깥 측정에 그대로 포함된다
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None or not ctx.fragment_ids_this_run or ctx.session_id not in _active:
+        yield
+        return
+    begin_rerun(ctx.session_id, kind)
+    try:
+        yield
+    finally:
+        end_rerun(ctx.session_id, history, log)
+
+
+def rolling_percentiles(records, percentiles=PERCENTILES):
+    # 최근 재실행 기록에서 구간별 분위수(ms). 구간이 없던 재실행은 0으로 치지 않고 뺀다
+    samples = {"total": [record["total_ms"] for record in records]}
+    for record in records:
+        for name, value in record["spans"].items():
+            samples.setdefault(name, []).append(value["ms"])
+    rows = []
+    for name, values in samples.items():
+        row = {"구간": name, "횟수": len(values)}
+        for p, value in zip(percentiles, np.percentile(values, percentiles)):
+            row[f"p{p} (ms)"] = round(float(value), 1)
+        rows.append(row)
+    return rows
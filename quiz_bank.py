@@ -0,0 +1,75 @@
+# 탭5 퀴즈 문제 은행
+#
+# 문제는 파일(JSON 또는 Parquet)에 두고 프로세스당 한 번만 읽는다.
+# 주제·난이도별 위치 배열을 미리 만들어 두므로 문제가 수천 개여도 출제는 인덱스 조회와 표본 추출뿐이다.
+# JSON 형식: {"version": 1, "questions": [{"id", "topic", "difficulty", "question", "options", "correct", "explanation"}, ...]}
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["id", "topic", "difficulty", "question", "options", "correct", "explanation"]
+DIFFICULTIES = ["쉬움", "보통", "어려움"]
+
+
+class QuizBankError(ValueError):
+    pass
+
+
+class QuizBank:
+    def __init__(self, questions):
+        missing = [field for field in FIELDS if field not in questions.columns]
+        if missing:
+            raise QuizBankError(f"문제 은행에 필요한 항목이 없습니다: {', '.join(missing)}")
+        if questions["id"].duplicated().any():
+            raise QuizBankError("문제 id가 중복되었습니다")
+        questions = questions[FIELDS].reset_index(drop=True)
+        bad = [qid for qid, options, correct in questions[["id", "options", "correct"]].itertuples(index=False)
+               if not 0 <= int(correct) < len(options)]
+        if bad:
+            raise QuizBankError(f"정답 번호가 선택지 범위를 벗어났습니다: {', '.join(bad)}")
+
+        self.ids = questions["id"].to_numpy(dtype=object)
+        self._questions = questions.to_dict("records")
+        self._positions = {qid: i for i, qid in enumerate(self.ids)}
+        self.topics = sorted(questions["topic"].unique())
+        self.difficulties = [d for d in DIFFICULTIES if d in set(questions["difficulty"])]
+        # (주제, 난이도) -> 문제 위치 배열
+        self._index = {key: np.asarray(rows, dtype=np.int64)
+                       for key, rows in questions.groupby(["topic", "difficulty"]).indices.items()}
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        if path.suffix == ".parquet":
+            questions = pd.read_parquet(path)
+            questions["options"] = questions["options"].map(list)
+        else:
+            with open(path, encoding="utf-8") as f:
+                questions = pd.DataFrame(json.load(f)["questions"])
+        return cls(questions)
+
+    def __len__(self):
+        return len(self._questions)
+
+    def __getitem__(self, qid):
+        return self._questions[self._positions[qid]]
+
+    def candidates(self, topics=None, difficulties=None):
+        # 조건에 맞는 문제 위치. 비어 있는 조건은 전체를 뜻한다
+        keys = [key for key in self._index
+                if (not topics or key[0] in topics) and (not difficulties or key[1] in difficulties)]
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._index[key] for key in keys])
+
+    def sample(self, n, topics=None, difficulties=None, exclude=(), rng=None):
+        # 이미 푼 문제(exclude)를 빼고 중복 없이 n개를 뽑는다. 남은 문제가 모자라면 있는 만큼만 돌려준다
+        rng = rng or np.random.default_rng()
+        positions = self.candidates(topics, difficulties)
+        if exclude:
+            seen = np.fromiter((self._positions[qid] for qid in exclude if qid in self._positions), dtype=np.int64)
+            positions = np.setdiff1d(positions, seen, assume_unique=True)
+        chosen = rng.choice(positions, size=min(n, len(positions)), replace=False)
+        return [self.ids[i] for i in chosen]
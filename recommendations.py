@@ -0,0 +1,127 @@
+# 탭2 맞춤형 기후 행동 추천 규칙
+#
+# 규칙은 표(RULES)로만 정의하고, 조건은 처음 한 번 컴파일해서 응답 전체에 대한 불리언 마스크로 평가한다.
+# 학생 한 명(1행)이든 학년 전체든 같은 코드로 "어떤 규칙이 걸렸는지"와 규칙별 인원 수를 구한다.
+# 조건은 (열, 연산자, 값) 튜플이고 여러 개를 나열하면 모두 만족해야 한다. 조건이 없으면 항상 추천한다.
+import operator
+
+import numpy as np
+import pandas as pd
+
+PRIORITIES = ["high", "medium", "low"]
+PRIORITY_LABELS = {"high": "즉시 실천", "medium": "단계적 실천", "low": "장기 목표"}
+BASE_SAVINGS = 30  # 누구나 추가로 줄일 수 있는 기본 개선 가능량 (kg CO2/월)
+METRO_REGIONS = ["서울", "인천", "경기"]
+LIST_SEPARATOR = ";"  # "has" 연산자가 쓰는 목록 열의 구분자 (scoring.prepare_responses가 맞춘 형식)
+
+RULES = [
+    {"id": "car_to_transit", "priority": "high", "when": [("transport", "has", "자가용")], "savings": 125,
+     "action": "🚌 대중교통 또는 자전거 이용하기", "impact": "월 100-150kg CO2 절약", "difficulty": "쉬움",
+     "detail": "가까운 거리는 걷거나 자전거를, 먼 거리는 지하철/버스 이용"},
+    {"id": "save_electricity", "priority": "high", "when": [("electricity_usage", ">", 400)], "savings": 65,
+     "action": "💡 스마트한 전기 절약", "impact": "월 50-80kg CO2 절약", "difficulty": "쉬움",
+     "detail": "사용하지 않는 전자제품 플러그 뽑기, LED 전구 사용, 에어컨 적정온도 유지"},
+    {"id": "recycle", "priority": "high", "when": [("waste_separation", "<", 3)], "savings": 40,
+     "action": "♻️ 제대로 된 분리수거와 재활용", "impact": "월 30-50kg CO2 절약", "difficulty": "쉬움",
+     "detail": "플라스틱 세척 후 분리배출, 종이/캔/병 올바른 분류"},
+    {"id": "ease_anxiety", "priority": "high", "when": [("climate_stress", ">", 7)],
+     "action": "🧘‍♀️ 기후 불안감 완화 활동", "impact": "정신건강 개선", "difficulty": "보통",
+     "detail": "자연에서 시간 보내기, 명상, 요가, 친구들과 감정 나누기"},
+    {"id": "act_with_peers", "priority": "medium", "when": [("action_gap", ">", 3)],
+     "action": "👥 동료와 함께하는 기후 행동", "impact": "실천률 3배 향상", "difficulty": "보통",
+     "detail": "학교 환경동아리 참여, 친구들과 챌린지, 가족 기후 회의"},
+    {"id": "peer_education", "priority": "medium", "when": [("age", "<=", 15)],
+     "action": "📚 또래와 함께하는 기후 교육", "impact": "지식 향상 + 네트워크 구축", "difficulty": "쉬움",
+     "detail": "학교 과학시간 연계, 환경 다큐 시청, 기후 관련 도서 읽기"},
+    {"id": "leadership", "priority": "medium", "when": [("age", ">", 15)],
+     "action": "🎯 리더십 발휘하기", "impact": "주변인 5-10명 영향", "difficulty": "어려움",
+     "detail": "환경 동아리 만들기, 캠페인 기획, 지역사회 참여"},
+    {"id": "diet", "priority": "medium", "when": [],
+     "action": "🌱 식습관 개선", "impact": "월 20-40kg CO2 절약", "difficulty": "보통",
+     "detail": "로컬 푸드 섭취, 음식물 쓰레기 줄이기, 채식 요리 늘리기"},
+    {"id": "mindful_consumption", "priority": "medium", "when": [],
+     "action": "🛍️ 의식적인 소비", "impact": "월 15-30kg CO2 절약", "difficulty": "어려움",
+     "detail": "중고품 활용, 내구재 선택, 불필요한 구매 줄이기"},
+    {"id": "urban_action", "priority": "low", "when": [("region", "in", METRO_REGIONS)],
+     "action": "🌆 도시형 기후 행동", "impact": "지역 환경 개선", "difficulty": "보통",
+     "detail": "미세먼지 줄이기, 도시 열섬 완화, 그린 루프 캠페인 참여"},
+    {"id": "local_action", "priority": "low", "when": [("region", "not in", METRO_REGIONS)],
+     "action": "🌄 지역 특성 맞춤 활동", "impact": "생태계 보호", "difficulty": "보통",
+     "detail": "지역 생태계 보호, 농촌형 재생에너지, 지역 특산물 활용"},
+    {"id": "digital_footprint", "priority": "low", "when": [],
+     "action": "📱 디지털 탄소발자국 줄이기", "impact": "월 5-15kg CO2 절약", "difficulty": "쉬움",
+     "detail": "스트리밍 시간 줄이기, 클라우드 저장소 정리, 불필요한 앱 삭제"},
+    {"id": "home_efficiency", "priority": "low", "when": [],
+     "action": "🏡 가정 내 에너지 효율화", "impact": "월 30-60kg CO2 절약", "difficulty": "어려움",
+     "detail": "단열 개선, 고효율 가전 교체, 태양광 패널 설치 (가족과 상의)"},
+]
+
+_COMPARISONS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+                "==": operator.eq, "!=": operator.ne}
+
+
+def _compile_condition(column, op, value):
+    # 조건 하나를 "응답 DataFrame -> 불리언 배열" 함수로 바꾼다
+    if op in _COMPARISONS:
+        compare = _COMPARISONS[op]
+        return lambda df: compare(df[column].to_numpy(dtype=np.float64), value)
+    if op == "has":
+        # 목록 항목 중 하나가 value와 정확히 같은지 (양쪽에 구분자를 붙여 항목 경계에서만 맞춘다)
+        item = f"{LIST_SEPARATOR}{value}{LIST_SEPARATOR}"
+        return lambda df: (LIST_SEPARATOR + df[column].astype("string").fillna("") + LIST_SEPARATOR).str.contains(
+            item, regex=False).to_numpy(dtype=bool)
+    if op in ("in", "not in"):
+        choices = list(value)
+        negate = op == "not in"
+        return lambda df: df[column].isin(choices).to_numpy(dtype=bool) != negate
+    raise ValueError(f"알 수 없는 조건 연산자입니다: {op!r}")
+
+
+class RuleSet:
+    def __init__(self, rules):
+        ids = [rule["id"] for rule in rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("규칙 id가 중복되었습니다")
+        unknown = [rule["priority"] for rule in rules if rule["priority"] not in PRIORITIES]
+        if unknown:
+            raise ValueError(f"알 수 없는 우선순위입니다: {unknown}")
+        self.rules = rules
+        self.ids = ids
+        self.table = pd.DataFrame(rules, columns=["id", "priority", "action", "impact", "difficulty", "detail"]).set_index("id")
+        self.savings = np.array([rule.get("savings", 0) for rule in rules], dtype=np.float64)
+        self._conditions = [[_compile_condition(*cond) for cond in rule["when"]] for rule in rules]
+
+    def evaluate(self, scored):
+        # (응답 수, 규칙 수) 불리언 행렬. 같은 조건을 쓰는 규칙이 많지 않아 규칙마다 바로 계산한다
+        mask = np.ones((len(scored), len(self.rules)), dtype=bool)
+        for j, conditions in enumerate(self._conditions):
+            for condition in conditions:
+                mask[:, j] &= condition(scored)
+        return mask
+
+    def fired(self, mask, row):
+        # 한 응답에서 걸린 규칙을 표 순서대로 돌려준다
+        return [self.rules[j] for j in np.flatnonzero(mask[row])]
+
+    def fired_ids(self, mask, sep=";"):
+        # 응답마다 걸린 규칙 id를 sep로 이은 문자열 (결과 CSV용)
+        # 걸린 규칙 조합은 많아야 수백 가지라 조합마다 한 번만 문자열을 만든다
+        codes = mask.astype(np.int64) @ (1 << np.arange(len(self.ids), dtype=np.int64))
+        patterns, inverse = np.unique(codes, return_inverse=True)
+        ids = np.asarray(self.ids)
+        labels = np.array([sep.join(ids[(code >> np.arange(len(ids))) & 1 == 1]) for code in patterns], dtype=object)
+        return pd.Series(labels[inverse], dtype="string")
+
+    def potential_savings(self, mask):
+        return mask @ self.savings + BASE_SAVINGS
+
+    def counts(self, mask):
+        # 규칙별 인원 수와 비율: 학급·학년에서 가장 필요한 행동 순으로 정렬
+        report = self.table[["priority", "action"]].copy()
+        report["count"] = mask.sum(axis=0)
+        report["share"] = report["count"] / max(len(mask), 1)
+        report["priority"] = pd.Categorical(report["priority"], categories=PRIORITIES, ordered=True)
+        return report.sort_values(["count", "priority"], ascending=[False, True])
+
+
+RULE_SET = RuleSet(RULES)
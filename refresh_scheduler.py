@@ -0,0 +1,133 @@
+# 탭1 데이터셋 백그라운드 갱신 (stale-while-revalidate)
+#
+# 재실행은 항상 지금 들고 있는 마지막 정상 데이터를 바로 받는다. 갱신은 프로세스당 하나인 백그라운드 스레드가
+# REFRESH_INTERVAL마다 맡아서, 원본이 바뀌었을 때만 새 데이터를 만들고 참조 하나를 바꿔 끼운다.
+# 데이터셋마다 두 함수(와 선택 함수 하나)를 등록한다.
+# - check(): 원본을 확인(필요하면 원격 갱신)하고 원본 버전을 나타내는 값을 돌려준다
+# - load(): 데이터를 처음부터 만든다. check() 값이 달라졌을 때만 부른다
+# - update(value) (선택): 지금 데이터에 바뀐 부분만 반영한 새 데이터. 할 수 없으면 None을 돌려 load()로 넘긴다
+# 처음 한 번은 데이터가 없으므로 요청한 재실행이 직접 만든다(같은 데이터셋을 동시에 요청하면 한 번만 만든다).
+import logging
+import threading
+import time
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+REFRESHING = "refreshing"
+FAILED = "failed"
+
+
+class Snapshot:
+    __slots__ = ("value", "token", "loaded_at")
+
+    def __init__(self, value, token, loaded_at):
+        self.value = value
+        self.token = token
+        self.loaded_at = loaded_at
+
+
+class RefreshScheduler:
+    def __init__(self, interval=settings.REFRESH_INTERVAL):
+        self.interval = interval
+        self._jobs = {}  # 이름 -> (check, load, update)
+        self._snapshots = {}  # 이름 -> Snapshot. 통째로 바꿔 끼우므로 읽을 때 잠그지 않는다
+        self._status = {}  # 이름 -> {"state", "checked_at", "error"}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def register(self, name, check, load, update=None):
+        # 스크립트가 재실행될 때마다 불려도 처음 등록한 함수를 계속 쓴다
+        with self._lock:
+            if name not in self._jobs:
+                self._jobs[name] = (check, load, update)
+                self._load_locks[name] = threading.Lock()
+                self._status[name] = {"state": OK, "checked_at": None, "error": None}
+
+    def get(self, name):
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            snapshot = self._first_load(name)
+        return snapshot.value
+
+    def _first_load(self, name):
+        with self._load_locks[name]:
+            snapshot = self._snapshots.get(name)
+            if snapshot is None:
+                check, load, _ = self._jobs[name]
+                token = check()
+                snapshot = Snapshot(load(), token, time.time())
+                self._snapshots[name] = snapshot
+                self._status[name]["checked_at"] = snapshot.loaded_at
+        self._start()
+        return snapshot
+
+    def seed(self, name, value, token, loaded_at=None):
+        # 빌드 때 만들어 둔 데이터(번들)로 시작한다. 이미 데이터가 있으면 그대로 두고, 이후 갱신은 평소처럼 한다
+        with self._load_locks[name]:
+            if name not in self._snapshots:
+                self._snapshots[name] = Snapshot(value, token, loaded_at or time.time())
+                self._status[name]["checked_at"] = time.time()
+        self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dataset-refresh", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            for name in list(self._jobs):
+                if name in self._snapshots:
+                    self.refresh(name)
+
+    def refresh(self, name):
+        # 백그라운드 스레드에서 부른다. 실패하면 이전 데이터를 그대로 두고 상태만 남긴다
+        check, load, update = self._jobs[name]
+        status = self._status[name]
+        status["state"] = REFRESHING
+        try:
+            token = check()
+            current = self._snapshots[name]
+            if token != current.token:
+                value = update(current.value) if update is not None else None
+                if value is None:
+                    value = load()
+                    logger.info("%s: 새 데이터로 교체", name)
+                else:
+                    logger.info("%s: 바뀐 부분만 반영", name)
+                self._snapshots[name] = Snapshot(value, token, time.time())
+            status.update(state=OK, error=None)
+        except Exception as exc:
+            logger.warning("%s: 갱신 실패, 마지막 정상 데이터를 계속 사용 (%s)", name, exc)
+            status.update(state=FAILED, error=str(exc))
+        status["checked_at"] = time.time()
+
+    def clear(self):
+        # 들고 있는 데이터를 버린다. 다음 get()이 처음부터 다시 만든다 (벤치마크의 콜드 측정용)
+        self._snapshots.clear()
+
+    def status(self, name):
+        snapshot = self._snapshots.get(name)
+        status = dict(self._status.get(name, {}))
+        status["loaded_at"] = snapshot.loaded_at if snapshot else None
+        checked_at = status.get("checked_at")
+        status["next_check_at"] = checked_at + self.interval if checked_at else None
+        return status
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler()
+        return _scheduler
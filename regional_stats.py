@@ -0,0 +1,156 @@
+# 지역별 탄소 발자국·기후 스트레스 실시간 집계
+#
+# 제출이 들어올 때마다 지역별 평균/분산(Welford)과 분위수용 히스토그램을 O(1)로 갱신한다.
+# 그래프는 집계값만 읽으므로 제출 기록이 아무리 많아도 다시 훑지 않는다.
+# 이 프로세스의 제출은 들어오는 즉시 더하고, 읽을 때 최대 SYNC_INTERVAL마다 저장소에 새로 커밋된 행
+# (rowid가 마지막으로 읽은 값보다 큰 행)을 읽어 다른 프로세스의 제출도 더한다. 처음 읽을 때 저장된 기록 전체가 들어온다.
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from scoring import REGIONS
+from submission_store import get_store
+
+# 지표 -> (최솟값, 최댓값, 구간 폭). 범위를 벗어난 값은 양 끝 구간에 넣는다
+METRICS = {
+    "total_carbon": (0.0, 1000.0, 5.0),
+    "climate_stress": (0.0, 10.0, 0.5),
+}
+QUANTILES = (0.25, 0.5, 0.75)
+SYNC_INTERVAL = 2.0  # 초
+
+
+class RunningStats:
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+
+class HistogramSketch:
+    # 고정 폭 구간의 개수만 세는 분위수 스케치. 오차는 구간 폭의 절반 이내
+    def __init__(self, low, high, width):
+        self.low = low
+        self.width = width
+        self.counts = np.zeros(int(round((high - low) / width)) + 1, dtype=np.int64)
+
+    def add(self, value):
+        index = int((value - self.low) / self.width + 0.5)
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+
+    def quantile(self, q):
+        total = self.counts.sum()
+        if total == 0:
+            return math.nan
+        index = int(np.searchsorted(np.cumsum(self.counts), q * total, side="left"))
+        return self.low + index * self.width
+
+
+class RegionalAggregator:
+    def __init__(self, regions=REGIONS, metrics=METRICS, load_committed=None, interval=SYNC_INTERVAL):
+        # load_committed(after_rowid) -> (마지막 rowid, 기록 목록): 저장소에 커밋된 새 제출
+        self.regions = list(regions)
+        self.metrics = metrics
+        self.interval = interval
+        self.version = 0
+        self._stats = {(region, metric): RunningStats() for region in self.regions for metric in metrics}
+        self._sketches = {(region, metric): HistogramSketch(*bounds)
+                          for region in self.regions for metric, bounds in metrics.items()}
+        self._lock = threading.Lock()
+        self._load_committed = load_committed
+        self._last_rowid = 0
+        self._synced_at = -math.inf
+        self._sync_lock = threading.Lock()
+        self._local_ids = set()  # add()로 이미 더했고 아직 저장소에서 다시 읽지 않은 제출
+
+    def add(self, record):
+        # 이 프로세스의 제출 (SubmissionStore 리스너). 저장소에서 다시 읽힐 때는 건너뛴다
+        with self._lock:
+            if record.get("submission_id") in self._local_ids:
+                return
+            self._local_ids.add(record.get("submission_id"))
+            self._add(record)
+
+    def _add(self, record):
+        region = record.get("region")
+        if region not in self.regions:
+            return
+        for metric in self.metrics:
+            value = record.get(metric)
+            if value is None or not math.isfinite(value):
+                continue
+            self._stats[region, metric].add(float(value))
+            self._sketches[region, metric].add(float(value))
+        self.version += 1
+
+    def sync(self):
+        # 다른 세션이 읽어 오는 중이면 기다리지 않고 지금 집계를 쓴다
+        if self._load_committed is None or time.monotonic() - self._synced_at < self.interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            last_rowid, records = self._load_committed(self._last_rowid)
+            with self._lock:
+                for record in records:
+                    if record["submission_id"] in self._local_ids:
+                        self._local_ids.discard(record["submission_id"])
+                    else:
+                        self._add(record)
+            self._last_rowid = last_rowid
+            self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def snapshot(self):
+        # 17개 지역 모두에 대해 지표별 건수, 평균, 표준편차, 분위수 (기록이 없으면 NaN)
+        self.sync()
+        rows = []
+        with self._lock:
+            for region in self.regions:
+                row = {"지역": region}
+                for metric in self.metrics:
+                    stats = self._stats[region, metric]
+                    row[f"{metric}_count"] = stats.count
+                    row[f"{metric}_mean"] = stats.mean if stats.count else math.nan
+                    row[f"{metric}_std"] = math.sqrt(stats.variance) if stats.count > 1 else math.nan
+                    for q in QUANTILES:
+                        row[f"{metric}_p{int(q * 100)}"] = self._sketches[region, metric].quantile(q)
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_aggregator():
+    # 프로세스당 집계기 하나. 이 프로세스의 제출은 바로, 다른 프로세스의 제출은 커밋된 뒤 다음 읽기 때 반영된다
+    global _aggregator
+    with _aggregator_lock:
+        if _aggregator is None:
+            store = get_store()
+            columns = ["submission_id", "region", *METRICS]
+            aggregator = RegionalAggregator(
+                load_committed=lambda after_rowid: store.committed_submissions(after_rowid, columns))
+            store.add_listener(aggregator.add)
+            # 집계기를 만들기 전에 들어와 아직 커밋되지 않은 제출 (리스너와 겹쳐도 add()가 한 번만 센다)
+            for record in store.pending_submissions():
+                aggregator.add(record)
+            _aggregator = aggregator
+        return _aggregator
@@ -0,0 +1,79 @@
+# 앱 DataFrame의 열 형식(스키마)과 메모리 사용량
+#
+# 기본 형식(int64/float64/object) 대신 연도는 작은 정수, 측정값은 float32, 지역·국가·요인 이름은 범주형으로 둔다.
+# - float32는 유효숫자 7자리라 소수 둘째 자리까지 재는 기온·질량·비율·점수에는 충분하다
+# - 결측(NaN)이 있을 수 있는 입력 열(설문 응답)은 정수 대신 float32를 쓴다
+# - 여러 값이 ;로 이어진 교통수단처럼 종류가 많은 문자열은 범주형으로 바꾸지 않는다
+# 스키마에 없는 열은 그대로 둔다.
+import pandas as pd
+
+YEAR = "int16"
+MONTH = "int8"
+MEASURE = "float32"
+LABEL = "category"
+
+SCHEMAS = {
+    "temperature": {"year": YEAR, "month": MONTH, "global_temp": MEASURE, "temp_anomaly": MEASURE},
+    "glacier": {"year": YEAR, "mass_balance": MEASURE, "annual_loss": MEASURE},
+    "mental_health": {"year": YEAR, "anxiety_rate": MEASURE, "depression_rate": MEASURE},
+    "regional": {"country": LABEL, "lat": MEASURE, "lon": MEASURE, "temp_change": MEASURE},
+    "factors": {"요인": LABEL, "영향력": "int8"},
+    # 탭2 설문 응답과 점수 (업로드 파일, 입력 위젯, 제출 기록)
+    "survey": {
+        "age": MEASURE, "region": LABEL, "family_size": MEASURE, "electricity_usage": MEASURE,
+        "waste_separation": MEASURE, "climate_concern": MEASURE, "action_willingness": MEASURE,
+        "future_anxiety": MEASURE, "carbon_transport": MEASURE, "carbon_electricity": MEASURE,
+        "carbon_waste": MEASURE, "total_carbon": MEASURE, "climate_stress": MEASURE, "action_gap": MEASURE,
+        "potential_savings": MEASURE,
+    },
+}
+
+
+def apply(name, frame):
+    # 스키마대로 열 형식을 바꾼 새 DataFrame
+    schema = SCHEMAS[name]
+    dtypes = {column: dtype for column, dtype in schema.items() if column in frame.columns}
+    return frame.astype(dtypes) if dtypes else frame
+
+
+def default_nbytes(frame):
+    # 스키마를 적용하지 않았을 때(숫자는 8바이트, 범주형은 문자열 object)의 크기
+    total = int(frame.index.memory_usage(deep=True))
+    for column in frame.columns:
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            total += int(values.astype(object).memory_usage(deep=True, index=False))
+        elif pd.api.types.is_bool_dtype(values):
+            total += len(values)
+        elif pd.api.types.is_numeric_dtype(values):
+            total += 8 * len(values)
+        else:
+            total += int(values.memory_usage(deep=True, index=False))
+    return total
+
+
+def _store_nbytes(store):
+    # 시계열 저장소(SeriesStore): 지금 크기와 모든 배열이 8바이트일 때의 크기
+    arrays = 1 + len(store.values) + len(store.smoothed) + (store.x is not store.years)
+    return store.nbytes, 8 * len(store) * arrays
+
+
+def footprint(name, data):
+    if isinstance(data, pd.DataFrame):
+        compact = int(data.memory_usage(deep=True).sum())
+        default = default_nbytes(data)
+    else:
+        compact, default = _store_nbytes(data)
+    return {
+        "데이터셋": name,
+        "행 수": len(data),
+        "기본 형식(KB)": default / 1024,
+        "스키마 적용(KB)": compact / 1024,
+        "절감(%)": (1 - compact / default) * 100 if default else 0.0,
+    }
+
+
+def footprint_report(datasets):
+    # datasets: {이름: DataFrame 또는 SeriesStore}
+    rows = [footprint(name, data) for name, data in datasets.items() if data is not None]
+    return pd.DataFrame(rows, columns=["데이터셋", "행 수", "기본 형식(KB)", "스키마 적용(KB)", "절감(%)"])
@@ -0,0 +1,109 @@
+# 탭2 설문 응답의 탄소 발자국·기후 스트레스 점수 계산
+#
+# 학생 한 명이든 학년 전체든 같은 열 단위(numpy) 연산으로 계산한다.
+# 업로드 파일은 탭2 입력 위젯과 같은 열 이름을 사용하고, 교통수단은 "대중교통;자전거"처럼 구분자(; 또는 ,)로 나열한다.
+import io
+
+import numpy as np
+import pandas as pd
+
+import schemas
+
+TRANSPORT_OPTIONS = ["도보", "자전거", "대중교통", "자가용", "오토바이"]
+TRANSPORT_SEPARATOR = ";"
+REGIONS = ["서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종", "경기", "강원",
+           "충북", "충남", "전북", "전남", "경북", "경남", "제주"]
+
+# 열 이름 -> (최솟값, 최댓값): 탭2 슬라이더와 같은 범위로 잘라낸다
+NUMERIC_FIELDS = {
+    "age": (13, 19),
+    "family_size": (2, 8),
+    "electricity_usage": (200, 800),
+    "waste_separation": (1, 5),
+    "climate_concern": (1, 10),
+    "action_willingness": (1, 10),
+    "future_anxiety": (1, 10),
+}
+SURVEY_COLUMNS = ["age", "region", "family_size", "transport", *list(NUMERIC_FIELDS)[2:]]
+SCORE_COLUMNS = ["carbon_transport", "carbon_electricity", "carbon_waste", "total_carbon",
+                 "climate_stress", "action_gap"]
+
+CHUNK_ROWS = 20_000
+
+
+class SurveyFormatError(ValueError):
+    pass
+
+
+def prepare_responses(df):
+    missing = [c for c in SURVEY_COLUMNS if c not in df.columns]
+    if missing:
+        raise SurveyFormatError(f"필수 열이 없습니다: {', '.join(missing)}")
+    out = pd.DataFrame(index=df.index)
+    for column, (low, high) in NUMERIC_FIELDS.items():
+        out[column] = pd.to_numeric(df[column], errors="coerce").clip(low, high)
+    out["region"] = df["region"].astype("string").str.strip()
+    # 교통수단은 "대중교통;자전거"처럼 앞뒤 공백 없이 ;로 잇는 형식으로 맞춘다
+    out["transport"] = (df["transport"].astype("string").fillna("")
+                        .str.replace(r"\s*[;,]\s*", TRANSPORT_SEPARATOR, regex=True).str.strip(" ;"))
+    return out
+
+
+def score_responses(df):
+    df = prepare_responses(df)
+    # 선택지별로 고른 여부(항목 값이 정확히 같을 때만)를 구해 더하면 응답마다 고른 교통수단 개수가 된다.
+    # 선택지에 없는 값은 세지 않는다
+    uses = (df["transport"].str.get_dummies(sep=TRANSPORT_SEPARATOR)
+            .reindex(columns=TRANSPORT_OPTIONS, fill_value=0).to_numpy(dtype=bool))
+    transport_count = uses.sum(axis=1)
+    has_car = uses[:, TRANSPORT_OPTIONS.index("자가용")]
+
+    concern = df["climate_concern"].to_numpy(dtype=np.float64)
+    scores = pd.DataFrame(index=df.index)
+    scores["carbon_transport"] = np.where(has_car, transport_count * 50, transport_count * 20).astype(np.float64)
+    scores["carbon_electricity"] = df["electricity_usage"].to_numpy(dtype=np.float64) * 0.5
+    scores["carbon_waste"] = (5 - df["waste_separation"].to_numpy(dtype=np.float64)) * 30
+    scores["total_carbon"] = scores["carbon_transport"] + scores["carbon_electricity"] + scores["carbon_waste"]
+    scores["climate_stress"] = (concern + df["future_anxiety"].to_numpy(dtype=np.float64)) / 2
+    scores["action_gap"] = concern - df["action_willingness"].to_numpy(dtype=np.float64)
+    # 계산은 float64로 하고, 보관하는 결과는 작은 형식(측정값 float32, 지역 범주형)으로 둔다
+    return schemas.apply("survey", pd.concat([df, scores], axis=1))
+
+
+def one_response(age, region, family_size, transport, electricity_usage, waste_separation,
+                 climate_concern, action_willingness, future_anxiety):
+    # 탭2 입력 위젯 값을 업로드 파일과 같은 형식의 1행 DataFrame으로 만든다
+    return pd.DataFrame([{
+        "age": age, "region": region, "family_size": family_size, "transport": TRANSPORT_SEPARATOR.join(transport),
+        "electricity_usage": electricity_usage, "waste_separation": waste_separation,
+        "climate_concern": climate_concern, "action_willingness": action_willingness,
+        "future_anxiety": future_anxiety,
+    }])
+
+
+def count_rows(data, filename):
+    # 진행 표시줄용 전체 응답 수 (CSV는 줄 수로 어림한다)
+    if filename.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(io.BytesIO(data)).metadata.num_rows
+    return max(data.rstrip(b"\r\n").count(b"\n"), 0)
+
+
+def iter_survey_chunks(data, filename, chunk_rows=CHUNK_ROWS):
+    # 업로드한 CSV/Parquet을 청크 단위로 읽어서 점수를 매긴 결과를 차례로 돌려준다
+    if filename.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(io.BytesIO(data)).iter_batches(batch_size=chunk_rows):
+            yield score_responses(batch.to_pandas())
+        return
+    for chunk in pd.read_csv(io.BytesIO(data), chunksize=chunk_rows, encoding="utf-8-sig"):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        yield score_responses(chunk)
+
+
+def survey_template():
+    return pd.DataFrame([{
+        "age": 16, "region": "서울", "family_size": 4, "transport": "대중교통;자전거",
+        "electricity_usage": 350, "waste_separation": 3, "climate_concern": 7,
+        "action_willingness": 6, "future_anxiety": 5,
+    }], columns=SURVEY_COLUMNS)
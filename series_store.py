@@ -0,0 +1,248 @@
+# 연도로 정렬된 시계열 저장소
+#
+# 연도 구간은 searchsorted로 찾아 배열 슬라이스(복사 없는 view)로 돌려주고,
+# 사이드바 슬라이더 범위의 모든 중심 이동평균은 누적합으로 한 번만 계산해 둔다.
+# 새 관측은 append()로 덧붙인다. 배열은 여유 공간이 있는 버퍼의 앞부분이라 새 행만 써 넣고,
+# 이동평균도 새 행이 창에 들어가는 끝부분만 다시 계산한다(새 행 수 + 창 크기에 비례).
+# 이동평균의 끝 몇 자리(뒤쪽 창이 덜 찬 자리)는 관측이 붙으면 값이 바뀌므로 버퍼에 두지 않고 버전마다 따로 갖는다.
+# 그래서 덧붙여도 이미 내보낸 버전의 값은 바뀌지 않는다.
+import itertools
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+
+SMOOTHING_WINDOWS = range(3, 11)  # 사이드바 '스무딩 윈도우 크기' 슬라이더 범위
+
+_versions = itertools.count(1)
+
+
+def centered_moving_average(values, window):
+    # pandas의 rolling(window, center=True).mean()과 같은 결과 (창 안에 NaN이 있으면 NaN)
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    finite = np.isfinite(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(finite, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(finite)))
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    start = window // 2
+    out[start:start + len(window_sums)] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def unsettled_tail(window):
+    # 중심 이동평균에서 뒤쪽 창이 덜 차서 NaN인 자리 수. 관측을 덧붙이면 이 자리만 값이 바뀐다
+    return window - 1 - window // 2
+
+
+def _as_float(values):
+    # 저장 형식: float32 등 실수 열은 그대로 두고, 그 밖의 열은 float64로 바꾼다 (이동평균 계산은 float64)
+    return values if values.dtype.kind == "f" else values.astype(np.float64)
+
+
+def observation_x(frame):
+    # x축 값: 연도(열 형식 그대로, 보통 int16), 월별 자료는 소수 연도(예: 2020.04)
+    years = frame["year"].to_numpy()
+    if years.dtype.kind not in "iu":
+        years = years.astype(np.int64)
+    if "month" not in frame.columns:
+        return years, None
+    months = frame["month"].to_numpy(dtype=np.float64)
+    return years, years + (months - 0.5) / 12
+
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+
+def _settled_length(length, window):
+    # 관측이 더 붙어도 이동평균 값이 바뀌지 않는 앞부분의 길이
+    return max(length - unsettled_tail(window), 0)
+
+
+def _split_tails(buffers, length):
+    # 처음 만든 이동평균 버퍼에서 버전마다 따로 가질 끝부분을 떼어 복사한다
+    return {key: _readonly(np.array(buffer[_settled_length(length, key[2]):length]))
+            for key, buffer in buffers.items() if key[0] == "smoothed"}
+
+
+class _SmoothedArrays(Mapping):
+    # (열, 창) -> 이동평균 배열. 확정된 앞부분(공유 버퍼)과 이 버전의 끝부분을 이어 붙여 돌려준다
+    __slots__ = ("_parts",)
+
+    def __init__(self, parts):
+        self._parts = parts
+
+    def __getitem__(self, key):
+        settled, tail = self._parts[key]
+        return _readonly(np.concatenate((settled, tail))) if len(tail) else settled
+
+    def __iter__(self):
+        return iter(self._parts)
+
+    def __len__(self):
+        return len(self._parts)
+
+
+class _Lineage:
+    # 버퍼를 함께 쓰는 저장소 버전들의 공용 기록. 버퍼에 확정된 행 수가 가장 긴 버전만 제자리에 덧붙일 수 있다
+    __slots__ = ("length", "lock")
+
+    def __init__(self, length):
+        self.length = length
+        self.lock = threading.Lock()
+
+
+class SeriesStore:
+    def __init__(self, frame, value_columns, windows=SMOOTHING_WINDOWS, version=None):
+        # 그래프 캐시 키에 쓰는 값. 저장소를 새로 만들면 바뀐다 (번들에서 읽은 저장소는 번들이 정한 값)
+        self.version = next(_versions) if version is None else version
+        sort_keys = ["year", "month"] if "month" in frame.columns else ["year"]
+        frame = frame.sort_values(sort_keys)
+        years, x = observation_x(frame)
+        buffers = {"years": years}
+        if x is not None:
+            buffers["x"] = x
+        for column in value_columns:
+            values = _as_float(frame[column].to_numpy())
+            buffers["value", column] = values
+            for window in windows:
+                buffers["smoothed", column, window] = centered_moving_average(values, window).astype(values.dtype, copy=False)
+        self._attach(buffers, len(years), _Lineage(len(years)), _split_tails(buffers, len(years)))
+
+    @classmethod
+    def from_arrays(cls, years, x, values, smoothed, version):
+        # 미리 계산해 둔 배열(번들의 메모리 매핑 배열 등)로 저장소를 만든다. 복사하지 않는다
+        buffers = {"years": years}
+        if x is not None:
+            buffers["x"] = x
+        buffers.update((("value", column), array) for column, array in values.items())
+        buffers.update((("smoothed", column, window), array) for (column, window), array in smoothed.items())
+        store = cls.__new__(cls)
+        store.version = version
+        store._attach(buffers, len(years), _Lineage(len(years)), _split_tails(buffers, len(years)))
+        return store
+
+    def _attach(self, buffers, length, lineage, tails):
+        # 공개 배열은 버퍼 앞부분의 읽기 전용 view. 뒤에 덧붙인 행은 이 저장소에서 보이지 않는다
+        # 이동평균은 확정된 앞부분만 버퍼의 view이고, 끝부분(tails)은 이 버전만의 배열이다
+        self._buffers = buffers
+        self._lineage = lineage
+        self.appended_from = None  # append()로 만든 저장소면 덧붙이기 전 행 수
+        self.years = _readonly(buffers["years"][:length])
+        self.x = _readonly(buffers["x"][:length]) if "x" in buffers else self.years
+        self.values = {}
+        self._smoothed_parts = {}
+        for key, buffer in buffers.items():
+            if key[0] == "value":
+                self.values[key[1]] = _readonly(buffer[:length])
+            elif key[0] == "smoothed":
+                tail = tails[key]
+                self._smoothed_parts[key[1:]] = (_readonly(buffer[:length - len(tail)]), tail)
+        self.smoothed = _SmoothedArrays(self._smoothed_parts)
+
+    def __len__(self):
+        return len(self.years)
+
+    @property
+    def nbytes(self):
+        arrays = [self.years, *self.values.values()]
+        for settled, tail in self._smoothed_parts.values():
+            arrays += [settled, tail]
+        if self.x is not self.years:
+            arrays.append(self.x)
+        return sum(array.nbytes for array in arrays)
+
+    def bounds(self, start_year, end_year):
+        lo = np.searchsorted(self.years, start_year, side="left")
+        hi = np.searchsorted(self.years, end_year, side="right")
+        return lo, hi
+
+    def view(self, start_year, end_year, column, window=None):
+        lo, hi = self.bounds(start_year, end_year)
+        if window is None:
+            return self.x[lo:hi], self.values[column][lo:hi]
+        if (column, window) not in self._smoothed_parts:
+            return self.x[lo:hi], centered_moving_average(self.values[column], window)[lo:hi]
+        settled, tail = self._smoothed_parts[column, window]
+        m = len(settled)
+        if hi <= m:
+            values = settled[lo:hi]
+        elif lo >= m:
+            values = tail[lo - m:hi - m]
+        else:
+            # 구간이 끝부분에 걸칠 때만 구간 길이만큼 복사한다
+            values = np.concatenate((settled[lo:], tail[:hi - m]))
+        return self.x[lo:hi], values
+
+    def stable_length(self, window=None):
+        # 덧붙이기 전 버전과 값이 같은 앞부분의 길이. 이 안쪽만 보여 주는 그래프는 다시 그릴 필요가 없다
+        if self.appended_from is None:
+            return len(self)
+        if window is None:
+            return self.appended_from
+        return max(self.appended_from - unsettled_tail(window), 0)
+
+    def append(self, frame):
+        # 마지막 관측 뒤의 새 관측을 덧붙인 새 버전을 돌려준다. 이 저장소는 바뀌지 않고 그대로 쓸 수 있다
+        if len(frame) == 0:
+            return self
+        sort_keys = ["year", "month"] if "month" in frame.columns else ["year"]
+        frame = frame.sort_values(sort_keys)
+        years, x = observation_x(frame)
+        if (x is None) != (self.x is self.years):
+            raise ValueError("연별/월별 자료를 섞어 덧붙일 수 없습니다")
+        new_x = years if x is None else x
+        if len(self) and new_x[0] <= self.x[-1]:
+            raise ValueError(f"마지막 관측({self.x[-1]}) 이후의 관측만 덧붙일 수 있습니다")
+        missing = [column for column in self.values if column not in frame.columns]
+        if missing:
+            raise ValueError(f"덧붙일 관측에 {missing} 열이 없습니다")
+
+        n, k = len(self), len(frame)
+        with self._lineage.lock:
+            in_place = self._lineage.length == n and all(
+                buffer.flags.writeable and len(buffer) >= n + k for buffer in self._buffers.values())
+            if in_place:
+                buffers, lineage = self._buffers, self._lineage
+            else:
+                # 여유 공간이 없거나 이미 다른 버전이 덧붙였으면 두 배 크기의 새 버퍼로 옮긴다 (분할 상환 O(1))
+                # 이동평균은 확정된 앞부분만 옮기고 끝부분은 아래에서 다시 계산한다
+                capacity = max(2 * (n + k), 64)
+                buffers = {}
+                for key, buffer in self._buffers.items():
+                    kept = len(self._smoothed_parts[key[1:]][0]) if key[0] == "smoothed" else n
+                    grown = np.empty(capacity, dtype=buffer.dtype)
+                    grown[:kept] = buffer[:kept]
+                    buffers[key] = grown
+                lineage = _Lineage(n)
+
+            buffers["years"][n:n + k] = years
+            if x is not None:
+                buffers["x"][n:n + k] = x
+            for key, buffer in buffers.items():
+                if key[0] == "value":
+                    buffer[n:n + k] = frame[key[1]].to_numpy(dtype=buffer.dtype)
+            tails = {}
+            for key, buffer in buffers.items():
+                if key[0] == "smoothed":
+                    _, column, window = key
+                    # 이 버전의 끝부분 자리부터 끝까지만 다시 계산한다. 새로 확정된 자리만 버퍼에 쓰는데,
+                    # 이전 버전들은 버퍼에서 자기 확정 길이(<= start)까지만 읽으므로 값이 바뀌지 않는다
+                    start = len(self._smoothed_parts[column, window][0])
+                    settled = _settled_length(n + k, window)
+                    lo = max(start - window // 2, 0)
+                    computed = centered_moving_average(buffers["value", column][lo:n + k], window)[start - lo:]
+                    buffer[start:settled] = computed[:settled - start]
+                    tails[key] = _readonly(computed[settled - start:].astype(buffer.dtype))
+            lineage.length = n + k
+
+        store = SeriesStore.__new__(SeriesStore)
+        store.version = next(_versions)
+        store._attach(buffers, n + k, lineage, tails)
+        store.appended_from = n
+        return store
@@ -0,0 +1,42 @@
+# 앱 전역 설정 (환경 변수로 덮어쓸 수 있음)
+import os
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+
+# 디스크 캐시 위치 (여러 워커 프로세스가 함께 사용)
+CACHE_DIR = Path(os.environ.get("CLIMATE_APP_CACHE_DIR", APP_DIR / ".cache"))
+
+# 저장소에 포함된 기온 CSV (NOAA/GISTEMP 형식)
+GLOBAL_TEMP_CSV = Path(os.environ.get("CLIMATE_APP_TEMP_CSV", APP_DIR / "global_temp.csv"))
+
+# 탭5 퀴즈 문제 은행 (JSON 또는 Parquet)
+QUIZ_BANK_PATH = Path(os.environ.get("CLIMATE_APP_QUIZ_BANK", APP_DIR / "quiz_bank.json"))
+
+# 탭2 분석 결과 저장소 (SQLite, WAL 모드)
+SUBMISSIONS_DB = Path(os.environ.get("CLIMATE_APP_SUBMISSIONS_DB", CACHE_DIR / "submissions.sqlite3"))
+
+# 캐시 정책
+# - 공유 데이터셋: 프로세스 전체에서 복사 없이 공유 (st.cache_resource)
+# - 파생 결과: 입력값 조합마다 따로 저장, 개수와 수명 제한 (st.cache_data)
+DATASET_CACHE_TTL = int(os.environ.get("CLIMATE_APP_DATASET_TTL", 3600))
+DATASET_CACHE_ENTRIES = int(os.environ.get("CLIMATE_APP_DATASET_MAX_ENTRIES", 16))
+DERIVED_CACHE_TTL = int(os.environ.get("CLIMATE_APP_DERIVED_TTL", 600))
+DERIVED_CACHE_ENTRIES = int(os.environ.get("CLIMATE_APP_DERIVED_MAX_ENTRIES", 64))
+FIGURE_CACHE_SIZE = int(os.environ.get("CLIMATE_APP_FIGURE_CACHE_SIZE", 128))
+
+# 사이드바 디버그 패널 (URL에 ?debug=1 을 붙여도 켜짐)
+DEBUG = os.environ.get("CLIMATE_APP_DEBUG", "") == "1"
+
+# 재실행 구간별 시간 측정
+# - PROFILE: 사이드바에 측정 패널 표시 (URL에 ?profile=1 을 붙여도 켜짐)
+# - PROFILE_LOG: 모든 세션의 재실행 기록을 JSON Lines로 남길 파일 (비어 있으면 남기지 않음)
+PROFILE = os.environ.get("CLIMATE_APP_PROFILE", "") == "1"
+PROFILE_LOG = os.environ.get("CLIMATE_APP_PROFILE_LOG", "")
+PROFILE_HISTORY = int(os.environ.get("CLIMATE_APP_PROFILE_HISTORY", 200))
+
+# 탭1 데이터셋 백그라운드 갱신 주기 (초). 원격 요청 여부는 소스별 TTL(data_sources)이 정한다
+REFRESH_INTERVAL = int(os.environ.get("CLIMATE_APP_REFRESH_INTERVAL", 600))
+
+# 미리 계산한 데이터셋·그래프 번들 (python bundle.py build 로 만든다). 디렉터리가 없으면 요청 때 계산한다
+BUNDLE_DIR = Path(os.environ.get("CLIMATE_APP_BUNDLE", APP_DIR / "bundle"))
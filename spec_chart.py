@@ -0,0 +1,46 @@
+# 직렬화해 둔 plotly JSON을 그대로 보내는 st.plotly_chart
+#
+# st.plotly_chart(fig)는 재실행마다 그림을 검증하고 to_json으로 다시 직렬화한다. 그래프 캐시(figure_cache)는
+# 같은 그림의 JSON을 이미 들고 있으므로, 선택(on_select)을 쓰지 않는 차트는 그 JSON을 PlotlyChart 메시지에 바로 담는다.
+# 메시지를 채우는 방식은 Streamlit의 plotly_chart(선택 없음)와 같다. Streamlit 내부 모듈을 쓰므로
+# 버전이 바뀌어 import가 안 되면 st.plotly_chart로 돌아간다.
+import json
+
+import streamlit as st
+
+try:
+    from streamlit.elements.lib.form_utils import current_form_id
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+    from streamlit.elements.lib.utils import compute_and_register_element_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+except ImportError:
+    PlotlyChartProto = None
+
+SELECTION_MODE = ("points", "box", "lasso")  # st.plotly_chart 기본값. 요소 id를 같게 만들려고 넘긴다
+
+
+def plotly_spec_chart(spec, height, dg=None):
+    # spec: plotly 그림 JSON 문자열, height: 픽셀 높이 (figure_cache.CachedFigure.height)
+    dg = dg or st._main
+    if PlotlyChartProto is None:
+        return dg.plotly_chart(json.loads(spec), width="stretch")
+    proto = PlotlyChartProto()
+    proto.theme = "streamlit"
+    proto.form_id = current_form_id(dg)
+    proto.spec = spec
+    proto.config = "{}"
+    proto.id = compute_and_register_element_id(
+        "plotly_chart",
+        user_key=None,
+        key_as_main_identity=False,
+        dg=dg,
+        plotly_spec=proto.spec,
+        plotly_config=proto.config,
+        selection_mode=SELECTION_MODE,
+        is_selection_activated=False,
+        theme="streamlit",
+        width="stretch",
+        height="content",
+        alt=None,
+    )
+    return dg._enqueue("plotly_chart", proto, layout_config=LayoutConfig(width="stretch", height=height))
@@ -1,14 +1,37 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objs as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+from collections import deque
 from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import functools
+import hashlib
+import time
+import uuid
 import warnings
 import random
+import bundle as bundle_loader
+import charts
+import correlation
+import data_sources
+import datasets
+import profiling
+import schemas
+import scoring
+from submission_store import get_store
+from quiz_bank import QuizBank
+from leaderboard import get_leaderboard, post_score
+from regional_stats import get_aggregator
+from refresh_scheduler import get_scheduler, REFRESHING, FAILED
+from recommendations import RULE_SET, PRIORITY_LABELS
+from lazy_imports import lazy_import, import_report, STARTUP_MODE
+from charts import CHART_SPECS
+from downsample import line_trace
+from figure_cache import FIGURE_CACHE, CachedFigure
+from spec_chart import plotly_spec_chart
+from cache_policy import shared_dataset, derived_result, cache_memory_report
+import settings
 warnings.filterwarnings('ignore')
 
 # 페이지 설정
@@ -19,13 +42,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 폰트 설정 시도
-try:
-    font_path = '/fonts/Pretendard-Bold.ttf'
-    fm.fontManager.addfont(font_path)
-    plt.rcParams['font.family'] = 'Pretendard'
-except:
-    pass
+# plotly는 그래프를 실제로 그릴 때 import 한다 (matplotlib을 쓸 때만 폰트를 등록한다: lazy_imports.register_fonts)
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
+plotly_subplots = lazy_import("plotly.subplots")
 
 # CSS 스타일
 st.markdown("""
@@ -87,151 +107,370 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# 재실행 구간 측정: 사이드바 패널을 켰거나 로그 파일을 지정했을 때만 잰다 (꺼져 있으면 profiling.span은 빈 컨텍스트)
+show_profile = settings.PROFILE or st.query_params.get("profile") == "1"
+if show_profile or settings.PROFILE_LOG:
+    profiling.begin_rerun(get_script_run_ctx().session_id)
+else:
+    profiling.stop(get_script_run_ctx().session_id)
+
 # 제목
 st.markdown('<div class="main-header">🌍 빙하 바이러스와 청소년 정신건강 분석 대시보드</div>', unsafe_allow_html=True)
 
-# ==================== 탭 생성 ====================
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 공식 공개 데이터 대시보드",
-    "📈 사용자 데이터 분석",
-    "🧊 빙하 요인 & 청소년 행동",
-    "🧠 팬데믹 기간 청소년 정신건강",
-    "🎮 기후 행동 퀴즈 게임"
-])
+# 다른 탭에 있는 위젯은 그려지지 않는 동안 상태가 지워지므로, 기본값과 현재 값을 세션 상태에 두고 유지한다
+WIDGET_DEFAULTS = {
+    "start_year": 1990, "end_year": 2024,
+    "age": 16, "region": "서울", "family_size": 4, "transport": [], "electricity_usage": 350,
+    "waste_separation": 3, "climate_concern": 7, "action_willingness": 6, "future_anxiety": 5,
+    "corr_climate": "global_temp", "corr_mental": "anxiety_rate", "corr_window": 7, "corr_diff": False,
+    "progress_period": "전체", "quiz_topics": [], "quiz_difficulties": [], "quiz_player": "", "quiz_class": "",
+}
+for key, default in WIDGET_DEFAULTS.items():
+    st.session_state[key] = st.session_state.get(key, default)
+st.session_state.end_year = max(st.session_state.end_year, st.session_state.start_year)
+
+# ==================== 사이드바: 탭1 설정 ====================
+# 사이드바는 어느 탭이 열려 있든 항상 그려서 설정값이 유지되게 한다
+with st.sidebar:
+    st.header("🔧 대시보드 설정")
+    client_range = st.checkbox("브라우저에서 연도 범위 선택", value=False, key="client_range",
+                               help="전체 데이터를 한 번만 보내고 그래프 아래 범위 슬라이더로 연도를 고릅니다. "
+                                    "연도를 바꿔도 서버가 다시 계산하지 않습니다.")
+    if client_range:
+        # 처음 보이는 범위만 정하고, 이후 범위 조정은 브라우저에서 처리한다
+        start_year, end_year = st.session_state.start_year, st.session_state.end_year
+    else:
+        start_year = st.slider("시작 연도", 1880, 2023, key="start_year")
+        end_year = st.slider("종료 연도", start_year, 2024, key="end_year")
+    smoothing = st.checkbox("데이터 스무딩 적용", value=True)
+    window_size = st.slider("스무딩 윈도우 크기", 3, 10, 5) if smoothing else 5
+    show_map = st.checkbox("지역별 온도 변화 지도 표시", value=True)
+
+def current_user_id():
+    # 로그인이 없으므로 주소창의 ?uid=... 로 사용자를 구분한다 (같은 주소로 다시 오면 기록이 이어짐)
+    if "uid" not in st.query_params:
+        st.query_params["uid"] = uuid.uuid4().hex[:12]
+    return st.query_params["uid"]
+
+def profile_history():
+    return st.session_state.setdefault("profile_history", deque(maxlen=settings.PROFILE_HISTORY))
+
+
+def profile_log():
+    return profiling.get_log(settings.PROFILE_LOG) if settings.PROFILE_LOG else None
+
+
+def profiled_fragment(kind):
+    # fragment만 다시 실행될 때(퀴즈 답하기, 탭2 위젯 조작)도 하나의 재실행으로 기록한다
+    def decorate(render):
+        @functools.wraps(render)
+        def wrapper():
+            with profiling.fragment_rerun(kind, profile_history(), profile_log()):
+                render()
+        return wrapper
+    return decorate
+
+
+# 그림 만들기(.plot)와 직렬화·전송(.serialize)을 따로 잰다
+# 캐시한 그림은 캐시가 들고 있는 JSON을 그대로 보내므로, 직렬화는 캐시에 처음 넣을 때 한 번만 일어난다
+def cached_figure(stage, key, build):
+    with profiling.span(f"{stage}.plot"):
+        return FIGURE_CACHE.get_entry(key, build)
+
+
+def show_chart(stage, fig):
+    with profiling.span(f"{stage}.serialize"):
+        if isinstance(fig, CachedFigure):
+            plotly_spec_chart(fig.spec, fig.height)
+        else:
+            st.plotly_chart(fig, width="stretch")
+
+# ==================== 데이터 로딩 ====================
+# 원본 데이터는 시계열 저장소(load_series_store)를 만들 때만 읽으므로 따로 캐시하지 않는다
+# 저장소는 refresh_scheduler가 들고 있다가 원본이 바뀌면 백그라운드에서 새로 만들어 바꿔 끼운다
+# 빌드해 둔 번들(bundle.py)이 있으면 거기서 시작하므로 첫 요청도 계산 없이 보여 준다
+@shared_dataset
+def load_bundle():
+    bundle = bundle_loader.load_bundle(settings.BUNDLE_DIR)
+    if bundle is not None:
+        for key, spec in bundle.figures.items():
+            FIGURE_CACHE.preload(key, spec)
+    return bundle
+
+
+@shared_dataset
+def generate_regional_temp_data():
+    bundle = load_bundle()
+    return bundle.tables['regional'] if bundle is not None else datasets.regional_temp_data()
+
+
+@shared_dataset
+def load_glacier_factors():
+    bundle = load_bundle()
+    return bundle.tables['factors'] if bundle is not None else datasets.glacier_factors()
+
+
+def build_regional_map():
+    return charts.regional_map(generate_regional_temp_data())
+
+
+def carry_over_figures(name, old, new):
+    # 관측을 덧붙인 저장소(new)로 바뀔 때: 보이는 구간의 값이 그대로인 시계열 그림은 새 버전 키로 옮기고,
+    # 그 데이터셋의 끝부분을 보여 주던 그림과 모든 저장소를 함께 쓰는 그림(연결 그래프, 상관 분석)만 지운다
+    def rekey(key):
+        if key[0] == 'series' and key[1:3] == (name, old.version):
+            _, _, _, start_year, end_year, window = key
+            if new.bounds(start_year, end_year)[1] <= new.stable_length(window):
+                return ('series', name, new.version, start_year, end_year, window)
+            return None
+        if key[0] in ('linked', 'corr_heatmap', 'corr_lag', 'corr_rolling') and old.version in key[1]:
+            return None
+        return key
+    return FIGURE_CACHE.remap(rekey)
+
+
+def append_series_store(name, store):
+    new = datasets.update_series_store(name, store)
+    if new is not None and new is not store:
+        carry_over_figures(name, store, new)
+    return new
+
+
+def load_series_store(name):
+    # 재실행은 마지막 정상 저장소를 바로 받는다. 갱신은 백그라운드 스레드가 한다
+    # 원본 뒤에 관측만 붙었으면 새 행만 계산해 덧붙이고(append_series_store), 아니면 처음부터 다시 만든다
+    scheduler = get_scheduler()
+    scheduler.register(name, lambda: datasets.snapshot_token(name), lambda: datasets.build_series_store(name),
+                       lambda store: append_series_store(name, store))
+    bundle = load_bundle()
+    if bundle is not None and name in bundle.series:
+        scheduler.seed(name, bundle.series[name], bundle.tokens[name])
+    return scheduler.get(name)
+
+
+def format_age(seconds):
+    if seconds < 90:
+        return "방금"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f}분 전"
+    if seconds < 36 * 3600:
+        return f"{seconds / 3600:.0f}시간 전"
+    return f"{seconds / 86400:.0f}일 전"
+
+
+def render_refresh_status():
+    # 데이터셋별 갱신 상태와 데이터 나이 ('📚 데이터 출처' 옆)
+    scheduler = get_scheduler()
+    now = time.time()
+    lines = []
+    for name, spec in CHART_SPECS.items():
+        status = scheduler.status(name)
+        if status.get("loaded_at") is None:
+            continue
+        info = data_sources.snapshot_info(datasets.SERIES_SOURCES[name][2])
+        if info["has_snapshot"] and info.get("fetched_at"):
+            age = f"원격 데이터 {format_age(now - info['fetched_at'])} 받음"
+        else:
+            age = f"저장된 예시 데이터 · {format_age(now - status['loaded_at'])} 불러옴"
+        if status["state"] == REFRESHING:
+            state = "🔄 갱신 중"
+        elif status["state"] == FAILED or (info.get("failed_at") or 0) > (info.get("validated_at") or 0):
+            state = "⚠️ 갱신 실패, 마지막 정상 데이터 사용"
+        else:
+            state = "✅ 최신"
+        lines.append(f"- **{spec['name']}**: {state} · {age}")
+    if lines:
+        st.markdown("**🔄 데이터 갱신 상태**\n" + "\n".join(lines))
+        st.caption(f"{scheduler.interval // 60}분마다 백그라운드에서 확인하고, 바뀐 데이터만 새로 반영해요.")
+
+
+# 상관 분석에 쓰는 지표 (열 이름 -> (시계열 저장소, 표시 이름))
+CORRELATION_SERIES = {
+    'global_temp': ('temp', '지구 평균 온도'),
+    'temp_anomaly': ('temp', '온도 편차'),
+    'mass_balance': ('glacier', '빙하 질량'),
+    'annual_loss': ('glacier', '연간 빙하 손실'),
+    'anxiety_rate': ('mental', '청소년 불안감'),
+    'depression_rate': ('mental', '청소년 우울감'),
+}
+CLIMATE_INDICATORS = ['global_temp', 'temp_anomaly', 'mass_balance', 'annual_loss']
+MENTAL_INDICATORS = ['anxiety_rate', 'depression_rate']
+MAX_LAG = 5
+
+
+@derived_result
+def analyze_correlations(versions, start_year, end_year, window, climate_column, mental_column, differenced):
+    # versions는 캐시 키용 (저장소가 새로 만들어지면 다시 계산)
+    series = {}
+    for column, (name, _) in CORRELATION_SERIES.items():
+        store = load_series_store(name)
+        series[column] = (store.years, store.values[column])
+    years, matrix = correlation.align_on_year(series, start_year, end_year)
+    if differenced:
+        # 추세가 같은 두 지표는 상관이 높게 나오기 쉬워 전년 대비 변화량으로도 볼 수 있게 한다
+        matrix = np.vstack([np.full((1, matrix.shape[1]), np.nan), np.diff(matrix, axis=0)])
+    columns = list(CORRELATION_SERIES)
+    x = matrix[:, columns.index(climate_column)]
+    y = matrix[:, columns.index(mental_column)]
+    lags, lag_r = correlation.lagged_correlation(x, y, MAX_LAG)
+    lag_low, lag_high = correlation.lagged_bootstrap_ci(x, y, lags)
+    r, low, high, n = correlation.bootstrap_ci(x, y)
+    return {
+        'matrix': pd.DataFrame(correlation.correlation_matrix(matrix),
+                               index=[label for _, label in CORRELATION_SERIES.values()],
+                               columns=[label for _, label in CORRELATION_SERIES.values()]),
+        'lags': pd.DataFrame({'lag': lags, 'r': lag_r, 'low': lag_low, 'high': lag_high}),
+        'rolling': pd.DataFrame({'year': years, 'r': correlation.rolling_correlation(x, y, window)}),
+        'summary': {'r': r, 'low': low, 'high': high, 'n': n},
+    }
+
 
 # ==================== 탭1: 공식 공개 데이터 ====================
-with tab1:
+def render_correlation_section(stores):
+    st.markdown('<div class="sub-header">🔗 기후 지표와 청소년 정신건강의 상관관계</div>', unsafe_allow_html=True)
+    labels = {column: label for column, (_, label) in CORRELATION_SERIES.items()}
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    climate_column = col1.selectbox("기후 지표", CLIMATE_INDICATORS, format_func=labels.get, key="corr_climate")
+    mental_column = col2.selectbox("정신건강 지표", MENTAL_INDICATORS, format_func=labels.get, key="corr_mental")
+    corr_window = col3.slider("이동 상관 창 크기 (년)", 5, 15, key="corr_window")
+    differenced = col4.checkbox("전년 대비 변화량", key="corr_diff")
+
+    range_end = min(end_year, datetime.now().year)
+    versions = tuple(stores[name].version for name in CHART_SPECS)
+    params = (versions, start_year, range_end, corr_window, climate_column, mental_column, differenced)
+    with profiling.span("tab1.correlation"):
+        result = analyze_correlations(*params)
+    summary = result['summary']
+
+    if summary['n'] < correlation.MIN_OVERLAP:
+        st.info(f"선택한 기간({start_year}~{range_end})에 두 지표가 함께 있는 연도가 {summary['n']}개뿐이라 "
+                f"상관을 계산할 수 없어요. 두 지표가 {correlation.MIN_OVERLAP}년 이상 겹치도록 기간을 넓혀 보세요.")
+    else:
+        st.metric(f"{labels[climate_column]} ↔ {labels[mental_column]} 상관계수", f"{summary['r']:.2f}",
+                  help="블록 부트스트랩 10,000회로 구한 95% 신뢰구간입니다.")
+        st.caption(f"95% 신뢰구간 [{summary['low']:.2f}, {summary['high']:.2f}] · {summary['n']}개 연도 기준 · "
+                   "상관관계는 인과관계를 뜻하지 않아요.")
+
+    def build_heatmap():
+        fig = px.imshow(result['matrix'], zmin=-1, zmax=1, color_continuous_scale='RdBu_r', text_auto='.2f',
+                        title='지표 간 상관행렬')
+        fig.update_layout(height=450)
+        return fig
+
+    def build_lag_plot():
+        lags = result['lags']
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=np.concatenate([lags['lag'], lags['lag'][::-1]]),
+                                 y=np.concatenate([lags['high'], lags['low'][::-1]]),
+                                 fill='toself', fillcolor='rgba(52, 152, 219, 0.2)', line=dict(width=0),
+                                 hoverinfo='skip', name='95% 신뢰구간'))
+        fig.add_trace(go.Scatter(x=lags['lag'], y=lags['r'], mode='lines+markers', name='상관계수',
+                                 line=dict(color='#3498DB', width=3)))
+        fig.update_layout(title='지연 상관 (k > 0이면 기후 지표가 k년 앞섬)', xaxis_title='지연 k (년)',
+                          yaxis=dict(title='상관계수', range=[-1.05, 1.05]), height=450)
+        return fig
+
+    def build_rolling_plot():
+        rolling = result['rolling']
+        fig = go.Figure()
+        fig.add_trace(line_trace(rolling['year'], rolling['r'], name='이동 상관', line=dict(color='#9B59B6', width=3)))
+        fig.update_layout(title=f'{corr_window}년 이동 상관', xaxis_title='연도',
+                          yaxis=dict(title='상관계수', range=[-1.05, 1.05]), height=350)
+        return fig
+
+    col1, col2 = st.columns(2)
+    with col1:
+        show_chart('tab1', cached_figure('tab1', ('corr_heatmap', *params), build_heatmap))
+    with col2:
+        show_chart('tab1', cached_figure('tab1', ('corr_lag', *params), build_lag_plot))
+    show_chart('tab1', cached_figure('tab1', ('corr_rolling', *params), build_rolling_plot))
+
+
+def render_official_data_tab():
     st.markdown('<div class="sub-header">글로벌 기후 데이터와 청소년 정신건강 상관관계</div>', unsafe_allow_html=True)
     
-    # 사이드바 설정
-    with st.sidebar:
-        st.header("🔧 대시보드 설정")
-        start_year = st.slider("시작 연도", 1880, 2023, 1990)
-        end_year = st.slider("종료 연도", start_year, 2024, 2024)
-        smoothing = st.checkbox("데이터 스무딩 적용", value=True)
-        window_size = st.slider("스무딩 윈도우 크기", 3, 10, 5) if smoothing else 5
-        show_map = st.checkbox("지역별 온도 변화 지도 표시", value=True)
-    
-    @st.cache_data
-    def fetch_noaa_temperature_data():
-        years = np.arange(1880, 2025)
-        base_temp = 14.0
-        temp_anomaly = np.cumsum(np.random.normal(0.01, 0.05, len(years)))
-        temp_data = pd.DataFrame({
-            'year': years,
-            'global_temp': base_temp + temp_anomaly + np.sin(np.linspace(0, 4*np.pi, len(years))) * 0.2,
-            'temp_anomaly': temp_anomaly
-        })
-        return temp_data
-    
-    @st.cache_data
-    def fetch_glacier_data():
-        years = np.arange(1960, 2025)
-        glacier_mass = -np.cumsum(np.random.exponential(0.5, len(years)))
-        glacier_data = pd.DataFrame({
-            'year': years,
-            'mass_balance': glacier_mass,
-            'annual_loss': -np.random.exponential(0.5, len(years))
-        })
-        return glacier_data
-    
-    @st.cache_data
-    def fetch_mental_health_data():
-        years = np.arange(2010, 2025)
-        anxiety_base = 15
-        anxiety_trend = anxiety_base + np.cumsum(np.random.normal(0.5, 0.3, len(years)))
-        pandemic_effect = np.zeros(len(years))
-        pandemic_years = [2020, 2021, 2022]
-        for i, year in enumerate(years):
-            if year in pandemic_years:
-                pandemic_effect[i] = 5 + np.random.normal(0, 1)
-        mental_data = pd.DataFrame({
-            'year': years,
-            'anxiety_rate': anxiety_trend + pandemic_effect,
-            'depression_rate': (anxiety_trend + pandemic_effect) * 0.8
-        })
-        return mental_data
-    
-    temp_data = fetch_noaa_temperature_data()
-    glacier_data = fetch_glacier_data()
-    mental_data = fetch_mental_health_data()
     today = datetime.now()
     current_year = today.year
-    temp_data = temp_data[temp_data['year'] <= current_year]
-    glacier_data = glacier_data[glacier_data['year'] <= current_year]
-    mental_data = mental_data[mental_data['year'] <= current_year]
-    
-    temp_data_filtered = temp_data[(temp_data['year'] >= start_year) & (temp_data['year'] <= end_year)]
-    glacier_data_filtered = glacier_data[(glacier_data['year'] >= start_year) & (glacier_data['year'] <= end_year)]
-    mental_data_filtered = mental_data[(mental_data['year'] >= start_year) & (mental_data['year'] <= end_year)]
-    
-    if smoothing:
-        temp_data_filtered['global_temp_smooth'] = temp_data_filtered['global_temp'].rolling(window=window_size, center=True).mean()
-        glacier_data_filtered['mass_balance_smooth'] = glacier_data_filtered['mass_balance'].rolling(window=window_size, center=True).mean()
-        mental_data_filtered['anxiety_rate_smooth'] = mental_data_filtered['anxiety_rate'].rolling(window=window_size, center=True).mean()
-    
-    # 그래프들
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        fig_temp = go.Figure()
-        fig_temp.add_trace(go.Scatter(
-            x=temp_data_filtered['year'],
-            y=temp_data_filtered['global_temp_smooth'] if smoothing else temp_data_filtered['global_temp'],
-            mode='lines+markers',
-            name='지구 평균 온도',
-            line=dict(color='#FF6B6B', width=3),
-            marker=dict(size=6)
-        ))
-        fig_temp.update_layout(title='🌡️ 지구 연평균 온도 변화', xaxis_title='연도', yaxis_title='온도 (°C)', height=400)
-        st.plotly_chart(fig_temp, use_container_width=True)
-    
-    with col2:
-        fig_glacier = go.Figure()
-        fig_glacier.add_trace(go.Scatter(
-            x=glacier_data_filtered['year'],
-            y=glacier_data_filtered['mass_balance_smooth'] if smoothing else glacier_data_filtered['mass_balance'],
-            mode='lines+markers',
-            name='빙하 질량',
-            line=dict(color='#4ECDC4', width=3),
-            marker=dict(size=6),
-            fill='tozeroy',
-            fillcolor='rgba(78, 205, 196, 0.2)'
-        ))
-        fig_glacier.update_layout(title='🧊 빙하 질량 변화', xaxis_title='연도', yaxis_title='질량 변화 (Gt)', height=400)
-        st.plotly_chart(fig_glacier, use_container_width=True)
-    
-    with col3:
-        fig_mental = go.Figure()
-        fig_mental.add_trace(go.Scatter(
-            x=mental_data_filtered['year'],
-            y=mental_data_filtered['anxiety_rate_smooth'] if smoothing else mental_data_filtered['anxiety_rate'],
-            mode='lines+markers',
-            name='불안감 비율',
-            line=dict(color='#95E77E', width=3),
-            marker=dict(size=6)
-        ))
-        fig_mental.update_layout(title='😰 청소년 기후 불안감', xaxis_title='연도', yaxis_title='불안감 비율 (%)', height=400)
-        st.plotly_chart(fig_mental, use_container_width=True)
-    
-    if show_map:
-        st.markdown('<div class="sub-header">🗺️ 지역별 온도 변화</div>', unsafe_allow_html=True)
-        @st.cache_data
-        def generate_regional_temp_data():
-            countries = ['United States','China','India','Brazil','Russia','Japan','Germany','United Kingdom','France','Italy',
-                        'Canada','South Korea','Spain','Australia','Mexico','Indonesia','Netherlands','Saudi Arabia','Turkey','Switzerland']
-            lats = [37.09,35.86,20.59,-14.24,61.52,36.20,51.17,55.38,46.23,41.87,56.13,37.57,40.46,-25.27,23.63,-0.79,52.13,23.89,38.96,46.82]
-            lons = [-95.71,104.20,78.96,-51.93,105.32,138.25,10.45,-3.44,2.21,12.57,-106.35,127.00,-3.74,133.78,-102.55,113.92,5.29,45.08,35.24,8.23]
-            temp_changes = np.random.normal(1.2,0.5,len(countries))
-            return pd.DataFrame({'country':countries,'lat':lats,'lon':lons,'temp_change':temp_changes})
-        regional_data = generate_regional_temp_data()
-        fig_map = px.scatter_geo(regional_data,lat='lat',lon='lon',color='temp_change',hover_name='country',
-                                 size=abs(regional_data['temp_change'])*20,color_continuous_scale='RdBu_r',
-                                 color_continuous_midpoint=1.2,labels={'temp_change':'온도 변화 (°C)'},
-                                 title='지역별 평균 온도 변화 (1990-2024)')
-        fig_map.update_layout(geo=dict(showframe=False,showcoastlines=True,projection_type='natural earth'),height=500)
-        st.plotly_chart(fig_map, use_container_width=True)
+    range_end = min(end_year, current_year)
+    window = window_size if smoothing else None
+
+    def render_series_chart(name, store):
+        spec = CHART_SPECS[name]
+
+        # 연도 구간은 복사 없는 슬라이스라 그림이 캐시에 있어도 먼저 잘라 둔다
+        with profiling.span('tab1.filter'):
+            years, values = store.view(start_year, range_end, spec['column'], window)
+
+        def build():
+            return charts.series_figure(name, years, values)
+
+        # bundle.series_figure_key와 같은 키 (번들에 기본 사이드바 값의 그림이 들어 있다)
+        show_chart('tab1', cached_figure('tab1', ('series', name, store.version, start_year, range_end, window), build))
+
+    def render_linked_charts(stores):
+        # 세 그래프가 x축 하나를 공유하므로, 아래 범위 슬라이더를 움직이면 브라우저에서 함께 바뀐다
+        with profiling.span('tab1.filter'):
+            views = {name: stores[name].view(stores[name].years[0], current_year, spec['column'], window)
+                     for name, spec in CHART_SPECS.items()}
+
+        def build():
+            fig = plotly_subplots.make_subplots(rows=len(CHART_SPECS), cols=1, shared_xaxes=True, vertical_spacing=0.06,
+                                                subplot_titles=[spec['title'] for spec in CHART_SPECS.values()])
+            for row, (name, spec) in enumerate(CHART_SPECS.items(), start=1):
+                years, values = views[name]
+                fig.add_trace(line_trace(years, values, pixel_width=None, name=spec['name'], **spec['trace']), row=row, col=1)
+                fig.update_yaxes(title_text=spec['yaxis_title'], row=row, col=1)
+            fig.update_xaxes(range=[start_year, range_end])
+            fig.update_xaxes(rangeslider=dict(visible=True, thickness=0.05), title_text='연도', row=len(CHART_SPECS), col=1)
+            fig.update_layout(height=900, showlegend=False, uirevision='client-range')
+            return fig
+
+        versions = tuple(stores[name].version for name in CHART_SPECS)
+        show_chart('tab1', cached_figure('tab1', ('linked', versions, start_year, range_end, current_year, window), build))
+
+    # 그래프들: 자리를 먼저 잡아 두고, 데이터가 도착하는 순서대로 각 그래프를 그린다
+    if client_range:
+        placeholders = {'linked': st.empty()}
+        placeholders['linked'].info("⏳ 데이터를 불러오는 중...")
+    else:
+        placeholders = {}
+        for name, col in zip(CHART_SPECS, st.columns(len(CHART_SPECS))):
+            with col:
+                placeholders[name] = st.empty()
+                placeholders[name].info("⏳ 데이터를 불러오는 중...")
+
+    # 작업 스레드에서도 st.cache_data가 동작하도록 현재 세션의 실행 컨텍스트를 붙여 준다
+    with ThreadPoolExecutor(max_workers=len(CHART_SPECS), initializer=add_script_run_ctx,
+                            initargs=(None, get_script_run_ctx())) as executor:
+        futures = {executor.submit(load_series_store, name): name for name in CHART_SPECS}
+
+        # 지도는 원격 데이터와 무관하므로 로딩을 기다리지 않는다
+        if show_map:
+            st.markdown('<div class="sub-header">🗺️ 지역별 온도 변화</div>', unsafe_allow_html=True)
+            show_chart('tab1', cached_figure('tab1', ('map',), build_regional_map))
+
+        stores = {}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                stores[name] = future.result()
+            except Exception as exc:
+                with placeholders.get(name, placeholders.get('linked')).container():
+                    st.error(f"데이터를 불러오지 못했습니다: {exc}")
+                continue
+            if not client_range:
+                with placeholders[name].container():
+                    render_series_chart(name, stores[name])
+
+        if client_range and len(stores) == len(CHART_SPECS):
+            with placeholders['linked'].container():
+                render_linked_charts(stores)
+
+    if len(stores) == len(CHART_SPECS):
+        render_correlation_section(stores)
     
-    st.markdown("""
+    col_sources, col_status = st.columns([3, 2])
+    col_sources.markdown("""
     <div class="data-source">
     <h4>📚 데이터 출처</h4>
     <ul>
@@ -242,12 +481,180 @@ with tab1:
     <li>📊 기후 지표: <a href="https://www.climate.gov/" target="_blank">NOAA Climate.gov</a></li>
     <li>📈 해빙 데이터: <a href="https://nsidc.org/" target="_blank">NSIDC</a></li>
     </ul>
-    <p><em>* API 연결 실패 시 예시 데이터가 표시됩니다.</em></p>
+    <p><em>* API 연결 실패 시 마지막으로 받은 데이터가, 받은 적이 없으면 예시 데이터가 표시됩니다.</em></p>
     </div>
     """, unsafe_allow_html=True)
+    with col_status:
+        render_refresh_status()
 
 # ==================== 탭2: 사용자 데이터 분석 ====================
-with tab2:
+def render_batch_analysis():
+    # 학급·학년 단위로 업로드한 설문 응답을 한꺼번에 채점
+    st.markdown("---")
+    with st.expander("🏫 학급·학년 단위 일괄 분석", expanded=False):
+        st.caption("탭 위쪽 입력 항목과 같은 열(age, region, family_size, transport, electricity_usage, "
+                   "waste_separation, climate_concern, action_willingness, future_anxiety)을 가진 "
+                   "CSV 또는 Parquet 파일을 올려 주세요. 교통수단은 '대중교통;자전거'처럼 ;로 구분합니다.")
+        st.download_button("📄 양식 내려받기", scoring.survey_template().to_csv(index=False).encode("utf-8-sig"),
+                           file_name="climate_survey_template.csv", mime="text/csv")
+        uploaded = st.file_uploader("설문 응답 파일", type=["csv", "parquet"], key="batch_upload")
+        if uploaded is None:
+            return
+
+        data = uploaded.getvalue()
+        upload_key = (uploaded.name, hashlib.sha1(data).hexdigest())
+        results = st.session_state.get("batch_results")
+        if results is None or results[0] != upload_key:
+            progress = st.progress(0.0, text="응답을 채점하는 중...")
+            preview = st.empty()
+            chunks = []
+            scored_rows = 0
+            try:
+                total_rows = max(scoring.count_rows(data, uploaded.name), 1)
+                for chunk in profiling.iter_spans(scoring.iter_survey_chunks(data, uploaded.name), "tab2.batch_scoring"):
+                    chunks.append(chunk)
+                    scored_rows += len(chunk)
+                    progress.progress(min(scored_rows / total_rows, 1.0),
+                                      text=f"{scored_rows:,} / {total_rows:,}명 채점 완료")
+                    preview.dataframe(chunk.head(20), width="stretch")
+            except (scoring.SurveyFormatError, ValueError) as error:
+                progress.empty()
+                preview.empty()
+                st.error(f"파일을 읽을 수 없습니다: {error}")
+                return
+            progress.empty()
+            preview.empty()
+            scored = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+            rule_counts = None
+            if not scored.empty:
+                with profiling.span("tab2.recommendations"):
+                    rule_mask = RULE_SET.evaluate(scored)
+                    scored["fired_rules"] = RULE_SET.fired_ids(rule_mask)
+                    scored["potential_savings"] = RULE_SET.potential_savings(rule_mask)
+                    rule_counts = RULE_SET.counts(rule_mask)
+                # 청크마다 지역 범주가 달라 합치면 문자열 열로 돌아가므로 다시 맞춘다
+                scored = schemas.apply("survey", scored)
+            results = (upload_key, scored, rule_counts)
+            st.session_state["batch_results"] = results
+        _, scored, rule_counts = results
+
+        if scored.empty:
+            st.warning("응답이 없는 파일입니다.")
+            return
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("👥 응답 수", f"{len(scored):,}명")
+        col2.metric("🌡️ 평균 탄소 발자국", f"{scored['total_carbon'].mean():.1f} kg CO2")
+        col3.metric("😰 평균 기후 스트레스", f"{scored['climate_stress'].mean():.1f}/10")
+        col4.metric("⚡ 행동 의지 갭 2점 초과", f"{(scored['action_gap'] > 2).mean() * 100:.0f}%")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            with profiling.span("tab2.plot"):
+                fig_carbon = px.histogram(scored, x="total_carbon", nbins=30, title="월간 탄소 발자국 분포",
+                                          labels={"total_carbon": "탄소 발자국 (kg CO2)"})
+                fig_carbon.update_layout(height=350, yaxis_title="학생 수")
+            show_chart("tab2", fig_carbon)
+        with col2:
+            with profiling.span("tab2.plot"):
+                fig_stress = px.histogram(scored, x="climate_stress", nbins=19, title="기후 스트레스 지수 분포",
+                                          labels={"climate_stress": "기후 스트레스 지수"})
+                fig_stress.update_layout(height=350, yaxis_title="학생 수")
+            show_chart("tab2", fig_stress)
+
+        # 규칙별 해당 인원: 학급·학년에서 가장 필요한 행동
+        st.markdown("#### 🎯 우리 반에 가장 필요한 기후 행동")
+        needed = rule_counts[rule_counts["count"] < len(scored)].head(5)
+        st.dataframe(pd.DataFrame({
+            "추천 행동": needed["action"],
+            "우선순위": needed["priority"].map(PRIORITY_LABELS),
+            "해당 학생 수": needed["count"],
+            "비율(%)": (needed["share"] * 100).round(1),
+        }), hide_index=True, width="stretch")
+        st.caption("모든 학생에게 공통으로 추천되는 행동은 제외했습니다. "
+                   f"추천대로 실천하면 학생 1명당 월 평균 {scored['potential_savings'].mean():.0f}kg CO2를 줄일 수 있어요.")
+
+        st.dataframe(scored.head(1000), width="stretch")
+        if len(scored) > 1000:
+            st.caption(f"처음 1,000명만 표시합니다. 전체 {len(scored):,}명의 결과는 아래에서 내려받으세요.")
+        st.download_button("💾 채점 결과 내려받기 (CSV)", scored.to_csv(index=False).encode("utf-8-sig"),
+                           file_name="climate_survey_scores.csv", mime="text/csv")
+
+
+PROGRESS_PERIODS = {"최근 7일": 7, "최근 30일": 30, "최근 90일": 90, "전체": None}
+PROGRESS_BUCKET = 3600  # 기간 시작을 맞추는 단위(초)
+
+# 30일 기후 행동 계획: 목표 12개를 체크 여부 비트 마스크 하나로 저장한다 (week_idx * 3 + action_idx 번째 비트)
+PLAN_ID = "30day-basic"
+ACTION_PLAN = {
+    "1주차 🌱 기초 다지기": ["대중교통 3회 이상 이용하기", "전기 절약 실천하기 (플러그 뽑기)", "분리수거 완벽하게 실천하기"],
+    "2주차 🤝 소통하기": ["친구와 환경 이야기 나누기", "일회용품 사용 줄이기", "에너지 절약형 가전제품 사용하기"],
+    "3주차 🌍 확장하기": ["환경 동아리 활동에 참여하기", "지역 환경 캠페인 찾아보기", "가족과 기후 변화 토론하기"],
+    "4주차 🎯 도전하기": ["친구들과 기후 행동 챌린지하기", "환경 다큐멘터리 시청하기", "다음 달 실천 계획 세우기"]
+}
+PLAN_SIZE = sum(len(actions) for actions in ACTION_PLAN.values())
+
+
+def plan_key(bit):
+    return f"plan_{PLAN_ID}_{bit}"
+
+
+def toggle_plan_item(bit):
+    # 체크박스 하나가 바뀌면 그 비트만 저장소에 알린다 (저장은 잠시 모았다가 한 번에)
+    flag = 1 << bit
+    if st.session_state[plan_key(bit)]:
+        st.session_state.plan_mask |= flag
+        get_store().update_plan(current_user_id(), PLAN_ID, set_bits=flag)
+    else:
+        st.session_state.plan_mask &= ~flag
+        get_store().update_plan(current_user_id(), PLAN_ID, clear_bits=flag)
+
+
+def render_action_plan():
+    st.markdown("---")
+    st.markdown("### 📅 30일 기후 행동 계획")
+    st.markdown("**체계적인 실천을 위한 주차별 목표를 설정해보세요!**")
+    st.markdown("---")
+
+    # 세션에는 마스크 하나만 두고, 탭을 옮겨 지워진 체크박스 상태는 마스크에서 다시 채운다
+    if st.session_state.get("plan_user") != current_user_id():
+        st.session_state.plan_user = current_user_id()
+        st.session_state.plan_mask = get_store().plan_mask(current_user_id(), PLAN_ID)
+    mask = st.session_state.plan_mask
+    for bit in range(PLAN_SIZE):
+        if plan_key(bit) not in st.session_state:
+            st.session_state[plan_key(bit)] = bool(mask >> bit & 1)
+
+    done = bin(mask).count("1")
+    st.progress(done / PLAN_SIZE, text=f"{PLAN_SIZE}개 목표 중 {done}개 달성")
+
+    col1, col2 = st.columns(2)
+    bit = 0
+    for idx, (week, actions) in enumerate(ACTION_PLAN.items()):
+        target_col = col1 if idx % 2 == 0 else col2
+
+        with target_col:
+            st.markdown(f"#### {week}")
+            st.markdown("**이번 주 실천 목표:**")
+
+            for action_idx, action in enumerate(actions):
+                st.checkbox(
+                    action,
+                    key=plan_key(bit),
+                    on_change=toggle_plan_item,
+                    args=(bit,),
+                    help=f"{week}의 {action_idx+1}번째 목표입니다."
+                )
+                bit += 1
+
+            st.markdown("")  # 공백 추가
+            if idx < len(ACTION_PLAN) - 1:  # 마지막 항목이 아닐 때만 구분선 추가
+                st.markdown("---")
+
+
+@st.fragment
+@profiled_fragment("tab2")
+def render_user_analysis_tab():
     st.markdown('<div class="sub-header">📈 사용자 맞춤형 기후 영향 분석</div>', unsafe_allow_html=True)
     
     # 사용자 입력 섹션
@@ -257,32 +664,35 @@ with tab2:
     
     with col1:
         st.markdown("#### 🏠 개인 정보")
-        age = st.slider("나이", 13, 19, 16)
-        region = st.selectbox("거주 지역", ["서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종", "경기", "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주"])
-        family_size = st.slider("가족 구성원 수", 2, 8, 4)
+        age = st.slider("나이", 13, 19, key="age")
+        region = st.selectbox("거주 지역", scoring.REGIONS, key="region")
+        family_size = st.slider("가족 구성원 수", 2, 8, key="family_size")
         
     with col2:
         st.markdown("#### 🚗 생활 패턴")
-        transport = st.multiselect("주로 이용하는 교통수단", ["도보", "자전거", "대중교통", "자가용", "오토바이"])
-        electricity_usage = st.slider("월평균 전기 사용량 (kWh)", 200, 800, 350)
-        waste_separation = st.slider("분리수거 실천도 (1-5점)", 1, 5, 3)
+        transport = st.multiselect("주로 이용하는 교통수단", scoring.TRANSPORT_OPTIONS, key="transport")
+        electricity_usage = st.slider("월평균 전기 사용량 (kWh)", 200, 800, key="electricity_usage")
+        waste_separation = st.slider("분리수거 실천도 (1-5점)", 1, 5, key="waste_separation")
     
     # 기후 인식도 설문
     st.markdown("#### 🌍 기후 변화 인식도")
-    climate_concern = st.slider("기후 변화에 대한 걱정 정도 (1-10점)", 1, 10, 7)
-    action_willingness = st.slider("환경 보호 행동 의지 (1-10점)", 1, 10, 6)
-    future_anxiety = st.slider("미래에 대한 불안감 (1-10점)", 1, 10, 5)
+    climate_concern = st.slider("기후 변화에 대한 걱정 정도 (1-10점)", 1, 10, key="climate_concern")
+    action_willingness = st.slider("환경 보호 행동 의지 (1-10점)", 1, 10, key="action_willingness")
+    future_anxiety = st.slider("미래에 대한 불안감 (1-10점)", 1, 10, key="future_anxiety")
     
     if st.button("📊 내 기후 영향도 분석하기", type="primary"):
-        # 탄소 발자국 계산
-        carbon_transport = len(transport) * 50 if "자가용" in transport else len(transport) * 20
-        carbon_electricity = electricity_usage * 0.5
-        carbon_waste = (5 - waste_separation) * 30
-        total_carbon = carbon_transport + carbon_electricity + carbon_waste
-        
-        # 기후 스트레스 지수 계산
-        climate_stress = (climate_concern + future_anxiety) / 2
-        action_gap = climate_concern - action_willingness
+        # 탄소 발자국·기후 스트레스 지수 계산 (일괄 분석과 같은 계산식)
+        with profiling.span("tab2.scoring"):
+            scored = scoring.score_responses(scoring.one_response(
+                age, region, family_size, transport, electricity_usage, waste_separation,
+                climate_concern, action_willingness, future_anxiety))
+        scores = scored.iloc[0]
+        carbon_transport = scores["carbon_transport"]
+        carbon_electricity = scores["carbon_electricity"]
+        carbon_waste = scores["carbon_waste"]
+        total_carbon = scores["total_carbon"]
+        climate_stress = scores["climate_stress"]
+        action_gap = scores["action_gap"]
         
         # 결과 표시
         st.markdown("---")
@@ -306,115 +716,13 @@ with tab2:
         # 맞춤형 추천
         st.markdown("### 💡 맞춤형 기후 행동 추천")
         
-        # 우선순위별 추천 시스템
-        high_priority = []
-        medium_priority = []
-        low_priority = []
-        
-        # 탄소 발자국 기반 추천
-        if "자가용" in transport:
-            high_priority.append({
-                "action": "🚌 대중교통 또는 자전거 이용하기",
-                "impact": "월 100-150kg CO2 절약",
-                "difficulty": "쉬움",
-                "detail": "가까운 거리는 걷거나 자전거를, 먼 거리는 지하철/버스 이용"
-            })
-        
-        if electricity_usage > 400:
-            high_priority.append({
-                "action": "💡 스마트한 전기 절약",
-                "impact": "월 50-80kg CO2 절약", 
-                "difficulty": "쉬움",
-                "detail": "사용하지 않는 전자제품 플러그 뽑기, LED 전구 사용, 에어컨 적정온도 유지"
-            })
-            
-        if waste_separation < 3:
-            high_priority.append({
-                "action": "♻️ 제대로 된 분리수거와 재활용",
-                "impact": "월 30-50kg CO2 절약",
-                "difficulty": "쉬움", 
-                "detail": "플라스틱 세척 후 분리배출, 종이/캔/병 올바른 분류"
-            })
-        
-        # 정신건강 관련 추천
-        if climate_stress > 7:
-            high_priority.append({
-                "action": "🧘‍♀️ 기후 불안감 완화 활동",
-                "impact": "정신건강 개선",
-                "difficulty": "보통",
-                "detail": "자연에서 시간 보내기, 명상, 요가, 친구들과 감정 나누기"
-            })
-        
-        if action_gap > 3:
-            medium_priority.append({
-                "action": "👥 동료와 함께하는 기후 행동",
-                "impact": "실천률 3배 향상",
-                "difficulty": "보통",
-                "detail": "학교 환경동아리 참여, 친구들과 챌린지, 가족 기후 회의"
-            })
-        
-        # 연령별 맞춤 추천
-        if age <= 15:
-            medium_priority.append({
-                "action": "📚 또래와 함께하는 기후 교육",
-                "impact": "지식 향상 + 네트워크 구축",
-                "difficulty": "쉬움",
-                "detail": "학교 과학시간 연계, 환경 다큐 시청, 기후 관련 도서 읽기"
-            })
-        else:
-            medium_priority.append({
-                "action": "🎯 리더십 발휘하기",
-                "impact": "주변인 5-10명 영향",
-                "difficulty": "어려움",
-                "detail": "환경 동아리 만들기, 캠페인 기획, 지역사회 참여"
-            })
-        
-        # 지역별 맞춤 추천
-        if region in ["서울", "인천", "경기"]:
-            low_priority.append({
-                "action": "🌆 도시형 기후 행동",
-                "impact": "지역 환경 개선",
-                "difficulty": "보통", 
-                "detail": "미세먼지 줄이기, 도시 열섬 완화, 그린 루프 캠페인 참여"
-            })
-        else:
-            low_priority.append({
-                "action": "🌄 지역 특성 맞춤 활동",
-                "impact": "생태계 보호",
-                "difficulty": "보통",
-                "detail": "지역 생태계 보호, 농촌형 재생에너지, 지역 특산물 활용"
-            })
-        
-        # 추가 보편적 추천사항
-        medium_priority.extend([
-            {
-                "action": "🌱 식습관 개선",
-                "impact": "월 20-40kg CO2 절약",
-                "difficulty": "보통",
-                "detail": "로컬 푸드 섭취, 음식물 쓰레기 줄이기, 채식 요리 늘리기"
-            },
-            {
-                "action": "🛍️ 의식적인 소비",
-                "impact": "월 15-30kg CO2 절약",
-                "difficulty": "어려움",
-                "detail": "중고품 활용, 내구재 선택, 불필요한 구매 줄이기"
-            }
-        ])
-        
-        low_priority.extend([
-            {
-                "action": "📱 디지털 탄소발자국 줄이기",
-                "impact": "월 5-15kg CO2 절약", 
-                "difficulty": "쉬움",
-                "detail": "스트리밍 시간 줄이기, 클라우드 저장소 정리, 불필요한 앱 삭제"
-            },
-            {
-                "action": "🏡 가정 내 에너지 효율화",
-                "impact": "월 30-60kg CO2 절약",
-                "difficulty": "어려움",
-                "detail": "단열 개선, 고효율 가전 교체, 태양광 패널 설치 (가족과 상의)"
-            }
-        ])
+        # 우선순위별 추천 (recommendations.RULES 규칙표로 평가)
+        with profiling.span("tab2.recommendations"):
+            rule_mask = RULE_SET.evaluate(scored)
+            fired = RULE_SET.fired(rule_mask, 0)
+        high_priority = [rule for rule in fired if rule["priority"] == "high"]
+        medium_priority = [rule for rule in fired if rule["priority"] == "medium"]
+        low_priority = [rule for rule in fired if rule["priority"] == "low"]
         
         # 우선순위별 표시
         if high_priority:
@@ -476,11 +784,11 @@ with tab2:
         """)
         
         # 실천 동기부여
-        potential_savings = 0
-        if "자가용" in transport: potential_savings += 125
-        if electricity_usage > 400: potential_savings += 65
-        if waste_separation < 3: potential_savings += 40
-        potential_savings += 30  # 기본 개선 가능량
+        potential_savings = int(RULE_SET.potential_savings(rule_mask)[0])
+
+        # 분석 결과 저장 (백그라운드에서 커밋되므로 기다리지 않음)
+        with profiling.span("tab2.store"):
+            get_store().submit(current_user_id(), {**scores.to_dict(), "potential_savings": potential_savings})
         
         st.success(f"""
         🌍 **예상 효과**: 이 추천사항들을 실천하면 **월 약 {potential_savings}kg CO2**를 절약할 수 있어요!  
@@ -490,88 +798,63 @@ with tab2:
         # 지역별 비교 차트
         st.markdown("### 📍 지역별 기후 영향 비교")
         
-        # 가상 지역 데이터
-        regional_data = {
-            "지역": ["서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종"],
-            "평균_탄소발자국": [320, 280, 290, 310, 270, 285, 340, 260],
-            "기후_스트레스": [7.2, 6.8, 6.5, 7.0, 6.3, 6.7, 7.5, 6.0]
-        }
-        df_regional = pd.DataFrame(regional_data)
-        
-        fig_regional = go.Figure()
-        fig_regional.add_trace(go.Bar(
-            name="평균 탄소 발자국",
-            x=df_regional["지역"],
-            y=df_regional["평균_탄소발자국"],
-            yaxis="y",
-            offsetgroup=1,
-            marker_color='#FF6B6B'
-        ))
-        fig_regional.add_trace(go.Bar(
-            name="기후 스트레스 지수",
-            x=df_regional["지역"],
-            y=df_regional["기후_스트레스"],
-            yaxis="y2",
-            offsetgroup=2,
-            marker_color='#4ECDC4'
-        ))
-        
-        # 사용자 데이터 표시
-        if region in df_regional["지역"].values:
-            fig_regional.add_trace(go.Scatter(
-                name="내 데이터",
-                x=[region],
-                y=[total_carbon],
-                mode='markers',
-                marker=dict(size=15, color='red', symbol='star'),
-                yaxis="y"
+        with profiling.span("tab2.regional"):
+            aggregator = get_aggregator()
+            df_regional = aggregator.snapshot()
+
+        def build_regional_chart():
+            hover = "%{x}<br>평균 %{y:.1f}<br>표준편차 %{customdata[0]:.1f}<br>" \
+                    "사분위 %{customdata[1]:.0f} / %{customdata[2]:.0f} / %{customdata[3]:.0f}<br>%{customdata[4]}명<extra></extra>"
+
+            fig_regional = go.Figure()
+            fig_regional.add_trace(go.Bar(
+                name="평균 탄소 발자국",
+                x=df_regional["지역"],
+                y=df_regional["total_carbon_mean"],
+                customdata=df_regional[["total_carbon_std", "total_carbon_p25", "total_carbon_p50",
+                                        "total_carbon_p75", "total_carbon_count"]],
+                hovertemplate=hover,
+                yaxis="y",
+                offsetgroup=1,
+                marker_color='#FF6B6B'
+            ))
+            fig_regional.add_trace(go.Bar(
+                name="기후 스트레스 지수",
+                x=df_regional["지역"],
+                y=df_regional["climate_stress_mean"],
+                customdata=df_regional[["climate_stress_std", "climate_stress_p25", "climate_stress_p50",
+                                        "climate_stress_p75", "climate_stress_count"]],
+                hovertemplate=hover,
+                yaxis="y2",
+                offsetgroup=2,
+                marker_color='#4ECDC4'
             ))
         
-        fig_regional.update_layout(
-            title="지역별 탄소 발자국 및 기후 스트레스 비교",
-            xaxis_title="지역",
-            yaxis=dict(title="탄소 발자국 (kg CO2)", side="left"),
-            yaxis2=dict(title="기후 스트레스 지수", side="right", overlaying="y"),
-            height=400
-        )
-        st.plotly_chart(fig_regional, use_container_width=True)
-        
-        # 개인화된 행동 계획
-        st.markdown("### 📅 30일 기후 행동 계획")
-        st.markdown("**체계적인 실천을 위한 주차별 목표를 설정해보세요!**")
-        st.markdown("---")
-        
-        action_plan = {
-            "1주차 🌱 기초 다지기": ["대중교통 3회 이상 이용하기", "전기 절약 실천하기 (플러그 뽑기)", "분리수거 완벽하게 실천하기"],
-            "2주차 🤝 소통하기": ["친구와 환경 이야기 나누기", "일회용품 사용 줄이기", "에너지 절약형 가전제품 사용하기"],
-            "3주차 🌍 확장하기": ["환경 동아리 활동에 참여하기", "지역 환경 캠페인 찾아보기", "가족과 기후 변화 토론하기"],
-            "4주차 🎯 도전하기": ["친구들과 기후 행동 챌린지하기", "환경 다큐멘터리 시청하기", "다음 달 실천 계획 세우기"]
-        }
-        
-        import time
-        current_time = int(time.time())
-        
-        col1, col2 = st.columns(2)
+
+            fig_regional.update_layout(
+                title="지역별 탄소 발자국 및 기후 스트레스 비교",
+                xaxis_title="지역",
+                xaxis=dict(categoryorder="array", categoryarray=aggregator.regions),
+                yaxis=dict(title="탄소 발자국 (kg CO2)", side="left"),
+                yaxis2=dict(title="기후 스트레스 지수", side="right", overlaying="y", range=[0, 10.5]),
+                height=400
+            )
+            return fig_regional
+
+        # 집계 그림은 모든 사용자가 함께 쓴다. 집계 버전이 키에 들어가므로 제출이 들어오면 새로 만든다
+        fig_regional = cached_figure("tab2", ('regional', aggregator.version), build_regional_chart)
+        # 사용자 데이터(별 표시)는 세션마다 다르므로 캐시한 JSON에 덧붙이기만 한다
+        my_point = {"type": "scatter", "name": "내 데이터", "x": [region], "y": [float(total_carbon)],
+                    "mode": "markers", "marker": {"size": 15, "color": "red", "symbol": "star"}, "yaxis": "y"}
+        show_chart("tab2", fig_regional.with_traces([my_point]))
+        empty_regions = df_regional.loc[df_regional["total_carbon_count"] == 0, "지역"].tolist()
+        st.caption(f"지금까지 저장된 분석 {int(df_regional['total_carbon_count'].sum()):,}건 기준"
+                   + (f" · 아직 기록이 없는 지역: {', '.join(empty_regions)}" if empty_regions else ""))
         
-        for idx, (week, actions) in enumerate(action_plan.items()):
-            target_col = col1 if idx % 2 == 0 else col2
-            
-            with target_col:
-                st.markdown(f"#### {week}")
-                st.markdown("**이번 주 실천 목표:**")
-                
-                for action_idx, action in enumerate(actions):
-                    unique_key = f"plan_{current_time}_{idx}_{action_idx}_{len(action)}"
-                    checkbox_result = st.checkbox(
-                        action, 
-                        key=unique_key,
-                        help=f"{week}의 {action_idx+1}번째 목표입니다."
-                    )
-                    
-                st.markdown("")  # 공백 추가
-                if idx < len(action_plan) - 1:  # 마지막 항목이 아닐 때만 구분선 추가
-                    st.markdown("---")
-    
+    render_action_plan()
+
+    render_batch_analysis()
+
     # 추가 리소스
     st.markdown("---")
     st.markdown("### 📚 더 알아보기")
@@ -606,56 +889,68 @@ with tab2:
     st.markdown("---")
     st.markdown("### 📈 나의 기후 행동 추적")
     
-    # 가상의 사용자 진행도 데이터
-    progress_data = {
-        "월": ["1월", "2월", "3월", "4월", "5월", "6월"],
-        "탄소절약량": [20, 35, 45, 60, 70, 85],
-        "실천점수": [6.2, 6.8, 7.1, 7.5, 8.0, 8.3]
-    }
-    df_progress = pd.DataFrame(progress_data)
-    
-    fig_progress = go.Figure()
-    fig_progress.add_trace(go.Scatter(
-        x=df_progress["월"],
-        y=df_progress["탄소절약량"],
-        mode='lines+markers',
-        name='월별 탄소 절약량 (kg)',
-        line=dict(color='#2ECC71', width=3),
-        marker=dict(size=8)
-    ))
-    
-    fig_progress2 = go.Figure()
-    fig_progress2.add_trace(go.Scatter(
-        x=df_progress["월"],
-        y=df_progress["실천점수"],
-        mode='lines+markers',
-        name='환경 실천 점수',
-        line=dict(color='#3498DB', width=3),
-        marker=dict(size=8)
-    ))
-    
+    period = st.radio("기간", list(PROGRESS_PERIODS), horizontal=True, key="progress_period")
+    days = PROGRESS_PERIODS[period]
+    # 기간 시작을 PROGRESS_BUCKET 단위로 내림해 둔다. 같은 구간이면 기록도 그림 키도 같아서 캐시가 맞는다
+    start = None if days is None else (time.time() - days * 86400) // PROGRESS_BUCKET * PROGRESS_BUCKET
+    with profiling.span("tab2.history"):
+        history = get_store().history(current_user_id(), start=start)
+    if history.empty:
+        st.info("아직 저장된 분석 기록이 없어요. 위의 '📊 내 기후 영향도 분석하기'를 누를 때마다 기록이 쌓입니다.")
+        return
+
+    # 첫 분석 대비 줄어든 탄소 발자국을 절약량으로 본다
+    history["탄소절약량"] = history["total_carbon"].iloc[0] - history["total_carbon"]
+    latest = history["submission_id"].iloc[-1]
+
+    def build_progress_chart():
+        fig_progress = go.Figure()
+        fig_progress.add_trace(go.Scatter(
+            x=history["submitted_at"],
+            y=history["탄소절약량"],
+            mode='lines+markers',
+            name='탄소 절약량 (kg)',
+            line=dict(color='#2ECC71', width=3),
+            marker=dict(size=8)
+        ))
+        fig_progress.update_layout(title="첫 분석 대비 탄소 절약량 추이", height=300)
+        return fig_progress
+
+    def build_score_chart():
+        fig_progress2 = go.Figure()
+        fig_progress2.add_trace(go.Scatter(
+            x=history["submitted_at"],
+            y=history["action_willingness"],
+            mode='lines+markers',
+            name='환경 보호 행동 의지',
+            line=dict(color='#3498DB', width=3),
+            marker=dict(size=8)
+        ))
+        fig_progress2.update_layout(title="환경 보호 행동 의지 변화", height=300, yaxis_range=[0, 10.5])
+        return fig_progress2
+
+    # 사용자의 최신 제출 id가 키에 들어가므로 새로 제출하면 그림도 새로 만든다
+    fig_progress = cached_figure("tab2", ('progress', 'carbon', latest, start), build_progress_chart)
+    fig_progress2 = cached_figure("tab2", ('progress', 'score', latest, start), build_score_chart)
+
     col1, col2 = st.columns(2)
     with col1:
-        fig_progress.update_layout(title="월별 탄소 절약량 추이", height=300)
-        st.plotly_chart(fig_progress, use_container_width=True)
-    
+        show_chart("tab2", fig_progress)
+
     with col2:
-        fig_progress2.update_layout(title="환경 실천 점수 향상", height=300)
-        st.plotly_chart(fig_progress2, use_container_width=True)
+        show_chart("tab2", fig_progress2)
+    st.caption(f"분석 기록 {len(history)}건 · 마지막 분석 {history['submitted_at'].iloc[-1]:%Y-%m-%d %H:%M}")
 
 # ==================== 탭3: 빙하 요인 & 청소년 행동 ====================
-with tab3:
+def render_glacier_factors_tab():
     st.markdown('<div class="sub-header">🧊 빙하가 녹는 주요 요인</div>', unsafe_allow_html=True)
 
-    factors = pd.DataFrame({
-        "요인": ["기후 온난화","산업 배출(온실가스)","해양 온도 상승","검은탄소(매연)","지구 순환 변화","산불 증가","산업 개발/삼림 벌채"],
-        "영향력": [35,20,15,10,10,5,5]
-    })
+    def build_factors_chart():
+        return charts.factors_chart(load_glacier_factors())
 
-    fig_factors = px.pie(factors,names="요인",values="영향력",hole=0.4,
-                         color_discrete_sequence=px.colors.qualitative.Set3)
-    fig_factors.update_layout(title="빙하를 녹이는 주요 요인 비율", font=dict(family="Pretendard"))
-    st.plotly_chart(fig_factors, use_container_width=True)
+    # 고정된 그림이므로 프로세스당 한 번만 만든다
+    fig_factors = cached_figure('tab3', ('factors',), build_factors_chart)
+    show_chart('tab3', fig_factors)
 
     st.info("""
     **설명:**  
@@ -718,111 +1013,182 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
 
+# ==================== 탭4: 팬데믹 기간 청소년 정신건강 ====================
+def render_mental_health_tab():
+    st.markdown('<div class="sub-header">🧠 팬데믹 기간 동안 청소년 정신건강 변화</div>', unsafe_allow_html=True)
+
+    # 고정된 그림이므로 프로세스당 한 번만 만든다 (번들이 있으면 번들의 JSON)
+    fig_mental_health = cached_figure('tab4', ('mental_health',), charts.mental_health_chart)
+    show_chart('tab4', fig_mental_health)
+
+    st.markdown("""
+    팬데믹 기간 동안 청소년들의 정신건강 상태는 크게 악화되었습니다. CDC의 2023년 청소년 위험행동조사에 따르면, 조사에 응답한 고등학생 중 약 40%가 지속적인 슬픔이나 절망감을 경험했으며, 20%는 자살을 심각하게 고려했고, 9.5%는 실제로 자살을 시도한 것으로 나타났습니다.
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+    **주요 요인:**
+    - 사회적 고립: 팬데믹으로 인한 학교 폐쇄와 사회적 거리두기로 인해 청소년들은 친구들과의 대면 상호작용이 줄어들었고, 이로 인해 외로움과 우울감이 증가했습니다.
+    - 가족 문제: 가족 내 갈등이나 경제적 어려움이 청소년들의 정신건강에 부정적인 영향을 미쳤습니다.
+    - 학교 지원 부족: 많은 청소년들이 학교에서 충분한 정신건강 지원을 받지 못하고 있다고 응답했습니다.
+
+    **팬데믹 후 청소년들의 목소리:**
+    팬데믹 이후, 청소년들은 자신들의 정신건강 문제를 해결하기 위한 목소리를 높이고 있습니다. 많은 청소년들이 학교에서의 정신건강 지원 확대와 사회적 고립 해소를 위한 정책적 노력을 요구하고 있습니다.
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+    <div class="data-source">
+    <h4>📚 데이터 출처</h4>
+    <ul>
+    <li>🧠 CDC 2023 청소년 위험행동조사: <a href="https://www.cdc.gov/yrbs/results/2023-yrbs-results.html" target="_blank">CDC 2023 YRBS</a></li>
+    <li>📈 청소년 정신건강 통계: <a href="https://www.aecf.org/blog/youth-mental-health-statistics" target="_blank">Annie E. Casey Foundation</a></li>
+    <li>📊 팬데믹 기간 청소년 정신건강 영향: <a href="https://pmc.ncbi.nlm.nih.gov/articles/PMC11526700/" target="_blank">PMC</a></li>
+    </ul>
+    </div>
+    """, unsafe_allow_html=True)
+
 # ==================== 탭5: 기후 행동 퀴즈 게임 ====================
-with tab5:
+QUIZ_LENGTH = 5
+
+
+@shared_dataset
+def load_quiz_bank():
+    return QuizBank.load(settings.QUIZ_BANK_PATH)
+
+
+def start_quiz():
+    # 선택한 주제·난이도에서 이번 세션에 아직 풀지 않은 문제를 뽑는다. 다 풀었으면 처음부터 다시
+    bank = load_quiz_bank()
+    topics, difficulties = st.session_state.quiz_topics, st.session_state.quiz_difficulties
+    seen = st.session_state.get("quiz_seen", [])
+    with profiling.span("tab5.sample"):
+        quiz_ids = bank.sample(QUIZ_LENGTH, topics, difficulties, exclude=seen)
+        if len(quiz_ids) < QUIZ_LENGTH:
+            seen = []
+            quiz_ids = bank.sample(QUIZ_LENGTH, topics, difficulties)
+    st.session_state.quiz_seen = seen + quiz_ids
+    st.session_state.quiz_ids = quiz_ids
+    st.session_state.quiz_score = 0
+    st.session_state.quiz_answered = []
+    st.session_state.current_quiz = 0
+    st.session_state.pop("quiz_feedback", None)
+
+
+def quiz_player_name():
+    return st.session_state.quiz_player.strip() or f"익명 {current_user_id()[:4]}"
+
+
+def render_leaderboard():
+    st.markdown("### 🏆 리더보드")
+    col1, col2 = st.columns(2)
+    col1.text_input("닉네임", key="quiz_player", max_chars=20, placeholder=quiz_player_name())
+    col2.text_input("학급 코드 (예: 3-2)", key="quiz_class", max_chars=20)
+
+    board = get_leaderboard()
+    class_id = st.session_state.quiz_class.strip()
+    scopes = [("🌏 전체", None)] + ([(f"🏫 {class_id}반", class_id)] if class_id else [])
+    for column, (title, scope) in zip(st.columns(2), scopes):
+        with column:
+            st.markdown(f"**{title} TOP {board.k}**")
+            with profiling.span("tab5.leaderboard"):
+                rows = board.top(scope)
+            if not rows:
+                st.caption("아직 기록이 없어요. 첫 번째 주인공이 되어 보세요!")
+                continue
+            st.dataframe(pd.DataFrame({
+                "순위": range(1, len(rows) + 1),
+                "닉네임": [row["player"] for row in rows],
+                "학급": [row["class_id"] or "-" for row in rows],
+                "점수": [f"{row['score']}/{row['total']}" for row in rows],
+            }), hide_index=True, width="stretch")
+    st.caption(f"게임을 끝내면 최고 점수가 등록되고, 순위표는 {board.interval:.0f}초마다 갱신돼요.")
+
+
+def answer_quiz(choice):
+    with profiling.span("tab5.answer"):
+        question = load_quiz_bank()[st.session_state.quiz_ids[st.session_state.current_quiz]]
+        correct = choice == question["correct"]
+        st.session_state.quiz_score += int(correct)
+        st.session_state.quiz_answered.append(question["id"])
+        st.session_state.current_quiz += 1
+    if st.session_state.current_quiz == len(st.session_state.quiz_ids):
+        # 게임을 끝내면 리더보드에 점수 등록 (저장과 순위 반영은 백그라운드)
+        with profiling.span("tab5.post_score"):
+            post_score(current_user_id(), quiz_player_name(), st.session_state.quiz_class.strip(),
+                       st.session_state.quiz_score, len(st.session_state.quiz_ids))
+    st.session_state.quiz_feedback = {
+        "correct": correct,
+        "answer": f"{chr(65 + question['correct'])}. {question['options'][question['correct']]}",
+        "explanation": question["explanation"],
+    }
+
+@st.fragment
+@profiled_fragment("tab5")
+def render_quiz_tab():
     st.markdown('<div class="sub-header">🎮 기후 행동 퀴즈 게임</div>', unsafe_allow_html=True)
     st.markdown("**아래 퀴즈를 풀며 기후 행동에 대해 더 자세히 알아보세요!**")
 
+    with profiling.span("tab5.bank"):
+        bank = load_quiz_bank()
+    with st.expander("⚙️ 문제 고르기"):
+        col1, col2 = st.columns(2)
+        col1.multiselect("주제", bank.topics, key="quiz_topics", on_change=start_quiz, placeholder="전체")
+        col2.multiselect("난이도", bank.difficulties, key="quiz_difficulties", on_change=start_quiz, placeholder="전체")
+        st.caption(f"문제 은행: {len(bank)}문제 · 한 게임에 {QUIZ_LENGTH}문제씩, 이번 세션에서 푼 문제는 다시 나오지 않아요.")
+
     # 게임 상태 초기화
-    if 'quiz_score' not in st.session_state:
-        st.session_state.quiz_score = 0
-    if 'quiz_answered' not in st.session_state:
-        st.session_state.quiz_answered = []
-    if 'current_quiz' not in st.session_state:
-        st.session_state.current_quiz = 0
-
-    # 퀴즈 데이터
-    quiz_data = [
-        {
-            "question": "🌍 일상생활에서 탄소 발자국을 가장 효과적으로 줄일 수 있는 방법은?",
-            "options": ["에어컨을 항상 가장 낮은 온도로 설정하기", "대중교통이나 자전거 이용하기", "전자제품을 계속 켜두기", "일회용품 많이 사용하기"],
-            "correct": 1,
-            "explanation": "대중교통이나 자전거를 이용하면 개인 차량 사용을 줄여 CO2 배출량을 크게 감소시킬 수 있습니다. 🚌🚲"
-        },
-        {
-            "question": "🔥 빙하가 빠르게 녹는 주요 원인 중 하나인 '검은탄소'란 무엇인가요?",
-            "options": ["석탄 덩어리", "매연과 그을음 입자", "검은색 얼음", "오염된 물"],
-            "correct": 1,
-            "explanation": "검은탄소(매연)는 빙하 표면에 쌓여서 햇빛을 더 많이 흡수하게 만들어 빙하를 더 빠르게 녹게 합니다. ⚫"
-        },
-        {
-            "question": "🌱 청소년이 기후 변화에 대응하기 위해 할 수 있는 가장 중요한 행동은?",
-            "options": ["아무것도 하지 않기", "친구들과 기후 문제에 대해 이야기하고 함께 행동하기", "혼자서만 실천하기", "어른들이 해결하기를 기다리기"],
-            "correct": 1,
-            "explanation": "친구들과 함께 기후 문제를 공유하고 집단 행동을 통해 더 큰 변화를 만들 수 있습니다! 👫🌍"
-        },
-        {
-            "question": "♻️ 재활용을 올바르게 실천하는 방법은?",
-            "options": ["모든 쓰레기를 재활용통에 넣기", "플라스틱을 깨끗이 씻어서 분리배출하기", "재활용 마크만 확인하고 버리기", "종류 상관없이 함께 버리기"],
-            "correct": 1,
-            "explanation": "플라스틱은 깨끗이 씻어서 올바르게 분리배출해야 실제로 재활용될 수 있습니다. 🧼♻️"
-        },
-        {
-            "question": "🌳 삼림 벌채가 기후 변화에 미치는 영향은?",
-            "options": ["기온을 낮춘다", "CO2 흡수량이 줄어들어 온난화가 가속화된다", "빙하가 더 빨리 얼어붙는다", "아무 영향이 없다"],
-            "correct": 1,
-            "explanation": "나무는 CO2를 흡수하는 중요한 역할을 하는데, 삼림이 줄어들면 대기 중 CO2가 증가해 온난화가 가속화됩니다. 🌲💨"
-        }
-    ]
+    if 'quiz_ids' not in st.session_state:
+        start_quiz()
+    quiz_ids = st.session_state.quiz_ids
+    feedback = st.session_state.pop("quiz_feedback", None)
 
     # 점수 표시
     col_score1, col_score2, col_score3 = st.columns([1,2,1])
     with col_score2:
-        st.markdown(f'<div class="score-display">🏆 현재 점수: {st.session_state.quiz_score}/5</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="score-display">🏆 현재 점수: {st.session_state.quiz_score}/{len(quiz_ids)}</div>', unsafe_allow_html=True)
 
     # 게임 리셋 버튼
-    if st.button("🔄 게임 다시 시작", key="reset_quiz"):
-        st.session_state.quiz_score = 0
-        st.session_state.quiz_answered = []
-        st.session_state.current_quiz = 0
-        st.rerun()
+    st.button("🔄 게임 다시 시작", key="reset_quiz", on_click=start_quiz)
+
+    # 직전 답의 채점 결과
+    if feedback is not None:
+        if feedback["correct"]:
+            st.success(f"✅ 정답입니다! {feedback['explanation']}")
+        else:
+            st.error(f"❌ 틀렸습니다. 정답: {feedback['answer']}")
+            st.info(feedback["explanation"])
+
+    if not quiz_ids:
+        st.warning("선택한 주제와 난이도에 맞는 문제가 없어요. 조건을 바꿔 보세요.")
 
     # 퀴즈 표시
-    if st.session_state.current_quiz < len(quiz_data):
-        current_q = quiz_data[st.session_state.current_quiz]
+    elif st.session_state.current_quiz < len(quiz_ids):
+        current_q = bank[quiz_ids[st.session_state.current_quiz]]
         
         st.markdown(f"""
         <div class="game-card">
-        <h3>질문 {st.session_state.current_quiz + 1}/5</h3>
+        <h3>질문 {st.session_state.current_quiz + 1}/{len(quiz_ids)}</h3>
         <h4>{current_q['question']}</h4>
         </div>
         """, unsafe_allow_html=True)
         
-        # 선택지 버튼들
+        # 선택지 버튼들: 누르면 콜백에서 채점하고 다음 문제로 넘어가므로 재실행은 한 번뿐이다
         cols = st.columns(2)
         for i, option in enumerate(current_q['options']):
             col_idx = i % 2
             with cols[col_idx]:
-                if st.button(f"{chr(65+i)}. {option}", key=f"option_{st.session_state.current_quiz}_{i}", 
-                           use_container_width=True):
-                    # 정답 체크
-                    if i == current_q['correct']:
-                        st.session_state.quiz_score += 1
-                        st.success(f"✅ 정답입니다! {current_q['explanation']}")
-                    else:
-                        correct_answer = current_q['options'][current_q['correct']]
-                        st.error(f"❌ 틀렸습니다. 정답: {chr(65+current_q['correct'])}. {correct_answer}")
-                        st.info(current_q['explanation'])
-                    
-                    st.session_state.quiz_answered.append(st.session_state.current_quiz)
-                    st.session_state.current_quiz += 1
-                    
-                    # 다음 문제로 이동
-                    if st.session_state.current_quiz < len(quiz_data):
-                        if st.button("➡️ 다음 문제", key="next_question"):
-                            st.rerun()
-                        # 자동으로 다음 문제로 이동
-                        st.rerun()
+                st.button(f"{chr(65+i)}. {option}", key=f"option_{st.session_state.current_quiz}_{i}",
+                          width="stretch", on_click=answer_quiz, args=(i,))
     
     else:
         # 게임 완료
         final_score = st.session_state.quiz_score
-        st.balloons()
+        if feedback is not None:  # 마지막 문제를 막 풀었을 때만
+            st.balloons()
         
-        if final_score == 5:
+        if final_score == len(quiz_ids):
             st.success("🎉 완벽합니다! 기후 행동 전문가가 되셨네요!")
             st.markdown("🏅 **기후 수호자** 칭호를 획득하셨습니다!")
-        elif final_score >= 3:
+        elif final_score >= len(quiz_ids) * 0.6:
             st.success("👏 잘하셨어요! 기후 변화에 대한 이해도가 높으시네요!")
             st.markdown("🌱 **기후 지킴이** 칭호를 획득하셨습니다!")
         else:
@@ -843,6 +1209,9 @@ with tab5:
         **당신의 작은 행동이 지구를 구합니다! 💚**
         """)
 
+    st.markdown("---")
+    render_leaderboard()
+
     # 추가 정보 섹션
     st.markdown("""
     ---
@@ -855,72 +1224,78 @@ with tab5:
     - [환경부 청소년 환경교육](https://www.me.go.kr/) - 정부 환경 교육 프로그램
     """)
 
-# ==================== 탭4: 팬데믹 기간 청소년 정신건강 ====================
-with tab4:
-    st.markdown('<div class="sub-header">🧠 팬데믹 기간 동안 청소년 정신건강 변화</div>', unsafe_allow_html=True)
 
-    # 팬데믹 기간 동안 청소년들의 정신건강 변화 그래프
-    mental_health_data = {
-        '연도': [2020, 2021, 2022, 2023],
-        '지속적인 슬픔 또는 절망감 비율': [35, 38, 42, 40],
-        '자살 심각하게 고려한 비율': [18, 20, 22, 20],
-        '자살 시도 비율': [8, 9, 10, 9.5]
-    }
-    df_mental_health = pd.DataFrame(mental_health_data)
-
-    fig_mental_health = go.Figure()
-    fig_mental_health.add_trace(go.Scatter(
-        x=df_mental_health['연도'],
-        y=df_mental_health['지속적인 슬픔 또는 절망감 비율'],
-        mode='lines+markers',
-        name='지속적인 슬픔 또는 절망감 비율',
-        line=dict(color='#FF6347')
-    ))
-    fig_mental_health.add_trace(go.Scatter(
-        x=df_mental_health['연도'],
-        y=df_mental_health['자살 심각하게 고려한 비율'],
-        mode='lines+markers',
-        name='자살 심각하게 고려한 비율',
-        line=dict(color='#4682B4')
-    ))
-    fig_mental_health.add_trace(go.Scatter(
-        x=df_mental_health['연도'],
-        y=df_mental_health['자살 시도 비율'],
-        mode='lines+markers',
-        name='자살 시도 비율',
-        line=dict(color='#32CD32')
-    ))
-
-    fig_mental_health.update_layout(
-        title='팬데믹 기간 동안 청소년 정신건강 변화',
-        xaxis_title='연도',
-        yaxis_title='비율 (%)',
-        template='plotly_white',
-        height=400
-    )
-    st.plotly_chart(fig_mental_health, use_container_width=True)
+# ==================== 탭 생성 ====================
+TABS = [
+    ("📊 공식 공개 데이터 대시보드", render_official_data_tab),
+    ("📈 사용자 데이터 분석", render_user_analysis_tab),
+    ("🧊 빙하 요인 & 청소년 행동", render_glacier_factors_tab),
+    ("🧠 팬데믹 기간 청소년 정신건강", render_mental_health_tab),
+    ("🎮 기후 행동 퀴즈 게임", render_quiz_tab),
+]
 
-    st.markdown("""
-    팬데믹 기간 동안 청소년들의 정신건강 상태는 크게 악화되었습니다. CDC의 2023년 청소년 위험행동조사에 따르면, 조사에 응답한 고등학생 중 약 40%가 지속적인 슬픔이나 절망감을 경험했으며, 20%는 자살을 심각하게 고려했고, 9.5%는 실제로 자살을 시도한 것으로 나타났습니다.
-    """, unsafe_allow_html=True)
+def create_lazy_tabs(labels):
+    # 선택된 탭만 실행한다 (st.tabs의 탭 상태 추적, requirements.txt의 Streamlit 최소 버전 필요)
+    tabs = st.tabs(labels, key="active_tab", on_change="rerun")
+    return [(tab, tab.open is not False) for tab in tabs]
 
-    st.markdown("""
-    **주요 요인:**
-    - 사회적 고립: 팬데믹으로 인한 학교 폐쇄와 사회적 거리두기로 인해 청소년들은 친구들과의 대면 상호작용이 줄어들었고, 이로 인해 외로움과 우울감이 증가했습니다.
-    - 가족 문제: 가족 내 갈등이나 경제적 어려움이 청소년들의 정신건강에 부정적인 영향을 미쳤습니다.
-    - 학교 지원 부족: 많은 청소년들이 학교에서 충분한 정신건강 지원을 받지 못하고 있다고 응답했습니다.
 
-    **팬데믹 후 청소년들의 목소리:**
-    팬데믹 이후, 청소년들은 자신들의 정신건강 문제를 해결하기 위한 목소리를 높이고 있습니다. 많은 청소년들이 학교에서의 정신건강 지원 확대와 사회적 고립 해소를 위한 정책적 노력을 요구하고 있습니다.
-    """, unsafe_allow_html=True)
+# 번들이 있으면 어느 탭이 열리든 그래프 캐시에 미리 만든 그림이 들어 있게 먼저 연다 (프로세스당 한 번)
+load_bundle()
 
-    st.markdown("""
-    <div class="data-source">
-    <h4>📚 데이터 출처</h4>
-    <ul>
-    <li>🧠 CDC 2023 청소년 위험행동조사: <a href="https://www.cdc.gov/yrbs/results/2023-yrbs-results.html" target="_blank">CDC 2023 YRBS</a></li>
-    <li>📈 청소년 정신건강 통계: <a href="https://www.aecf.org/blog/youth-mental-health-statistics" target="_blank">Annie E. Casey Foundation</a></li>
-    <li>📊 팬데믹 기간 청소년 정신건강 영향: <a href="https://pmc.ncbi.nlm.nih.gov/articles/PMC11526700/" target="_blank">PMC</a></li>
-    </ul>
-    </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+for number, ((container, is_open), (_, render_tab)) in enumerate(
+        zip(create_lazy_tabs([label for label, _ in TABS]), TABS), start=1):
+    if is_open:
+        with container, profiling.span(f"tab{number}"):
+            render_tab()
+
+# ==================== 디버그 패널 ====================
+if settings.DEBUG or st.query_params.get("debug") == "1":
+    with st.sidebar:
+        with st.expander("🧮 캐시 메모리 사용량"):
+            report = cache_memory_report()
+            figure_stats = FIGURE_CACHE.stats()
+            st.caption(f"총 {report['크기(KB)'].sum() / 1024:.2f} MB · "
+                       f"그래프 캐시 {figure_stats['entries']}/{figure_stats['maxsize']}개, "
+                       f"적중률 {figure_stats['hit_rate']:.0%}")
+            st.dataframe(report, hide_index=True, width="stretch")
+        with st.expander("📦 데이터셋별 메모리 (열 형식)"):
+            # 지금 들고 있는 데이터셋만 센다 (불러오지 않은 시계열은 빠진다)
+            scheduler = get_scheduler()
+            footprint_data = {f"시계열 {name}": scheduler.get(name) for name in CHART_SPECS
+                              if scheduler.status(name).get("loaded_at") is not None}
+            footprint_data["지역별 온도"] = generate_regional_temp_data()
+            footprint_data["빙하 요인"] = load_glacier_factors()
+            batch_results = st.session_state.get("batch_results")
+            if batch_results is not None:
+                footprint_data["일괄 분석 결과"] = batch_results[1]
+            footprint = schemas.footprint_report(footprint_data)
+            st.caption(f"기본 형식 {footprint['기본 형식(KB)'].sum():.1f} KB → "
+                       f"스키마 적용 {footprint['스키마 적용(KB)'].sum():.1f} KB")
+            st.dataframe(footprint, hide_index=True, width="stretch")
+        with st.expander("📥 모듈 import 시간"):
+            # lazy_imports로 불러온 모듈만 센다 (eager는 시작할 때, lazy는 처음 쓸 때 불러온다)
+            imports = import_report()
+            st.caption(f"시작 모드 {STARTUP_MODE} · {len(imports)}개 모듈 · "
+                       f"합계 {sum(seconds for _, seconds in imports) * 1000:.0f} ms")
+            st.dataframe(pd.DataFrame([
+                {"모듈": name, "시간 (ms)": round(seconds * 1000, 1)} for name, seconds in imports
+            ], columns=["모듈", "시간 (ms)"]), hide_index=True, width="stretch")
+
+# ==================== 구간 측정 패널 ====================
+profile_record = profiling.end_rerun(get_script_run_ctx().session_id, profile_history(), profile_log()) \
+    if show_profile or settings.PROFILE_LOG else None
+if show_profile:
+    with st.sidebar:
+        with st.expander("⏱️ 재실행 구간별 시간", expanded=True):
+            history = profile_history()
+            if profile_record is not None:
+                st.caption(f"이번 재실행 {profile_record['total_ms']:.0f} ms · 최근 {len(history)}회 기록 "
+                           "(tabN은 그 탭 전체, 나머지는 그 안의 구간)")
+                st.dataframe(pd.DataFrame([
+                    {"구간": name, "시간 (ms)": round(value["ms"], 1), "횟수": value["calls"]}
+                    for name, value in sorted(profile_record["spans"].items())
+                ]), hide_index=True, width="stretch")
+            st.markdown("**최근 재실행 분위수**")
+            st.dataframe(pd.DataFrame(profiling.rolling_percentiles(list(history))),
+                         hide_index=True, width="stretch")
@@ -0,0 +1,314 @@
+# 탭2 분석 결과(제출 기록) 저장소
+#
+# SQLite(WAL 모드) 파일 하나에 모든 세션의 제출을 모은다.
+# 스크립트 스레드는 submit()으로 큐에 넣고 바로 돌아가며, 쓰기 전용 백그라운드 스레드가
+# 쌓인 제출을 한 트랜잭션으로 묶어서 커밋한다(group commit).
+# 아직 커밋되지 않은 제출도 history()에 포함되므로 방금 제출한 결과가 바로 그래프에 보인다.
+#
+# 30일 행동 계획의 체크 상태는 계획마다 비트 마스크(정수) 하나로 저장한다.
+# 체크할 때마다 바뀐 비트(켠 비트, 끈 비트)만 모아 두었다가 PLAN_SAVE_DELAY 동안 변경이 없으면 한 번에 쓴다.
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+import schemas
+import settings
+
+logger = logging.getLogger(__name__)
+
+GROUP_COMMIT_SIZE = 256      # 한 트랜잭션에 묶는 최대 제출 수
+GROUP_COMMIT_DELAY = 0.05    # 첫 제출 이후 더 모으기 위해 기다리는 시간(초)
+BUSY_TIMEOUT_MS = 5000       # 다른 프로세스가 쓰는 중일 때 기다리는 시간
+PLAN_SAVE_DELAY = 2.0        # 계획 체크 상태를 저장하기 전 마지막 변경 후 기다리는 시간(초)
+
+FIELDS = ["age", "region", "family_size", "transport", "electricity_usage", "waste_separation",
+          "climate_concern", "action_willingness", "future_anxiety",
+          "carbon_transport", "carbon_electricity", "carbon_waste", "total_carbon",
+          "climate_stress", "action_gap", "potential_savings"]
+COLUMNS = ["submission_id", "user_id", "submitted_at", *FIELDS]
+QUIZ_SCORE_COLUMNS = ["user_id", "player", "class_id", "score", "total", "finished_at"]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    {", ".join(FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS submissions_user_time ON submissions (user_id, submitted_at);
+CREATE INDEX IF NOT EXISTS submissions_time ON submissions (submitted_at);
+CREATE TABLE IF NOT EXISTS plans (
+    user_id TEXT NOT NULL,
+    plan_id TEXT NOT NULL,
+    mask INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, plan_id)
+);
+CREATE TABLE IF NOT EXISTS quiz_scores (
+    user_id TEXT NOT NULL,
+    player TEXT NOT NULL,
+    class_id TEXT,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+"""
+
+_INSERTS = {
+    "submissions": f"INSERT OR IGNORE INTO submissions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+    "quiz_scores": f"INSERT INTO quiz_scores ({', '.join(QUIZ_SCORE_COLUMNS)}) VALUES ({', '.join('?' * len(QUIZ_SCORE_COLUMNS))})",
+}
+_INSERT_COLUMNS = {"submissions": COLUMNS, "quiz_scores": QUIZ_SCORE_COLUMNS}
+
+# 바뀐 비트만 반영한다: 다른 세션이 같은 계획의 다른 항목을 바꿔도 덮어쓰지 않는다
+_PLAN_UPSERT = """
+INSERT INTO plans (user_id, plan_id, mask, updated_at) VALUES (?, ?, ? & ~?, ?)
+ON CONFLICT (user_id, plan_id) DO UPDATE SET mask = (plans.mask | ?) & ~?, updated_at = excluded.updated_at
+"""
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return connection
+
+
+def _plain(value):
+    # numpy 스칼라(np.int64 등)는 sqlite3가 받지 못하므로 파이썬 값으로 바꾼다
+    return value.item() if hasattr(value, "item") else value
+
+
+class SubmissionStore:
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._pending = {}  # submission_id -> 기록 (커밋 전)
+        self._plan_pending = {}  # (user_id, plan_id) -> (켠 비트, 끈 비트, 마지막 변경 시각)
+        self._flush_plans = False
+        self._pending_lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self._listeners = []
+        self.commits = 0
+        self.committed_rows = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _connect(path) as connection:
+            connection.executescript(_SCHEMA)
+
+    def _reader(self):
+        # 읽기 연결은 스레드마다 하나씩 둔다 (WAL이라 쓰기와 서로 막지 않음)
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = _connect(self.path)
+        return connection
+
+    def add_listener(self, callback):
+        # 제출이 들어올 때마다 callback(record)를 부른다 (제출한 스레드에서 바로, 쓰기 큐에 넣기 전에 실행)
+        self._listeners.append(callback)
+
+    def submit(self, user_id, values, submitted_at=None):
+        record = {name: _plain(values.get(name)) for name in FIELDS}
+        record["transport"] = values.get("transport") or ""
+        record.update(submission_id=uuid.uuid4().hex, user_id=user_id,
+                      submitted_at=time.time() if submitted_at is None else submitted_at)
+        with self._pending_lock:
+            self._pending[record["submission_id"]] = record
+        # 리스너가 먼저 보므로 committed_submissions()로 다시 읽히는 기록은 리스너가 이미 본 것이다
+        for callback in self._listeners:
+            callback(record)
+        self._queue.put(("submissions", record))
+        self._ensure_writer()
+        return record["submission_id"]
+
+    def post_quiz_score(self, record):
+        # 퀴즈 점수 기록. 제출과 같은 쓰기 스레드가 묶어서 저장한다
+        self._queue.put(("quiz_scores", record))
+        self._ensure_writer()
+
+    def quiz_scores(self, after_rowid=0):
+        # 커밋된 퀴즈 점수 중 rowid가 after_rowid보다 큰 것 (다른 프로세스가 저장한 점수 포함), rowid 순서
+        # 반환값: (마지막 rowid, 기록 목록)
+        rows = self._reader().execute(
+            f"SELECT rowid, {', '.join(QUIZ_SCORE_COLUMNS)} FROM quiz_scores WHERE rowid > ? ORDER BY rowid",
+            [after_rowid]).fetchall()
+        last = rows[-1][0] if rows else after_rowid
+        return last, [dict(zip(QUIZ_SCORE_COLUMNS, row[1:])) for row in rows]
+
+    def _ensure_writer(self):
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="submission-writer", daemon=True)
+                self._writer.start()
+
+    def update_plan(self, user_id, plan_id, set_bits=0, clear_bits=0):
+        # 계획 체크 상태 변경. 저장은 쓰기 스레드가 변경이 잠잠해진 뒤 한 번에 한다
+        key = (user_id, plan_id)
+        with self._pending_lock:
+            old_set, old_clear, _ = self._plan_pending.get(key, (0, 0, 0.0))
+            # 나중 변경이 앞선 변경을 덮어쓴다
+            self._plan_pending[key] = ((old_set & ~clear_bits) | set_bits,
+                                       (old_clear & ~set_bits) | clear_bits,
+                                       time.monotonic())
+        self._queue.put(None)  # 쓰기 스레드를 깨워 저장 시각을 다시 계산하게 한다
+        self._ensure_writer()
+
+    def plan_mask(self, user_id, plan_id):
+        # 저장된 마스크에 아직 쓰지 않은 변경을 더한 값. 변경은 여러 번 적용해도 결과가 같다
+        with self._pending_lock:
+            pending = self._plan_pending.get((user_id, plan_id))
+        row = self._reader().execute("SELECT mask FROM plans WHERE user_id = ? AND plan_id = ?",
+                                     [user_id, plan_id]).fetchone()
+        mask = row[0] if row else 0
+        if pending:
+            mask = (mask | pending[0]) & ~pending[1]
+        return mask
+
+    def _due_plans(self, now):
+        with self._pending_lock:
+            force = self._flush_plans
+            self._flush_plans = False
+            return {key: diff for key, diff in self._plan_pending.items()
+                    if force or now - diff[2] >= PLAN_SAVE_DELAY}
+
+    def _next_plan_timeout(self):
+        with self._pending_lock:
+            if not self._plan_pending:
+                return None
+            oldest = min(diff[2] for diff in self._plan_pending.values())
+        return max(oldest + PLAN_SAVE_DELAY - time.monotonic(), 0.0)
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        while True:
+            # 큐 항목이 None이면 계획 변경 알림, 아니면 (테이블, 기록)
+            try:
+                items = [self._queue.get(timeout=self._next_plan_timeout())]
+            except queue.Empty:
+                items = []
+            deadline = time.monotonic() + GROUP_COMMIT_DELAY
+            while items and len(items) < GROUP_COMMIT_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            batch, scores = [], []
+            for item in items:
+                if item is not None:
+                    (batch if item[0] == "submissions" else scores).append(item[1])
+            plans = self._due_plans(time.monotonic())
+            now = time.time()
+            try:
+                with connection:
+                    for table, records in (("submissions", batch), ("quiz_scores", scores)):
+                        if records:
+                            columns = _INSERT_COLUMNS[table]
+                            connection.executemany(_INSERTS[table], [[record[name] for name in columns] for record in records])
+                    if plans:
+                        connection.executemany(_PLAN_UPSERT, [
+                            (user_id, plan_id, set_bits, clear_bits, now, set_bits, clear_bits)
+                            for (user_id, plan_id), (set_bits, clear_bits, _) in plans.items()])
+            except sqlite3.Error:
+                # 실패한 묶음은 다시 큐에 넣고 잠시 뒤에 재시도한다 (그동안은 메모리에서 읽힘)
+                logger.exception("제출 기록 %d건, 퀴즈 점수 %d건, 계획 %d건을 저장하지 못했습니다",
+                                 len(batch), len(scores), len(plans))
+                for item in items:
+                    if item is not None:
+                        self._queue.put(item)
+                    self._queue.task_done()
+                time.sleep(1.0)
+                continue
+            if batch:
+                self.commits += 1
+                self.committed_rows += len(batch)
+            with self._pending_lock:
+                for record in batch:
+                    self._pending.pop(record["submission_id"], None)
+                for key, diff in plans.items():
+                    # 쓰는 사이에 다시 바뀌었으면 남겨 두었다가 다음에 쓴다
+                    if self._plan_pending.get(key) == diff:
+                        del self._plan_pending[key]
+            for _ in items:
+                self._queue.task_done()
+
+    def flush(self):
+        # 큐에 남은 제출과 계획 변경이 모두 저장될 때까지 기다린다
+        with self._pending_lock:
+            self._flush_plans = True
+        self._queue.put(None)
+        self._ensure_writer()
+        self._queue.join()
+
+    def _pending_rows(self, user_id=None, start=None, end=None):
+        with self._pending_lock:
+            records = list(self._pending.values())
+        return [r for r in records
+                if (user_id is None or r["user_id"] == user_id)
+                and (start is None or r["submitted_at"] >= start)
+                and (end is None or r["submitted_at"] < end)]
+
+    def _query(self, where, params, pending):
+        # 커밋 전 기록을 먼저 복사한 뒤 DB를 읽고 submission_id로 중복을 없앤다.
+        # 그 사이에 커밋된 기록은 양쪽에 모두 있고, 빠지는 기록은 없다.
+        rows = self._reader().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM submissions {where} ORDER BY submitted_at", params).fetchall()
+        frame = pd.DataFrame(rows, columns=COLUMNS)
+        if pending:
+            frame = pd.concat([frame, pd.DataFrame(pending, columns=COLUMNS)], ignore_index=True)
+            frame = frame.drop_duplicates("submission_id").sort_values("submitted_at", ignore_index=True)
+        frame["submitted_at"] = pd.to_datetime(frame["submitted_at"], unit="s", utc=True).dt.tz_convert("Asia/Seoul")
+        return schemas.apply("survey", frame)
+
+    def history(self, user_id, start=None, end=None):
+        # 한 사용자의 [start, end) 구간 제출 기록 (start/end는 epoch 초, None이면 제한 없음)
+        pending = self._pending_rows(user_id, start, end)
+        where, params = "WHERE user_id = ?", [user_id]
+        if start is not None:
+            where += " AND submitted_at >= ?"
+            params.append(start)
+        if end is not None:
+            where += " AND submitted_at < ?"
+            params.append(end)
+        return self._query(where, params, pending)
+
+    def pending_submissions(self):
+        # 아직 커밋되지 않은 이 프로세스의 제출
+        return self._pending_rows()
+
+    def committed_submissions(self, after_rowid=0, columns=COLUMNS):
+        # 커밋된 제출 중 rowid가 after_rowid보다 큰 것 (다른 프로세스의 제출 포함), rowid 순서
+        # 반환값: (마지막 rowid, 기록 목록)
+        rows = self._reader().execute(
+            f"SELECT rowid, {', '.join(columns)} FROM submissions WHERE rowid > ? ORDER BY rowid",
+            [after_rowid]).fetchall()
+        last = rows[-1][0] if rows else after_rowid
+        return last, [dict(zip(columns, row[1:])) for row in rows]
+
+    def all_submissions(self, start=None):
+        pending = self._pending_rows(start=start)
+        if start is None:
+            return self._query("", [], pending)
+        return self._query("WHERE submitted_at >= ?", [start], pending)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # 프로세스당 저장소 하나 (쓰기 스레드도 하나)
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SubmissionStore(settings.SUBMISSIONS_DB)
+        return _store
@@ -0,0 +1,45 @@
+# climate_data: 형식이 맞지 않는 기온 CSV는 SchemaError로 거부한다
+import pytest
+
+import climate_data
+import settings
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path / "cache")
+
+
+def write(tmp_path, text):
+    path = tmp_path / "temp.csv"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_annual_means_from_monthly_file(tmp_path):
+    months = ",".join(climate_data.MONTHS)
+    path = write(tmp_path, f"Year,{months}\n2000,{','.join(['0.5'] * 12)}\n2001,{','.join(['1.0'] * 11)},***\n")
+    table = climate_data.load_temperature_table(path)
+    assert list(table["year"]) == [2000]
+    assert table["temp_anomaly"].iloc[0] == pytest.approx(0.5)
+
+
+def test_monthly_file_without_complete_year_is_rejected(tmp_path):
+    path = write(tmp_path, "Date,Anomaly\n202401,1.1\n202402,1.2\n202403,1.3\n")
+    with pytest.raises(climate_data.SchemaError):
+        climate_data.load_temperature_table(path)
+    assert len(climate_data.load_temperature_table(path, resolution="monthly")) == 3
+
+
+def test_malformed_rows_raise_schema_error(tmp_path):
+    path = write(tmp_path, "Year,Anomaly\n2000,0.5\n2001,0.6,0.7,0.8\n")
+    with pytest.raises(climate_data.SchemaError):
+        climate_data.parse_temperature_csv(path)
+
+
+def test_missing_column_raises_schema_error(tmp_path, monkeypatch):
+    # 헤더 검사에서 고른 열이 pandas가 읽은 표에 없는 경우
+    monkeypatch.setattr(climate_data, "_detect_layout", lambda cells: ("wide", None))
+    path = write(tmp_path, "Year,Jan,Feb\n2000,0.5,0.6\n")
+    with pytest.raises(climate_data.SchemaError):
+        climate_data.parse_temperature_csv(path)
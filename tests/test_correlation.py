@@ -0,0 +1,79 @@
+# correlation: 합으로 계산한 상관계수가 pandas의 결측 제외 계산과 같고, 부트스트랩은 시드로 재현된다
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=60)
+    y = 0.6 * np.roll(x, 2) + rng.normal(scale=0.8, size=60)
+    x[[4, 17, 40]] = np.nan
+    y[[9, 41, 55]] = np.nan
+    return x, y
+
+
+def test_lagged_correlation_matches_pandas_shift(series):
+    x, y = series
+    lags, r = correlation.lagged_correlation(x, y, max_lag=5)
+    assert list(lags) == list(range(-5, 6))
+    # 지연 k: x[t]와 y[t + k]
+    expected = [pd.Series(x).corr(pd.Series(y).shift(-k)) for k in lags]
+    np.testing.assert_allclose(r, expected, rtol=1e-9, atol=1e-12)
+    assert lags[np.nanargmax(r)] == 2
+
+
+def test_lagged_correlation_needs_min_overlap():
+    x = np.arange(8, dtype=np.float64)
+    lags, r = correlation.lagged_correlation(x, x[::-1].copy(), max_lag=7)
+    overlap = len(x) - np.abs(lags)
+    assert np.isnan(r[overlap < correlation.MIN_OVERLAP]).all()
+    assert np.isfinite(r[overlap >= correlation.MIN_OVERLAP]).all()
+
+
+def test_rolling_correlation_matches_pandas(series):
+    x, y = series
+    expected = pd.Series(x).rolling(10).corr(pd.Series(y)).to_numpy()
+    np.testing.assert_allclose(correlation.rolling_correlation(x, y, 10), expected, rtol=1e-9, atol=1e-12,
+                               equal_nan=True)
+
+
+def test_correlation_matrix_uses_pairwise_complete_years(series):
+    x, y = series
+    matrix = np.column_stack([x, y, x * 2 + 1])
+    expected = pd.DataFrame(matrix).corr().to_numpy()
+    np.testing.assert_allclose(correlation.correlation_matrix(matrix), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_bootstrap_ci_is_deterministic_for_a_seed(series):
+    x, y = series
+    first = correlation.bootstrap_ci(x, y, resamples=2000, seed=11)
+    again = correlation.bootstrap_ci(x, y, resamples=2000, seed=11)
+    other = correlation.bootstrap_ci(x, y, resamples=2000, seed=12)
+
+    assert first == again
+    assert first[1:3] != other[1:3]
+    r, low, high, n = first
+    valid = np.isfinite(x) & np.isfinite(y)
+    assert n == valid.sum()
+    assert r == pytest.approx(np.corrcoef(x[valid], y[valid])[0, 1])
+    assert -1 <= low < r < high <= 1
+
+
+def test_bootstrap_ci_with_too_few_years():
+    r, low, high, n = correlation.bootstrap_ci(np.array([1.0, 2.0, np.nan]), np.array([2.0, 1.0, 3.0]))
+    assert n == 2
+    assert np.isnan([r, low, high]).all()
+
+
+def test_lagged_bootstrap_ci_is_deterministic(series):
+    x, y = series
+    lags = np.arange(-3, 4)
+    first = correlation.lagged_bootstrap_ci(x, y, lags, resamples=500, seed=5)
+    again = correlation.lagged_bootstrap_ci(x, y, lags, resamples=500, seed=5)
+    np.testing.assert_array_equal(first[0], again[0])
+    np.testing.assert_array_equal(first[1], again[1])
+    assert (first[0] <= first[1]).all()
@@ -0,0 +1,166 @@
+# data_sources: 로컬 HTTP 서버를 원격 소스 대신 띄워 스냅샷 갱신·재검증·실패 시 대체 동작을 확인한다
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import climate_data
+import data_sources
+import settings
+
+GLACIER_CSV = b"year,annual_balance\n2000,-0.5\n2001,-0.25\n2002,-1.0\n"
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class Upstream:
+    # 응답을 테스트 중에 바꿀 수 있는 원격 소스 대역
+    def __init__(self):
+        self.status = 200
+        self.body = GLACIER_CSV
+        self.etag = ETAG
+        self.requests = []  # 받은 요청 헤더
+
+    def handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests.append(dict(self.headers))
+                if upstream.status == 200 and self.headers.get("If-None-Match") == upstream.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(upstream.status)
+                self.send_header("ETag", upstream.etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Content-Length", str(len(upstream.body)))
+                self.end_headers()
+                self.wfile.write(upstream.body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path)
+    server_state = Upstream()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), server_state.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    previous = data_sources.configure_source("glacier", url=f"http://127.0.0.1:{server.server_port}/glacier.csv", ttl=3600)
+    yield server_state
+    data_sources.SOURCES["glacier"] = previous
+    server.shutdown()
+    server.server_close()
+
+
+def test_load_sources_reads_given_environment():
+    sources = data_sources.load_sources({"CLIMATE_SOURCE_GLACIER_URL": "http://example.test/g.csv",
+                                         "CLIMATE_SOURCE_GLACIER_TTL": "60"})
+    assert sources["glacier"]["url"] == "http://example.test/g.csv"
+    assert sources["glacier"]["ttl"] == 60
+    assert sources["noaa"]["url"].startswith("https://")
+
+
+def test_fetch_downloads_snapshot(upstream):
+    frame = data_sources.fetch_dataset("glacier")
+    assert list(frame["year"]) == [2000, 2001, 2002]
+    assert list(frame["mass_balance"]) == [-0.5, -0.75, -1.75]
+    info = data_sources.snapshot_info("glacier")
+    assert info["etag"] == ETAG
+    assert info["last_modified"] == LAST_MODIFIED
+    assert len(upstream.requests) == 1
+
+
+def test_expired_snapshot_is_revalidated_with_304(upstream):
+    data_sources.fetch_dataset("glacier")
+    fetched_at = data_sources.snapshot_info("glacier")["fetched_at"]
+    data_sources.configure_source("glacier", ttl=0)
+
+    frame = data_sources.fetch_dataset("glacier")
+
+    assert len(upstream.requests) == 2
+    headers = upstream.requests[-1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    info = data_sources.snapshot_info("glacier")
+    assert info["fetched_at"] == fetched_at
+    assert info["validated_at"] >= fetched_at
+    assert len(frame) == 3
+
+
+def test_upstream_failure_serves_last_good_snapshot(upstream):
+    data_sources.fetch_dataset("glacier")
+    data_sources.configure_source("glacier", ttl=0)
+    upstream.status = 500
+    upstream.body = b"server error"
+
+    frame = data_sources.fetch_dataset("glacier")
+
+    assert len(upstream.requests) == 2
+    assert list(frame["year"]) == [2000, 2001, 2002]
+    assert data_sources.snapshot_info("glacier")["failed_at"] is not None
+
+
+def test_unparseable_response_keeps_last_good_snapshot(upstream):
+    data_sources.fetch_dataset("glacier")
+    data_sources.configure_source("glacier", ttl=0)
+    upstream.body = b"no header here\n1,2\n"
+    upstream.requests.clear()
+
+    # ETag가 같으면 304가 되므로 헤더 없이 받게 메타의 ETag를 지운다
+    root, _, meta_path = data_sources._paths("glacier")
+    meta = data_sources._read_meta(meta_path)
+    meta.update(etag=None, last_modified=None)
+    data_sources._write_meta(root, meta_path, meta)
+
+    frame = data_sources.fetch_dataset("glacier")
+    assert list(frame["year"]) == [2000, 2001, 2002]
+    assert data_sources.snapshot_info("glacier")["failed_at"] is not None
+
+
+def test_corrupt_snapshot_raises_source_unavailable(upstream):
+    data_sources.fetch_dataset("glacier")
+    _, body_path, _ = data_sources._paths("glacier")
+    with open(body_path, "wb") as f:
+        f.write(b"garbage without a year header\n")
+
+    with pytest.raises(data_sources.SourceUnavailable):
+        data_sources.fetch_dataset("glacier")
+
+
+def test_no_snapshot_and_no_url_raises_source_unavailable(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path)
+    monkeypatch.setitem(data_sources.SOURCES, "glacier", {**data_sources.SOURCES["glacier"], "url": ""})
+    with pytest.raises(data_sources.SourceUnavailable):
+        data_sources.fetch_dataset("glacier")
+
+
+def test_noaa_updates_leave_no_orphan_column_cache(upstream, monkeypatch):
+    # 후보 파일 검사는 캐시를 만들지 않고, 스냅샷마다 한 번만 파싱한다
+    parsed = []
+    parse = climate_data.parse_temperature_csv
+    monkeypatch.setattr(climate_data, "parse_temperature_csv", lambda path: parsed.append(path) or parse(path))
+    url = data_sources.SOURCES["glacier"]["url"].replace("glacier.csv", "noaa.csv")
+    previous = data_sources.configure_source("noaa", url=url, ttl=0)
+    try:
+        for version in range(3):
+            upstream.body = f"Year,Anomaly\n2000,0.{version}\n2001,0.5\n".encode()
+            upstream.etag = f'"noaa-{version}"'
+            frame = data_sources.fetch_dataset("noaa")
+            assert frame["temp_anomaly"].iloc[0] == pytest.approx(version / 10)
+    finally:
+        data_sources.SOURCES["noaa"] = previous
+
+    assert len(upstream.requests) == 3
+    assert len(parsed) == 3
+    _, body_path, _ = data_sources._paths("noaa")
+    cache_root = climate_data._cache_root(body_path)
+    assert os.listdir(settings.CACHE_DIR / "climate_data") == [os.path.basename(cache_root)]
+    assert sorted(name for name in os.listdir(cache_root) if not name.endswith(".json")) == \
+        [climate_data._read_pointer(cache_root)["dir"]]
@@ -0,0 +1,70 @@
+# leaderboard: 같은 DB를 쓰는 두 프로세스(저장소 두 개)의 점수가 스냅샷마다 순위에 반영된다
+import pytest
+
+from leaderboard import GLOBAL, Leaderboard, TopK
+from submission_store import SubmissionStore
+
+
+def score(user_id, value, finished_at, class_id=None):
+    return {"user_id": user_id, "player": user_id.upper(), "class_id": class_id,
+            "score": value, "total": 5, "finished_at": finished_at}
+
+
+def ranking(board, class_id=GLOBAL):
+    return [(row["user_id"], row["score"]) for row in board.top(class_id)]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    # 프로세스마다 자기 저장소(쓰기 스레드)를 갖는 상황
+    path = tmp_path / "submissions.sqlite3"
+    return SubmissionStore(path), SubmissionStore(path)
+
+
+def post(store, board, record):
+    store.post_quiz_score(record)
+    if board is not None:
+        board.post(record)
+
+
+def test_ranking_across_two_store_snapshots(stores):
+    here, other = stores
+    board = Leaderboard(k=3, interval=0, load_scores=here.quiz_scores)
+
+    post(here, board, score("a", 3, 10.0, "1반"))
+    post(other, None, score("b", 4, 11.0, "1반"))
+    post(other, None, score("c", 3, 9.0, "2반"))
+    here.flush()
+    other.flush()
+    assert ranking(board) == [("b", 4), ("c", 3), ("a", 3)]  # 같은 점수면 먼저 끝낸 사람이 앞선다
+    assert ranking(board, "1반") == [("b", 4), ("a", 3)]
+
+    # 두 번째 스냅샷: 다른 프로세스의 새 점수만 읽고, 이 프로세스의 점수는 다시 읽혀도 한 번만 센다
+    post(other, None, score("a", 5, 20.0, "1반"))
+    post(other, None, score("d", 1, 21.0))
+    post(here, board, score("e", 4, 22.0, "2반"))
+    post(other, None, score("b", 2, 23.0, "1반"))  # 최고 점수보다 낮으면 순위가 바뀌지 않는다
+    here.flush()
+    other.flush()
+    assert ranking(board) == [("a", 5), ("b", 4), ("e", 4)]
+    assert ranking(board, "1반") == [("a", 5), ("b", 4)]
+    assert ranking(board, "2반") == [("e", 4), ("c", 3)]
+
+
+def test_snapshot_is_reused_within_interval(stores):
+    here, other = stores
+    board = Leaderboard(interval=3600, load_scores=here.quiz_scores)
+    post(other, None, score("a", 3, 1.0))
+    other.flush()
+    assert ranking(board) == [("a", 3)]
+
+    post(other, None, score("b", 5, 2.0))
+    other.flush()
+    assert ranking(board) == [("a", 3)]
+
+
+def test_top_k_keeps_best_score_per_user():
+    top = TopK(2)
+    for record in (score("a", 2, 1.0), score("b", 3, 2.0), score("a", 4, 3.0), score("c", 1, 4.0), score("a", 1, 5.0)):
+        top.add(record)
+    assert [(row["user_id"], row["score"]) for row in top.rows()] == [("a", 4), ("b", 3)]
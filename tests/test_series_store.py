@@ -0,0 +1,112 @@
+# series_store: 덧붙인 저장소는 같은 관측으로 처음부터 만든 저장소와 값이 같아야 한다
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+from series_store import SMOOTHING_WINDOWS, SeriesStore
+
+COLUMNS = ["mass_balance", "annual_loss"]
+
+
+def annual_frame(n, start=1950):
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        "year": np.arange(start, start + n, dtype=np.int16),
+        "mass_balance": rng.normal(size=n).astype(np.float32),
+        "annual_loss": rng.normal(size=n).astype(np.float32),
+    })
+    frame.loc[[5, 31], "annual_loss"] = np.nan  # 창 안의 NaN은 이동평균도 NaN
+    return frame
+
+
+def monthly_frame(n):
+    frame = annual_frame(n)
+    frame["year"] = (1950 + np.arange(n) // 12).astype(np.int16)
+    frame["month"] = (1 + np.arange(n) % 12).astype(np.int8)
+    return frame
+
+
+def assert_same_store(store, expected):
+    assert len(store) == len(expected)
+    np.testing.assert_array_equal(store.years, expected.years)
+    np.testing.assert_array_equal(store.x, expected.x)
+    for column in COLUMNS:
+        np.testing.assert_array_equal(store.values[column], expected.values[column])
+        for window in SMOOTHING_WINDOWS:
+            np.testing.assert_allclose(store.smoothed[column, window], expected.smoothed[column, window],
+                                       rtol=1e-6, equal_nan=True)
+            _, values = store.view(store.years[3], store.years[-1], column, window)
+            _, full = expected.view(store.years[3], store.years[-1], column, window)
+            np.testing.assert_allclose(values, full, rtol=1e-6, equal_nan=True)
+
+
+@pytest.mark.parametrize("make_frame", [annual_frame, monthly_frame])
+@pytest.mark.parametrize("steps", [[1], [3, 1, 1], [10, 40], [1] * 12])
+def test_appended_store_matches_full_rebuild(make_frame, steps):
+    frame = make_frame(40 + sum(steps))
+    store = SeriesStore(frame.iloc[:40], COLUMNS)
+    n = 40
+    for k in steps:
+        store = store.append(frame.iloc[n:n + k])
+        n += k
+        assert_same_store(store, SeriesStore(frame.iloc[:n], COLUMNS))
+
+
+def test_append_keeps_published_versions_unchanged():
+    frame = annual_frame(60)
+    base = SeriesStore(frame.iloc[:40], COLUMNS)
+    first = base.append(frame.iloc[40:45])
+    # 이미 덧붙인 버전이 있는 저장소에 다른 관측을 덧붙이면 버퍼를 옮겨서 따로 만든다
+    branch = base.append(frame.iloc[40:42])
+    later = first.append(frame.iloc[45:60])
+
+    assert_same_store(base, SeriesStore(frame.iloc[:40], COLUMNS))
+    assert_same_store(first, SeriesStore(frame.iloc[:45], COLUMNS))
+    assert_same_store(branch, SeriesStore(frame.iloc[:42], COLUMNS))
+    assert_same_store(later, SeriesStore(frame.iloc[:60], COLUMNS))
+
+
+def test_append_rejects_overlapping_observations():
+    frame = annual_frame(45)
+    store = SeriesStore(frame.iloc[:40], COLUMNS)
+    with pytest.raises(ValueError):
+        store.append(frame.iloc[39:45])
+
+
+@pytest.fixture
+def source(monkeypatch):
+    # update_series_store가 읽는 원본을 바꿔 가며 돌려준다
+    frames = {}
+    monkeypatch.setattr(datasets, "load_frame", lambda name: frames["glacier"].copy())
+    return frames
+
+
+def test_update_appends_new_observations(source):
+    frame = annual_frame(50)
+    store = SeriesStore(frame.iloc[:40], COLUMNS)
+    source["glacier"] = frame
+
+    updated = datasets.update_series_store("glacier", store)
+
+    assert updated.appended_from == 40
+    assert_same_store(updated, SeriesStore(frame, COLUMNS))
+
+
+def test_update_without_new_observations_keeps_store(source):
+    frame = annual_frame(40)
+    store = SeriesStore(frame, COLUMNS)
+    source["glacier"] = frame.iloc[::-1]  # 순서만 다른 같은 관측
+    assert datasets.update_series_store("glacier", store) is store
+
+
+@pytest.mark.parametrize("revise", [
+    lambda frame: frame.assign(annual_loss=frame["annual_loss"].where(frame.index != 10, np.float32(9.5))),
+    lambda frame: frame.drop(index=20),
+    lambda frame: frame.iloc[:30],
+])
+def test_update_with_revised_history_returns_none(source, revise):
+    frame = annual_frame(50)
+    store = SeriesStore(frame.iloc[:40], COLUMNS)
+    source["glacier"] = revise(frame).reset_index(drop=True)
+    assert datasets.update_series_store("glacier", store) is None